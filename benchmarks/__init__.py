@@ -0,0 +1,10 @@
+"""Benchmarklar (bot va Telegram siz, lokal Postgres da)
+
+    python -m benchmarks.db_report --workers 300 --months 6 --output natija.json
+    python -m benchmarks.db_report --workers 300 --months 6 --baseline natija.json
+    python -m benchmarks.replay --workers 300 --latency 0.05 --retry-after 0.01 --output replay.json
+    python -m benchmarks.fake_telegram --port 8081 --burst 300   # bot BOT_API_URL=http://127.0.0.1:8081 bilan
+
+Har bir ishga tushirish alohida vaqtinchalik bazani yaratadi (--db-name, standart
+workforce_bench) va oxirida o'chiradi: ishlab turgan bazaga tegmaydi.
+"""
@@ -0,0 +1,113 @@
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+import asyncpg
+
+FIRST_NAMES = [
+    "Aziz", "Bekzod", "Dilshod", "Eldor", "Farrux", "G'ayrat", "Jasur", "Jamshid", "Javlon", "Kamol",
+    "Laziz", "Mansur", "Nodir", "Otabek", "Po'lat", "Rustam", "Sardor", "Sherzod", "Temur", "Ulug'bek",
+    "Vohid", "Xurshid", "Yusuf", "Zafar", "Dilnoza", "Gulnora", "Madina", "Nigora", "Shahlo", "Zarina",
+]
+LAST_NAMES = [
+    "Abdullayev", "Aliyev", "Ahmedov", "Botirov", "Ergashev", "Fayzullayev", "G'aniyev", "Hasanov",
+    "Ibragimov", "Jo'rayev", "Karimov", "Latipov", "Mirzayev", "Nazarov", "Olimov", "Qodirov",
+    "Rahimov", "Saidov", "Toshpo'latov", "Usmonov", "Valiyev", "Xolmatov", "Yo'ldoshev", "Zokirov",
+]
+
+# Soatlik stavkalar va ularning ulushi
+RATES = [(12000, 10), (15000, 30), (18000, 25), (20000, 15), (25000, 12), (30000, 6), (40000, 2)]
+# Kelgan kundagi soatlar: asosan 8, ba'zan qo'shimcha ish yoki yarim kun
+HOURS = [(8, 70), (9, 6), (10, 10), (11, 3), (12, 4), (4, 5), (6, 2)]
+# Bir oyda nechta avans
+ADVANCES_PER_MONTH = [(0, 35), (1, 40), (2, 20), (3, 5)]
+
+def _weighted(rng: random.Random, table: List[Tuple[int, int]]) -> int:
+    values, weights = zip(*table)
+    return rng.choices(values, weights)[0]
+
+def _month_start(day: date, back: int) -> date:
+    index = day.year * 12 + day.month - 1 - back
+    return date(index // 12, index % 12 + 1, 1)
+
+def generate(workers: int, months: int, today: date, seed: int = 1):
+    """Sintetik ma'lumotlar: ishchilar, kunlik davomat va avanslar (COPY uchun tayyor qatorlar)
+
+    - davr: `months` oy, joriy oy (bugungacha) bilan tugaydi
+    - ishchilarning ~80% davr boshidan oldin kelgan, ~8% davr ichida arxivlangan
+    - yakshanba odatda dam olish kuni; har bir ishchining o'z "intizomi" (kelish ehtimoli)
+    - kelmagan kunlarning bir qismi 0 soat bilan yoziladi, qolgani umuman kiritilmaydi
+    - avans: oyiga 0-3 ta, ishlab topilganning 10-40% i, 10 ming so'mga yaxlitlangan
+    """
+    rng = random.Random(seed)
+    start = _month_start(today, months - 1)
+    period_days = (today - start).days + 1
+
+    worker_rows, attendance_rows, advance_rows = [], [], []
+    for worker_id in range(1, workers + 1):
+        if rng.random() < 0.8:
+            created = start - timedelta(days=rng.randint(1, 365))
+        else:
+            created = start + timedelta(days=rng.randrange(period_days))
+        archived = None
+        if rng.random() < 0.08 and created < today:
+            archived = created + timedelta(days=rng.randint(1, max(1, (today - created).days)))
+            archived = min(archived, today)
+
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        rate = _weighted(rng, RATES)
+        telegram_id = 100_000_000 + worker_id if rng.random() < 0.75 else None
+        worker_rows.append((worker_id, name, rate, 100_000 + worker_id, telegram_id,
+                            archived is None, created, archived))
+
+        # Davomat
+        reliability = rng.uniform(0.8, 0.98)
+        earned: Dict[date, float] = {}
+        day = max(created, start)
+        last = archived or today
+        while day <= last:
+            if day.weekday() == 6:
+                hours = float(rng.randint(4, 8)) if rng.random() < 0.1 else None
+            elif rng.random() < reliability:
+                hours = float(_weighted(rng, HOURS))
+            else:
+                hours = 0.0 if rng.random() < 0.6 else None
+            if hours is not None:
+                attendance_rows.append((worker_id, day, hours, "Keldi" if hours > 0 else "Kelmadi"))
+                month = day.replace(day=1)
+                earned[month] = earned.get(month, 0.0) + hours * rate
+            day += timedelta(days=1)
+
+        # Avanslar
+        for month, amount_earned in earned.items():
+            month_days = min(28, (last - month).days + 1)
+            for _ in range(_weighted(rng, ADVANCES_PER_MONTH)):
+                amount = max(50_000, round(amount_earned * rng.uniform(0.1, 0.4) / 10_000) * 10_000)
+                advance_day = month + timedelta(days=rng.randrange(max(1, month_days)))
+                advance_rows.append((worker_id, advance_day, float(amount), rng.random() < 0.92))
+
+    return worker_rows, attendance_rows, advance_rows
+
+async def populate(conn: asyncpg.Connection, workers: int, months: int, today: date, seed: int = 1) -> Dict[str, int]:
+    """Jadvallarni COPY bilan to'ldirish va payroll_monthly ni qayta hisoblash uchun tayyorlash"""
+    worker_rows, attendance_rows, advance_rows = generate(workers, months, today, seed)
+
+    async with conn.transaction():
+        await conn.copy_records_to_table(
+            "workers", records=worker_rows,
+            columns=["id", "name", "rate", "code", "telegram_id", "active", "created_at", "archived_at"]
+        )
+        await conn.execute("SELECT setval(pg_get_serial_sequence('workers', 'id'), $1)", workers)
+        await conn.copy_records_to_table(
+            "attendance", records=attendance_rows, columns=["worker_id", "date", "hours", "status"]
+        )
+        await conn.copy_records_to_table(
+            "advances", records=advance_rows, columns=["worker_id", "date", "amount", "approved"]
+        )
+    await conn.execute("ANALYZE")
+
+    return {
+        "workers": len(worker_rows),
+        "active_workers": sum(1 for row in worker_rows if row[5]),
+        "attendance_rows": len(attendance_rows),
+        "advance_rows": len(advance_rows),
+    }
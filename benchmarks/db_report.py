@@ -0,0 +1,335 @@
+"""Baza va hisobot yo'llari benchmarki
+
+    python -m benchmarks.db_report --workers 1000 --months 12 --repeat 10 --output natija.json
+
+O'lchanadi:
+- get_month_data
+- get_workers_for_report + get_month_attendance (Excel hisobot uchun ma'lumot)
+- get_general_statistics
+- get_worker_stats (har bir takrorda --stats-calls ta tasodifiy ishchi, bitta chaqiruv vaqti)
+- excel_gen.generate_report_bytes (botdagi oqim rejimi)
+- rollup.*: payroll_monthly dan o'qish va yozish yo'llari (add_attendance, add_attendance_bulk,
+  rebuild_payroll_monthly); raw.* - xuddi shu oylik yig'indi xom jadvallardan (taqqoslash uchun)
+- paging.*: ishchilar ro'yxati keyset sahifalari (birinchi, o'rta, oxirgi); raw.offset_last_page - OFFSET bilan
+- search.*: ism bo'yicha qidiruv (pg_trgm bo'lsa trgm, aks holda plain)
+- year_report.*: yillik hisobot ma'lumoti; oylar qatorlari (build_month_rows) ketma-ket va
+  process pool da parallel (REPORT_SHEET_WORKERS, standart - CPU soni); bitta kitobga yozish
+
+--explain: asosiy so'rovlar uchun EXPLAIN (ANALYZE, BUFFERS) xulosasi natijaga qo'shiladi
+(reja tugunlari, ishlatilgan indekslar, bajarilish vaqti).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import random
+import time
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+# Benchmark paytida sekin so'rovlar uchun EXPLAIN olinmasin (o'lchovlarga xalaqit beradi)
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+from dotenv import load_dotenv
+from database import models
+from database import requests as db
+from database.query import Query
+from utils import excel_gen
+from utils.report_service import ReportService
+from benchmarks import dataset
+from benchmarks.harness import (scratch_database, default_dsn, fetch, measure, summarize, environment,
+                                write_report, compare)
+
+def _report_input(attendance, advances):
+    """Handler (_send_excel_report) dagi kabi: {(worker_id, 'YYYY-MM-DD'): soat}, {worker_id: avans}"""
+    attendance_dict = {(row['worker_id'], row['date_str']): float(row['hours']) for row in attendance}
+    advances_dict = {row['worker_id']: float(row['total']) for row in advances}
+    return attendance_dict, advances_dict
+
+async def run_suite(year: int, month: int, repeat: int, stats_calls: int, seed: int):
+    results = {}
+
+    results["get_month_data"] = summarize(await measure(lambda: db.get_month_data(year, month), repeat))
+
+    async def report_data():
+        await db.get_workers_for_report(year, month)
+        await db.get_month_attendance(year, month)
+    results["get_workers_for_report+get_month_attendance"] = summarize(await measure(report_data, repeat))
+
+    results["get_general_statistics"] = summarize(await measure(db.get_general_statistics, repeat))
+
+    # Ishchi hisobi: tasodifiy ishchilar, har bir chaqiruv alohida o'lchanadi
+    rng = random.Random(seed)
+    telegram_ids = [row['telegram_id'] for row in await fetch(
+        "SELECT telegram_id FROM workers WHERE active = TRUE AND telegram_id IS NOT NULL"
+    )]
+    samples = []
+    if telegram_ids:
+        await db.get_worker_stats(telegram_ids[0])
+        for _ in range(repeat * stats_calls):
+            telegram_id = rng.choice(telegram_ids)
+            started = time.perf_counter()
+            await db.get_worker_stats(telegram_id)
+            samples.append(time.perf_counter() - started)
+        results["get_worker_stats"] = summarize(samples)
+
+    # Excel: ma'lumot bir marta olinadi, faqat yaratish o'lchanadi
+    workers = await db.get_workers_for_report(year, month)
+    attendance_dict, advances_dict = _report_input(
+        await db.get_month_attendance(year, month), await db.get_month_advances(year, month)
+    )
+
+    async def to_bytes():
+        excel_gen.generate_report_bytes(year, month, list(workers), attendance_dict, advances_dict)
+
+    excel_repeat = max(1, repeat // 3)
+    results["excel_gen.generate_report_bytes"] = summarize(await measure(to_bytes, excel_repeat))
+
+    results.update(await rollup_reads(year, month, repeat))
+    results.update(await paging(repeat))
+    results.update(await search(repeat))
+    results.update(await year_report(db.get_tashkent_time().date(), excel_repeat))
+    # Yozuvlar oxirida: oldingi o'lchovlar bir xil ma'lumotni ko'radi
+    results.update(await rollup_writes(repeat, stats_calls, seed))
+    return results, len(workers)
+
+# --- YIG'MA JADVAL (payroll_monthly) ---
+
+# Yig'ma jadvalgacha oylik yig'indi shunday hisoblanardi (taqqoslash uchun)
+RAW_MONTH_HOURS = """
+    SELECT worker_id, SUM(hours) AS hours FROM attendance
+    WHERE date >= $1 AND date < $2 GROUP BY worker_id
+"""
+RAW_MONTH_ADVANCES = """
+    SELECT worker_id, SUM(amount) AS total FROM advances
+    WHERE approved = TRUE AND date >= $1 AND date < $2 GROUP BY worker_id
+"""
+
+async def rollup_reads(year: int, month: int, repeat: int) -> Dict[str, Any]:
+    start, end = db.month_bounds(year, month)
+
+    async def raw_month_sums():
+        await fetch(RAW_MONTH_HOURS, start, end)
+        await fetch(RAW_MONTH_ADVANCES, start, end)
+
+    return {
+        "rollup.get_month_payroll": summarize(await measure(lambda: db.get_month_payroll(year, month), repeat)),
+        "raw.month_sums": summarize(await measure(raw_month_sums, repeat)),
+    }
+
+async def rollup_writes(repeat: int, calls: int, seed: int) -> Dict[str, Any]:
+    """Davomat yozish (yig'ma jadval tranzaksiya ichida yangilanadi) va to'liq qayta hisoblash"""
+    rng = random.Random(seed)
+    worker_ids = await db.get_active_worker_ids()
+    results = {}
+    if not worker_ids:
+        return results
+
+    samples = []
+    for _ in range(repeat * calls):
+        worker_id = rng.choice(worker_ids)
+        hours = rng.choice((0, 4, 8, 10))
+        started = time.perf_counter()
+        await db.add_attendance(worker_id, hours, "Keldi" if hours else "Kelmadi")
+        samples.append(time.perf_counter() - started)
+    results["rollup.add_attendance"] = summarize(samples)
+
+    async def bulk():
+        await db.add_attendance_bulk([(worker_id, rng.choice((0, 8, 10))) for worker_id in worker_ids])
+    # Barcha aktiv ishchilar bitta xabarda ("hamma 8")
+    results["rollup.add_attendance_bulk"] = summarize(await measure(bulk, repeat))
+
+    results["rollup.rebuild_payroll_monthly"] = summarize(
+        await measure(db.rebuild_payroll_monthly, max(1, repeat // 3))
+    )
+    return results
+
+# --- ISHCHILAR RO'YXATI (keyset sahifalash) ---
+
+RAW_OFFSET_PAGE = "SELECT * FROM workers WHERE active = TRUE ORDER BY name, id LIMIT $1 OFFSET $2"
+
+async def paging(repeat: int, limit: int = 10) -> Dict[str, Any]:
+    ordered = [row['id'] for row in await fetch("SELECT id FROM workers WHERE active = TRUE ORDER BY name, id")]
+    if len(ordered) <= limit:
+        return {}
+    middle = ordered[len(ordered) // 2]
+    last_cursor = ordered[-limit - 1]
+    last_offset = len(ordered) - limit
+
+    return {
+        "paging.first": summarize(await measure(lambda: db.get_workers_page(None, "next", limit), repeat)),
+        "paging.middle_next": summarize(await measure(lambda: db.get_workers_page(middle, "next", limit), repeat)),
+        "paging.middle_prev": summarize(await measure(lambda: db.get_workers_page(middle, "prev", limit), repeat)),
+        "paging.middle_at": summarize(await measure(lambda: db.get_workers_page(middle, "at", limit), repeat)),
+        "paging.last_next": summarize(await measure(lambda: db.get_workers_page(last_cursor, "next", limit),
+                                                    repeat)),
+        "raw.offset_last_page": summarize(await measure(lambda: fetch(RAW_OFFSET_PAGE, limit, last_offset),
+                                                        repeat)),
+    }
+
+# --- ISM BO'YICHA QIDIRUV ---
+
+# Familiya boshi, ism, kichik harflar, ichida uchraydigan bo'lak va xato yozilgan ism
+SEARCH_TERMS = ["Karim", "Dilnoza", "rahimov", "bek", "Rustm Saidov"]
+
+async def search(repeat: int) -> Dict[str, Any]:
+    mode = "trgm" if models.TRGM_AVAILABLE else "plain"
+
+    async def run_terms():
+        for term in SEARCH_TERMS:
+            await db.search_worker_by_name(term)
+
+    samples = await measure(run_terms, repeat)
+    # Bitta qidiruv vaqti (atamalar bo'yicha o'rtacha)
+    return {f"search.{mode}": summarize([sample / len(SEARCH_TERMS) for sample in samples])}
+
+# --- YILLIK HISOBOT ---
+
+async def year_report(today: date, repeat: int) -> Dict[str, Any]:
+    """_send_year_report dagi kabi: uchta so'rov, oylarga ajratish, oylar qatorlari, bitta kitob"""
+    year = today.year
+    months = list(range(1, today.month + 1))
+
+    async def load():
+        workers = await db.get_workers_for_period(date(year, 1, 1), date(year, 12, 31))
+        attendance = await db.get_year_attendance(year)
+        advances = await db.get_year_advances(year)
+        return excel_gen.split_year_data(year, months, workers, attendance, advances)
+
+    month_data = await load()
+    if not month_data:
+        return {}
+    calls = {month: (year, month, *data) for month, data in month_data.items()}
+    month_rows = {month: excel_gen.build_month_rows(*args) for month, args in calls.items()}
+
+    async def rows_serial():
+        for args in calls.values():
+            excel_gen.build_month_rows(*args)
+
+    # Botdagi kabi process pool (jarayonlarni ishga tushirish warmup da qoladi)
+    service = ReportService(sheet_workers=int(os.getenv("REPORT_SHEET_WORKERS", str(os.cpu_count() or 1))))
+
+    async def rows_parallel():
+        await service.run_parallel(excel_gen.build_month_rows, calls)
+
+    async def to_bytes():
+        excel_gen.generate_year_report_bytes(year, month_data, month_rows)
+
+    try:
+        return {
+            "year_report.data": summarize(await measure(load, repeat)),
+            "year_report.rows_serial": summarize(await measure(rows_serial, repeat)),
+            "year_report.rows_parallel": summarize(await measure(rows_parallel, repeat)),
+            "year_report.excel": summarize(await measure(to_bytes, repeat)),
+        }
+    finally:
+        service.shutdown()
+
+# --- EXPLAIN ---
+
+def _plan_nodes(plan: Dict[str, Any], nodes: List[str]) -> List[str]:
+    label = plan["Node Type"]
+    if plan.get("Index Name"):
+        label += f" ({plan['Index Name']})"
+    elif plan.get("Relation Name"):
+        label += f" ({plan['Relation Name']})"
+    nodes.append(label)
+    for child in plan.get("Plans", []):
+        _plan_nodes(child, nodes)
+    return nodes
+
+async def explain(year: int, month: int) -> Dict[str, Any]:
+    """Botdagi so'rovlarning haqiqiy rejalari (Query konstantalari, bot argumentlari bilan)"""
+    start, end = db.month_bounds(year, month)
+    ordered = [row['id'] for row in await fetch("SELECT id FROM workers WHERE active = TRUE ORDER BY name, id")]
+    worker_id = ordered[len(ordered) // 2] if ordered else 0
+    search_query = db.SEARCH_WORKERS_TRGM if models.TRGM_AVAILABLE else db.SEARCH_WORKERS_PLAIN
+    search_args = ("Karim", "%Karim%", "Karim%", 10) if models.TRGM_AVAILABLE else ("Karim", 10)
+    cases = [
+        (db.MONTH_ATTENDANCE, (start, end)),
+        (db.MONTH_HOURS, (start,)),
+        (db.MONTH_PAYROLL, (start,)),
+        (db.WORKER_MONTH, (worker_id, start)),
+        (db.FIRST_WORKER_PAGE, (11,)),
+        (db.WORKER_PAGE_QUERIES["next"], (worker_id, 11)),
+        (search_query, search_args),
+        (db.YEAR_ATTENDANCE, (date(year, 1, 1), date(year + 1, 1, 1))),
+        (Query("raw_month_hours", RAW_MONTH_HOURS), (start, end)),
+    ]
+
+    plans = {}
+    async with models.acquire() as conn:
+        for q, args in cases:
+            result = json.loads(await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {q.sql}", *args))[0]
+            plans[q.name] = {
+                "execution_ms": round(result["Execution Time"], 3),
+                "planning_ms": round(result["Planning Time"], 3),
+                "shared_hit_blocks": result["Plan"].get("Shared Hit Blocks", 0),
+                "shared_read_blocks": result["Plan"].get("Shared Read Blocks", 0),
+                "nodes": _plan_nodes(result["Plan"], []),
+            }
+    return plans
+
+async def main(args) -> int:
+    dsn = args.dsn or default_dsn()
+    if not dsn:
+        print("❌ --dsn yoki BENCH_DATABASE_URL / DATABASE_URL kerak", file=sys.stderr)
+        return 2
+
+    today = db.get_tashkent_time().date()
+    # Hisobot: oxirgi to'liq oy (davr bitta oy bo'lsa - joriy oy)
+    report_year, report_month = (today.year, today.month)
+    if args.months > 1:
+        report_year, report_month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+    async with scratch_database(dsn, args.db_name, keep=args.keep):
+        started = time.perf_counter()
+        async with models.acquire() as conn:
+            counts = await dataset.populate(conn, args.workers, args.months, today, args.seed)
+        await db.rebuild_payroll_monthly()
+        populate_seconds = time.perf_counter() - started
+
+        results, report_workers = await run_suite(report_year, report_month, args.repeat,
+                                                  args.stats_calls, args.seed)
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scale": {"workers": args.workers, "months": args.months, "seed": args.seed},
+            "data": {**counts, "report_month": f"{report_year}-{report_month:02d}",
+                     "report_workers": report_workers},
+            "populate_seconds": round(populate_seconds, 2),
+            "environment": await environment(),
+            "results": results,
+        }
+        if args.explain:
+            report["explain"] = await explain(report_year, report_month)
+
+    write_report(report, args.output)
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"❌ Sekinlashgan: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.db_report", description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=300, help="ishchilar soni")
+    parser.add_argument("--months", type=int, default=6, help="davomat davri (oy, joriy oy bilan tugaydi)")
+    parser.add_argument("--repeat", type=int, default=10, help="har bir o'lchov necha marta takrorlanadi")
+    parser.add_argument("--stats-calls", type=int, default=50, help="get_worker_stats: bir takrordagi chaqiruvlar")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dsn", help="Postgres server (standart: BENCH_DATABASE_URL yoki DATABASE_URL)")
+    parser.add_argument("--db-name", default="workforce_bench", help="yaratiladigan vaqtinchalik baza")
+    parser.add_argument("--keep", action="store_true", help="bazani oxirida o'chirmaslik")
+    parser.add_argument("--explain", action="store_true", help="so'rov rejalari (EXPLAIN ANALYZE) ni ham yozish")
+    parser.add_argument("--output", default="-", help="JSON fayl (standart: stdout)")
+    parser.add_argument("--baseline", help="solishtirish uchun oldingi natija (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="ruxsat etilgan sekinlashish (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s", stream=sys.stderr)
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,291 @@
+"""Oflayn sinov uchun soxta Telegram Bot API
+
+- FakeBotSession: tarmoqsiz aiogram sessiyasi (benchmarks.replay - Dispatcher.feed_update bilan)
+- FakeTelegram: HTTP server, butun bot jarayoni uchun. Ikkalasi bir xil soxta javoblarni qaytaradi (FakeReplies)
+
+Bot BOT_API_URL=http://127.0.0.1:8081 bilan ishga tushiriladi. Server:
+- Bot API metodlariga (sendMessage, editMessageText, sendDocument, ...) soxta javob qaytaradi
+- webhook o'rnatilgan bo'lsa update larni POST qiladi (secret token sarlavhasi bilan),
+  aks holda getUpdates orqali beradi
+- har bir update dan botning shu chatdagi birinchi javobigacha bo'lgan vaqtni o'lchaydi
+
+Misol (300 ishchi bir vaqtda "💰 Mening hisobim" bosadi):
+    python -m benchmarks.fake_telegram --port 8081 --burst 300 --user-base 1000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import logging
+from collections import Counter, deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Mapping, Optional
+from aiohttp import web, ClientSession
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+class FakeReplies:
+    """Bot API metodlariga soxta natijalar: getMe, send*/edit*/copy* uchun Message, qolganlariga True"""
+
+    def __init__(self):
+        self._message_id = 0
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def result(self, method: str, params: Dict[str, Any], chat_id: Optional[int]) -> Any:
+        if method == "getMe":
+            return {"id": 42, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        if method.startswith(("send", "edit", "copy")) and chat_id is not None:
+            message_id = self.next_message_id()
+            message = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text") or ""
+            }
+            if method == "sendDocument":
+                message["document"] = {"file_id": f"FILE{message_id}", "file_unique_id": f"U{message_id}"}
+            return message
+        return True
+
+def _chat_id(value: Any) -> Optional[int]:
+    return int(value) if str(value if value is not None else "").lstrip("-").isdigit() else None
+
+class FakeBotSession(BaseSession):
+    """Tarmoqsiz Bot API sessiyasi: chaqiruvlarni yozib oladi, kechikish va 429 (RetryAfter) qo'shadi
+
+    - so'rov haqiqiy sessiyadagidek tayyorlanadi (prepare_value), javob check_response orqali
+      aiogram obyektlariga aylanadi: handler tomonidagi CPU xarajati saqlanadi
+    - latency: har bir chaqiruvga ±jitter ulushida tasodifiy kechikish (soniya)
+    - retry_after: chaqiruvlarning shu ulushi Telegram "Too Many Requests" xatosini qaytaradi
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.5, retry_after: float = 0.0,
+                 seed: int = 1, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.methods: Counter = Counter()
+        self.retries = 0
+        self.calls: List[tuple] = []            # (metod, chat_id, vaqt)
+        self._rng = random.Random(seed)
+        self.replies = FakeReplies()
+
+    def reset(self):
+        self.methods.clear()
+        self.calls.clear()
+        self.retries = 0
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        name = method.__api_method__
+        files: Dict[str, Any] = {}
+        params = {key: self.prepare_value(value, bot=bot, files=files)
+                  for key, value in method.model_dump(warnings=False).items()}
+        chat_id = _chat_id(params.get("chat_id"))
+        self.methods[name] += 1
+        self.calls.append((name, chat_id, time.monotonic()))
+
+        if self.latency:
+            await asyncio.sleep(self.latency * self._rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+        if self.retry_after and self._rng.random() < self.retry_after:
+            self.retries += 1
+            seconds = self._rng.randint(1, 5)
+            status, body = 429, {"ok": False, "error_code": 429,
+                                 "description": f"Too Many Requests: retry after {seconds}",
+                                 "parameters": {"retry_after": seconds}}
+        else:
+            status, body = 200, {"ok": True, "result": self.replies.result(name, params, chat_id)}
+
+        response = self.check_response(bot=bot, method=method, status_code=status, content=json.dumps(body))
+        return response.result
+
+    async def stream_content(self, url: str, headers: Optional[Mapping[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        raise NotImplementedError("Soxta sessiyada fayl yuklab olinmaydi")
+        yield b""
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[tuple] = []            # (metod, chat_id, vaqt)
+        self.latencies: List[float] = []
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.polled = False
+        self._updates: Deque[Dict[str, Any]] = deque()
+        self._new_updates = asyncio.Event()
+        self._sent_at: Dict[int, Deque[float]] = {}
+        self._update_id = 0
+        self.replies = FakeReplies()
+        self._deliveries: set = set()
+        self._webhook_slots = asyncio.Semaphore(40)
+        self._http: Optional[ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self._handle)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081):
+        self._http = ClientSession()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info(f"✅ Soxta Telegram: http://{host}:{port}")
+
+    async def stop(self):
+        if self._http:
+            await self._http.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    @property
+    def connected(self) -> bool:
+        """Bot update olishni boshladimi (webhook o'rnatdi yoki getUpdates chaqirdi)"""
+        return bool(self.webhook_url) or self.polled
+
+    # --- BOT API ---
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        chat_id = _chat_id(params.get("chat_id"))
+        self.calls.append((method, chat_id, time.monotonic()))
+        self._record_reply(chat_id)
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._ok(self._result(method, params, chat_id))
+
+    def _ok(self, result: Any) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    def _result(self, method: str, params: Dict[str, Any], chat_id: Optional[int]) -> Any:
+        if method == "setWebhook":
+            self.webhook_url = params.get("url")
+            self.webhook_secret = params.get("secret_token")
+            self._webhook_slots = asyncio.Semaphore(int(params.get("max_connections", 40)))
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        return self.replies.result(method, params, chat_id)
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.polled = True
+        offset = int(params.get("offset") or 0)
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return list(self._updates)[:int(params.get("limit") or 100)]
+
+    # --- UPDATE YUBORISH ---
+
+    def message_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        self._update_id += 1
+        user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        return {
+            "update_id": self._update_id,
+            "message": {
+                "message_id": self.replies.next_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": user,
+                "text": text
+            }
+        }
+
+    def inject(self, update: Dict[str, Any]):
+        """Update ni botga berish (webhook yoki getUpdates navbati)"""
+        chat_id = update["message"]["chat"]["id"]
+        self._sent_at.setdefault(chat_id, deque()).append(time.monotonic())
+
+        if self.webhook_url:
+            task = asyncio.get_running_loop().create_task(self._deliver(update))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        else:
+            self._updates.append(update)
+            self._new_updates.set()
+
+    async def _deliver(self, update: Dict[str, Any]):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+        async with self._webhook_slots:
+            async with self._http.post(self.webhook_url, data=json.dumps(update), headers=headers) as response:
+                if response.status != 200:
+                    logging.warning(f"⚠️ Webhook javobi: {response.status}")
+
+    def _record_reply(self, chat_id: Optional[int]):
+        pending = self._sent_at.get(chat_id)
+        if pending:
+            self.latencies.append(time.monotonic() - pending.popleft())
+
+    async def wait_replies(self, count: int, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while len(self.latencies) < count:
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+async def _main(args):
+    fake = FakeTelegram(latency=args.latency)
+    await fake.start(args.host, args.port)
+    try:
+        while not fake.connected:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(1)
+        mode = "webhook" if fake.webhook_url else "polling"
+
+        for round_no in range(1, args.rounds + 1):
+            fake.latencies.clear()
+            started = time.monotonic()
+            for i in range(args.burst):
+                fake.inject(fake.message_update(args.user_base + i, args.text))
+            finished = await fake.wait_replies(args.burst, args.timeout)
+            elapsed = time.monotonic() - started
+
+            ms = [value * 1000 for value in fake.latencies]
+            print(f"[{mode}] #{round_no}: {len(ms)}/{args.burst} javob, {elapsed:.2f} s, "
+                  f"{len(ms) / elapsed:.0f} upd/s, p50={percentile(ms, 0.5):.0f} ms, "
+                  f"p99={percentile(ms, 0.99):.0f} ms, max={max(ms, default=0):.0f} ms"
+                  + ("" if finished else " (timeout)"))
+            await asyncio.sleep(1)
+    finally:
+        await fake.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soxta Telegram Bot API (oflayn sinov)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--burst", type=int, default=300, help="bir vaqtda yuboriladigan update lar")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--text", default="💰 Mening hisobim")
+    parser.add_argument("--user-base", type=int, default=1000000, help="birinchi foydalanuvchi id si")
+    parser.add_argument("--latency", type=float, default=0.0, help="har bir API chaqiruvi kechikishi (s)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import sys
+import time
+import platform
+import subprocess
+import logging
+from contextlib import asynccontextmanager
+from statistics import mean, median
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+import asyncpg
+from database import models
+
+_DB_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+def default_dsn() -> Optional[str]:
+    """Benchmark bazasi yaratiladigan server (BENCH_DATABASE_URL, bo'lmasa DATABASE_URL)"""
+    return os.getenv("BENCH_DATABASE_URL") or os.getenv("DATABASE_URL")
+
+def with_database(dsn: str, name: str) -> str:
+    """DSN dagi baza nomini almashtirish (host/parametrlar saqlanadi)"""
+    parts = urlsplit(dsn)
+    return urlunsplit((parts.scheme, parts.netloc, f"/{name}", parts.query, parts.fragment))
+
+@asynccontextmanager
+async def scratch_database(dsn: str, name: str, keep: bool = False):
+    """Bo'sh bazani yaratib, pool va jadvallarni tayyorlash. Chiqishda baza o'chiriladi (keep=False)"""
+    if not _DB_NAME_RE.match(name):
+        raise ValueError(f"noto'g'ri baza nomi: {name}")
+
+    admin = await asyncpg.connect(dsn)
+    try:
+        await admin.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+        await admin.execute(f"CREATE DATABASE {name}")
+    finally:
+        await admin.close()
+
+    os.environ["DATABASE_URL"] = with_database(dsn, name)
+    try:
+        if not await models.create_db_pool():
+            raise RuntimeError("pool yaratilmadi")
+        if not await models.create_tables():
+            raise RuntimeError("jadvallar yaratilmadi")
+        yield
+    finally:
+        await models.close_db_pool()
+        if not keep:
+            admin = await asyncpg.connect(dsn)
+            try:
+                await admin.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+            finally:
+                await admin.close()
+
+async def fetch(sql: str, *args) -> List[asyncpg.Record]:
+    """Benchmark ning o'z yordamchi so'rovlari (o'lchanmaydi)"""
+    async with models.acquire() as conn:
+        return await conn.fetch(sql, *args)
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 1) -> List[float]:
+    """fn ni warmup + repeat marta chaqirish. Qaytaradi: har bir o'lchov (soniya)"""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """O'lchovlar (soniya) -> millisekundlarda ko'rsatkichlar"""
+    values = sorted(samples)
+    return {
+        "runs": len(values),
+        "min_ms": round(values[0] * 1000, 3),
+        "median_ms": round(median(values) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "mean_ms": round(mean(values) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                              ).stdout.strip() or None
+    except Exception:
+        return None
+
+async def environment() -> Dict[str, Any]:
+    """Natijalarni solishtirish uchun muhit ma'lumotlari"""
+    server = None
+    if models.DB_POOL:
+        async with models.acquire() as conn:
+            server = await conn.fetchval("SHOW server_version")
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "postgres": server,
+        "asyncpg": asyncpg.__version__,
+    }
+
+def write_report(report: Dict[str, Any], output: str):
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output == "-":
+        print(text)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logging.info(f"✅ Natija yozildi: {output}")
+
+def compare(report: Dict[str, Any], baseline_path: str, tolerance: float, key: str = "median_ms") -> List[str]:
+    """Bazaviy natija bilan solishtirish. Qaytaradi: `tolerance` dan ko'proq sekinlashganlar"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    if baseline.get("scale") != report.get("scale"):
+        print(f"⚠️ Hajm farq qiladi: {baseline.get('scale')} != {report.get('scale')}", file=sys.stderr)
+
+    regressions = []
+    for name, current in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get(key):
+            continue
+        ratio = current[key] / before[key]
+        mark = "❌" if ratio > 1 + tolerance else "✅"
+        print(f"{mark} {name}: {before[key]:.2f} -> {current[key]:.2f} ms (x{ratio:.2f})", file=sys.stderr)
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
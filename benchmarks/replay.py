@@ -0,0 +1,290 @@
+"""Butun botni Telegram siz yuklama ostida sinash: update larni Dispatcher.feed_update ga berish
+
+    python -m benchmarks.replay --workers 300 --latency 0.05 --retry-after 0.01 --output replay.json
+
+Ssenariylar (--scenarios, tartib bilan):
+- login       - barcha aktiv ishchilar bir vaqtda /start va kodini yuboradi (~10% avval xato kod)
+- payday      - Telegram ga bog'langan ishchilar "💰 Mening hisobim" bosadi, ~20% avans so'raydi
+- daily       - admin bugungi hisobotni ishchilar bo'yicha birma-bir kiritadi (barcha aktiv ishchilar)
+- daily_bulk  - admin bugungi hisobotni "📋 Ommaviy kiritish" bilan bitta xabarda yuboradi
+
+Har bir foydalanuvchining update lari ketma-ket (Telegram dagi kabi), foydalanuvchilar esa parallel.
+Bot API chaqiruvlari FakeBotSession ga boradi (kechikish va RetryAfter qo'shiladi).
+Natija: har bir ssenariy uchun o'tkazuvchanlik va har bir handler uchun kechikish (median/p95/p99).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import random
+import time
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Handlerlar ADMIN_ID ni import paytida o'qiydi: admin ssenariylari uchun o'zimiznikini beramiz
+BENCH_ADMIN_ID = 1000
+os.environ["ADMIN_ID"] = str(BENCH_ADMIN_ID)
+# Benchmark paytida sekin so'rovlar uchun EXPLAIN olinmasin (o'lchovlarga xalaqit beradi)
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+from dotenv import load_dotenv
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import TelegramObject, Update
+from database import models
+from database import requests as db
+from database.fsm_storage import PostgresStorage
+from handlers import admin, worker, other
+from utils import metrics
+from benchmarks import dataset
+from benchmarks.fake_telegram import FakeBotSession
+from benchmarks.harness import scratch_database, default_dsn, fetch, summarize, environment, write_report, compare
+
+SCENARIOS = ("login", "payday", "daily", "daily_bulk")
+# Login paytida bazada telegram_id si yo'q ishchilarga beriladigan id lar
+NEW_USER_BASE = 200_000_000
+
+class HandlerTimings(BaseMiddleware):
+    """Update outer middleware (metrics.MetricsMiddleware ichida): har bir update vaqti handler nomi bilan"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def reset(self):
+        self.samples.clear()
+        self.errors.clear()
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        error = None
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            label = metrics.active_handler(asyncio.current_task()) or metrics.UNHANDLED
+            self.samples[label].append(elapsed)
+            if error:
+                self.errors[label][error] += 1
+
+class Updates:
+    """Sintetik update lar (bot ga bog'langan holda, feed_update qayta yaratmasin)"""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._update_id = 0
+        self._message_id = 0
+
+    def message(self, user_id: int, text: str) -> Update:
+        self._update_id += 1
+        self._message_id += 1
+        return Update.model_validate({
+            "update_id": self._update_id,
+            "message": {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+                "text": text,
+            },
+        }, context={"bot": self.bot})
+
+# --- SSENARIYLAR: har biri foydalanuvchilar skriptlarini qaytaradi (bitta skript = ketma-ket update lar) ---
+
+async def login_scripts(updates: Updates, rng: random.Random) -> List[List[Update]]:
+    rows = await fetch("SELECT id, code, telegram_id FROM workers WHERE active = TRUE ORDER BY id")
+    scripts = []
+    for row in rows:
+        user_id = row['telegram_id'] or NEW_USER_BASE + row['id']
+        script = [updates.message(user_id, "/start")]
+        if rng.random() < 0.1:
+            script.append(updates.message(user_id, str(rng.randint(10_000_000, 99_999_999))))
+        script.append(updates.message(user_id, str(row['code'])))
+        scripts.append(script)
+    return scripts
+
+async def payday_scripts(updates: Updates, rng: random.Random) -> List[List[Update]]:
+    rows = await fetch(
+        "SELECT telegram_id FROM workers WHERE active = TRUE AND telegram_id IS NOT NULL ORDER BY id"
+    )
+    scripts = []
+    for row in rows:
+        user_id = row['telegram_id']
+        script = [updates.message(user_id, "💰 Mening hisobim")]
+        if rng.random() < 0.2:
+            script.append(updates.message(user_id, "💸 Avans so'rash"))
+            script.append(updates.message(user_id, str(rng.choice((50_000, 100_000, 200_000)))))
+        scripts.append(script)
+    return scripts
+
+def _day_hours(rng: random.Random) -> float:
+    if rng.random() < 0.08:
+        return 0
+    values, weights = zip(*dataset.HOURS)
+    return rng.choices(values, weights)[0]
+
+async def daily_scripts(updates: Updates, rng: random.Random) -> List[List[Update]]:
+    active = len(await db.get_active_worker_ids())
+    script = [updates.message(BENCH_ADMIN_ID, "📝 Bugungi hisobot")]
+    script.extend(updates.message(BENCH_ADMIN_ID, f"{_day_hours(rng):g}") for _ in range(active))
+    return [script]
+
+async def daily_bulk_scripts(updates: Updates, rng: random.Random) -> List[List[Update]]:
+    lines = ["hamma 8"]
+    for worker_id in sorted(await db.get_active_worker_ids()):
+        hours = _day_hours(rng)
+        if hours != 8:
+            lines.append(f"{worker_id} {hours:g}")
+    return [[
+        updates.message(BENCH_ADMIN_ID, "📝 Bugungi hisobot"),
+        updates.message(BENCH_ADMIN_ID, "📋 Ommaviy kiritish"),
+        updates.message(BENCH_ADMIN_ID, "\n".join(lines)),
+    ]]
+
+SCENARIO_SCRIPTS = {
+    "login": login_scripts,
+    "payday": payday_scripts,
+    "daily": daily_scripts,
+    "daily_bulk": daily_bulk_scripts,
+}
+
+# --- ISHGA TUSHIRISH ---
+
+async def replay(dp: Dispatcher, bot: Bot, scripts: List[List[Update]], spread: float,
+                 rng: random.Random) -> float:
+    """Skriptlarni parallel ijro etish (har biri 0..spread soniya ichida boshlanadi). Qaytaradi: umumiy vaqt"""
+    async def run_user(script: List[Update], delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        for update in script:
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                # Xato HandlerTimings da sanalgan; polling ham shunday davom etadi
+                pass
+
+    delays = [rng.uniform(0, spread) if spread else 0.0 for _ in scripts]
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(script, delay) for script, delay in zip(scripts, delays)))
+    return time.perf_counter() - started
+
+async def run_scenario(name: str, dp: Dispatcher, bot: Bot, session: FakeBotSession, timings: HandlerTimings,
+                       spread: float, rng: random.Random) -> Dict[str, Any]:
+    scripts = await SCENARIO_SCRIPTS[name](Updates(bot), rng)
+    total = sum(len(script) for script in scripts)
+    session.reset()
+    timings.reset()
+
+    seconds = await replay(dp, bot, scripts, spread, rng)
+
+    handlers = {}
+    for label, samples in sorted(timings.samples.items()):
+        handlers[label] = {**summarize(samples), "errors": dict(timings.errors.get(label, {}))}
+    errors = sum(sum(counts.values()) for counts in timings.errors.values())
+    print(f"[{name}] {len(scripts)} foydalanuvchi, {total} update, {seconds:.2f} s, "
+          f"{total / seconds:.0f} upd/s, xato: {errors}, API: {sum(session.methods.values())} "
+          f"(429: {session.retries})", file=sys.stderr)
+    for label, result in handlers.items():
+        print(f"    {label}: {result['runs']} ta, p50={result['median_ms']:.1f} ms, "
+              f"p99={result['p99_ms']:.1f} ms", file=sys.stderr)
+
+    return {
+        "users": len(scripts),
+        "updates": total,
+        "seconds": round(seconds, 3),
+        "updates_per_sec": round(total / seconds, 1),
+        "errors": errors,
+        "api": {"calls": sum(session.methods.values()), "retry_after": session.retries,
+                "methods": dict(session.methods)},
+        "handlers": handlers,
+    }
+
+async def main(args) -> int:
+    dsn = args.dsn or default_dsn()
+    if not dsn:
+        print("❌ --dsn yoki BENCH_DATABASE_URL / DATABASE_URL kerak", file=sys.stderr)
+        return 2
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Noma'lum ssenariy: {', '.join(unknown)} (bor: {', '.join(SCENARIOS)})", file=sys.stderr)
+        return 2
+
+    rng = random.Random(args.seed)
+    today = db.get_tashkent_time().date()
+    async with scratch_database(dsn, args.db_name, keep=args.keep):
+        async with models.acquire() as conn:
+            counts = await dataset.populate(conn, args.workers, args.months, today, args.seed)
+        await db.rebuild_payroll_monthly()
+
+        session = FakeBotSession(latency=args.latency, jitter=args.jitter, retry_after=args.retry_after,
+                                 seed=args.seed)
+        bot = Bot(token="42:BENCH", session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        dp = Dispatcher(storage=MemoryStorage() if args.storage == "memory" else PostgresStorage())
+        dp.include_router(admin.router)
+        dp.include_router(worker.router)
+        dp.include_router(other.router)
+        metrics.setup_dispatcher(dp)
+        # MetricsMiddleware dan keyin ulanadi: uning ichida ishlaydi va handler nomini ko'radi
+        timings = HandlerTimings()
+        dp.update.outer_middleware(timings)
+
+        scenarios = {}
+        try:
+            for name in names:
+                scenarios[name] = await run_scenario(name, dp, bot, session, timings, args.spread, rng)
+        finally:
+            await dp.storage.close()
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scale": {"workers": args.workers, "months": args.months, "seed": args.seed,
+                      "latency": args.latency, "retry_after": args.retry_after, "spread": args.spread,
+                      "storage": args.storage},
+            "data": counts,
+            "environment": await environment(),
+            "scenarios": scenarios,
+            # --baseline solishtirishi uchun: "ssenariy:handler" -> kechikish
+            "results": {f"{name}:{label}": {key: value for key, value in result.items() if key != "errors"}
+                        for name, scenario in scenarios.items() for label, result in scenario["handlers"].items()},
+        }
+
+    write_report(report, args.output)
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"❌ Sekinlashgan: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay", description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="vergul bilan: " + ", ".join(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=300, help="ishchilar soni")
+    parser.add_argument("--months", type=int, default=3, help="davomat davri (oy)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Bot API chaqiruvi kechikishi (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="kechikish tarqoqligi (0.5 = ±50%%)")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="429 qaytaradigan chaqiruvlar ulushi (0..1)")
+    parser.add_argument("--spread", type=float, default=0.0, help="foydalanuvchilar shu soniyalar ichida boshlaydi")
+    parser.add_argument("--storage", choices=("postgres", "memory"), default="postgres", help="FSM holati")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dsn", help="Postgres server (standart: BENCH_DATABASE_URL yoki DATABASE_URL)")
+    parser.add_argument("--db-name", default="workforce_bench", help="yaratiladigan vaqtinchalik baza")
+    parser.add_argument("--keep", action="store_true", help="bazani oxirida o'chirmaslik")
+    parser.add_argument("--output", default="-", help="JSON fayl (standart: stdout)")
+    parser.add_argument("--baseline", help="solishtirish uchun oldingi natija (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="ruxsat etilgan sekinlashish (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s", stream=sys.stderr)
+    sys.exit(asyncio.run(main(parse_args())))
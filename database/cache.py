@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+import logging
+from typing import List, Dict, Any, Optional
+from database import models, events, query
+from database.query import Query
+
+# Kesh yashash muddati (soniya) - boshqa jarayonlardagi o'zgarishlar uchun xavfsizlik chegarasi
+WORKER_CACHE_TTL = float(os.getenv("WORKER_CACHE_TTL", "300"))
+
+# Faqat aktiv ishchilar: arxivdagilar tarix bilan ko'payadi va har bir invalidatsiyada qayta o'qilardi
+LOAD_ACTIVE_WORKERS = Query("worker_cache_load", "SELECT * FROM workers WHERE active = TRUE")
+
+class WorkerCache:
+    """Ishchilar ro'yxati keshi: id, code va telegram_id bo'yicha indekslangan
+
+    Aktiv ishchilar bitta so'rov bilan yuklanadi va TTL tugaguncha yoki
+    invalidate() chaqirilguncha xotiradan o'qiladi. Arxivdagi ishchi keshda bo'lmaydi:
+    chaqiruvchi bazadan o'qiydi (requests._fetch_worker) va put() bilan qo'shadi.
+    """
+
+    def __init__(self, ttl: float = WORKER_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_code: Dict[int, int] = {}
+        self._by_telegram: Dict[int, int] = {}
+        self._loaded_at: Optional[float] = None
+        # invalidate() har safar oshiradi - eskirgan yuklash natijasi yozilmasligi uchun
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _ensure_loaded(self) -> bool:
+        """Kesh eskirgan bo'lsa, bazadan qayta yuklash"""
+        if self._is_fresh():
+            self.hits += 1
+            return True
+
+        async with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return True
+
+            self.misses += 1
+            if not models.DB_POOL:
+                logging.error("❌ Database pool mavjud emas (WorkerCache)")
+                return False
+
+            generation = self._generation
+            try:
+                rows = await query.fetch(LOAD_ACTIVE_WORKERS)
+            except query.DatabaseError:
+                # Xato query qatlamida loglangan; chaqiruvchi to'g'ridan-to'g'ri bazadan o'qiydi
+                return False
+
+            self._by_id.clear()
+            self._by_code.clear()
+            self._by_telegram.clear()
+            for row in rows:
+                self._index(dict(row))
+
+            # Yuklash paytida invalidate() bo'lgan bo'lsa, keyingi o'qishda qayta yuklanadi
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+            return True
+
+    def _index(self, worker: Dict[str, Any]):
+        self._by_id[worker['id']] = worker
+        self._by_code[worker['code']] = worker['id']
+        if worker.get('telegram_id'):
+            self._by_telegram[worker['telegram_id']] = worker['id']
+
+    def invalidate(self):
+        """Keshni eskirgan deb belgilash (keyingi o'qishda qayta yuklanadi)"""
+        self._generation += 1
+        self._loaded_at = None
+
+    def put(self, worker: Dict[str, Any]):
+        """Bitta yozuvni yangilash (write-through)"""
+        old = self._by_id.get(worker['id'])
+        if old:
+            self._by_code.pop(old['code'], None)
+            if old.get('telegram_id'):
+                self._by_telegram.pop(old['telegram_id'], None)
+        self._index(dict(worker))
+
+    async def get_by_id(self, worker_id: int) -> Optional[Dict[str, Any]]:
+        if not await self._ensure_loaded():
+            return None
+        worker = self._by_id.get(worker_id)
+        return dict(worker) if worker else None
+
+    async def get_by_code(self, code: int) -> Optional[Dict[str, Any]]:
+        if not await self._ensure_loaded():
+            return None
+        worker_id = self._by_code.get(code)
+        return dict(self._by_id[worker_id]) if worker_id is not None else None
+
+    async def get_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        if not await self._ensure_loaded():
+            return None
+        worker_id = self._by_telegram.get(telegram_id)
+        return dict(self._by_id[worker_id]) if worker_id is not None else None
+
+    async def get_active(self) -> Optional[List[Dict[str, Any]]]:
+        """Aktiv ishchilar (ism bo'yicha). Kesh yuklanmasa None"""
+        if not await self._ensure_loaded():
+            return None
+        workers = [dict(w) for w in self._by_id.values() if w['active']]
+        workers.sort(key=lambda w: w['name'])
+        return workers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._by_id),
+            'fresh': self._is_fresh()
+        }
+
+worker_cache = WorkerCache()
+
+# Boshqa jarayon ishchilarni o'zgartirsa, keshni tozalaymiz
+events.subscribe(events.WORKER_CHANGED, lambda data: worker_cache.invalidate())
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional
+import asyncpg
+from database import models
+
+# Bir nechta bot jarayoni o'rtasida kesh eskirishi haqida xabar beruvchi kanal
+CHANNEL = "workforce_events"
+
+# Hodisa turlari
+WORKER_CHANGED = "worker"
+ATTENDANCE_CHANGED = "attendance"
+ADVANCE_CHANGED = "advance"
+
+# O'zimiz yuborgan xabarlarni qayta ishlamaslik uchun jarayon identifikatori
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_handlers: Dict[str, List[Callable[[dict], None]]] = {}
+_listener_conn: Optional[asyncpg.Connection] = None
+_reconnect_task: Optional[asyncio.Task] = None
+_stopping = False
+
+def subscribe(kind: str, callback: Callable[[dict], None]):
+    """Hodisaga obuna bo'lish. callback(data) - data bo'sh bo'lsa, hammasi eskirgan"""
+    _handlers.setdefault(kind, []).append(callback)
+
+def _dispatch(kind: str, data: dict):
+    for callback in _handlers.get(kind, []):
+        try:
+            callback(data)
+        except Exception as e:
+            logging.error(f"❌ Hodisa ({kind}) ishlovchisida xato: {e}")
+
+def _dispatch_all():
+    """Ulanish uzilgan paytda xabarlar yo'qolgan bo'lishi mumkin - hamma keshni tozalaymiz"""
+    for kind in list(_handlers):
+        _dispatch(kind, {})
+
+async def notify(kind: str, conn: Optional[asyncpg.Connection] = None, **data):
+    """NOTIFY yuborish. conn tranzaksiya ichida bo'lsa, xabar COMMIT da yetkaziladi"""
+    payload = json.dumps({"kind": kind, "origin": INSTANCE_ID, **data})
+    try:
+        if conn is not None:
+            await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+        elif models.DB_POOL:
+            async with models.acquire() as pool_conn:
+                await pool_conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+    except Exception as e:
+        logging.error(f"❌ NOTIFY yuborishda xato: {e}")
+
+def _on_notification(conn, pid, channel, payload):
+    try:
+        event = json.loads(payload)
+    except (TypeError, ValueError):
+        logging.warning(f"⚠️ Noto'g'ri hodisa: {payload}")
+        return
+
+    if event.pop("origin", None) == INSTANCE_ID:
+        return
+    _dispatch(event.pop("kind", ""), event)
+
+def _on_termination(conn):
+    global _reconnect_task
+    if _stopping:
+        return
+    logging.warning("⚠️ LISTEN ulanishi uzildi, qayta ulanilmoqda...")
+    _reconnect_task = asyncio.get_running_loop().create_task(_reconnect())
+
+async def _connect() -> bool:
+    global _listener_conn
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        logging.error("❌ DATABASE_URL topilmadi (events)!")
+        return False
+
+    try:
+        conn = await asyncpg.connect(db_url)
+        await conn.add_listener(CHANNEL, _on_notification)
+        conn.add_termination_listener(_on_termination)
+        _listener_conn = conn
+        return True
+    except Exception as e:
+        logging.error(f"❌ LISTEN ulanishida xato: {e}")
+        return False
+
+async def _reconnect():
+    delay = 1
+    while not _stopping:
+        if await _connect():
+            _dispatch_all()
+            logging.info("✅ LISTEN ulanishi tiklandi")
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+async def start_listener() -> bool:
+    """Alohida ulanishda LISTEN ni ishga tushirish"""
+    global _stopping
+    _stopping = False
+    if not await _connect():
+        return False
+    logging.info(f"✅ '{CHANNEL}' kanali tinglanmoqda")
+    return True
+
+async def stop_listener():
+    """LISTEN ulanishini yopish"""
+    global _listener_conn, _stopping
+    _stopping = True
+    if _reconnect_task and not _reconnect_task.done():
+        _reconnect_task.cancel()
+    if _listener_conn and not _listener_conn.is_closed():
+        await _listener_conn.close()
+    _listener_conn = None
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StorageKey, StateType
+from database import query
+from database.query import Query
+
+# Tashlab ketilgan suhbatlar shu muddatdan keyin eskiradi (soniya)
+FSM_TTL = int(os.getenv("FSM_TTL", "86400"))
+
+CLEAR_STATE = Query("fsm_clear_state", """
+    UPDATE fsm_storage SET state = NULL, expires_at = now() + make_interval(secs => $2)
+    WHERE key = $1 AND state IS NOT NULL
+""")
+SET_STATE = Query("fsm_set_state", """
+    INSERT INTO fsm_storage (key, state, expires_at)
+    VALUES ($1, $2, now() + make_interval(secs => $3))
+    ON CONFLICT (key) DO UPDATE SET
+        state = EXCLUDED.state,
+        data = CASE WHEN fsm_storage.expires_at > now() THEN fsm_storage.data ELSE '{}' END,
+        expires_at = EXCLUDED.expires_at
+""")
+GET_STATE = Query("fsm_get_state", "SELECT state FROM fsm_storage WHERE key = $1 AND expires_at > now()")
+DELETE_EMPTY = Query("fsm_delete_empty", "DELETE FROM fsm_storage WHERE key = $1 AND state IS NULL")
+CLEAR_DATA = Query("fsm_clear_data", "UPDATE fsm_storage SET data = '{}' WHERE key = $1")
+SET_DATA = Query("fsm_set_data", """
+    INSERT INTO fsm_storage (key, data, expires_at)
+    VALUES ($1, $2::jsonb, now() + make_interval(secs => $3))
+    ON CONFLICT (key) DO UPDATE SET
+        state = CASE WHEN fsm_storage.expires_at > now() THEN fsm_storage.state END,
+        data = EXCLUDED.data,
+        expires_at = EXCLUDED.expires_at
+""")
+GET_DATA = Query("fsm_get_data", "SELECT data FROM fsm_storage WHERE key = $1 AND expires_at > now()")
+UPDATE_DATA = Query("fsm_update_data", """
+    INSERT INTO fsm_storage (key, data, expires_at)
+    VALUES ($1, $2::jsonb, now() + make_interval(secs => $3))
+    ON CONFLICT (key) DO UPDATE SET
+        state = CASE WHEN fsm_storage.expires_at > now() THEN fsm_storage.state END,
+        data = CASE WHEN fsm_storage.expires_at > now() THEN fsm_storage.data ELSE '{}' END
+               || EXCLUDED.data,
+        expires_at = EXCLUDED.expires_at
+    RETURNING data
+""")
+PURGE_EXPIRED = Query("fsm_purge_expired", "DELETE FROM fsm_storage WHERE expires_at <= now()")
+
+class PostgresStorage(BaseStorage):
+    """aiogram FSM holati Postgres da (fsm_storage jadvali)
+
+    - bot qayta ishga tushganda suhbatlar yo'qolmaydi, bir nechta bot jarayoni bitta holatni ko'radi
+    - data ixcham JSON (JSONB) ko'rinishida saqlanadi, update_data bitta atomar so'rov
+    - har bir yozuv muddatni yangilaydi; muddati o'tgan yozuvlar o'qilmaydi va purge_expired() o'chiradi
+    - baza xatosi DatabaseError bo'lib update ni to'xtatadi (Redis storage kabi): suhbat jimgina
+      boshiga qaytmaydi, foydalanuvchi xato xabarini oladi (handlers/other.py)
+    """
+
+    def __init__(self, ttl: int = FSM_TTL, key_builder: Optional[KeyBuilder] = None):
+        self.ttl = ttl
+        self._key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True)
+
+    @staticmethod
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        if value is None:
+            await query.execute(CLEAR_STATE, self._key_builder.build(key), self.ttl)
+        else:
+            await query.execute(SET_STATE, self._key_builder.build(key), value, self.ttl)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await query.fetchval(GET_STATE, self._key_builder.build(key))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        storage_key = self._key_builder.build(key)
+        if not data:
+            # state.clear(): holat ham bo'sh bo'lsa yozuvni o'chiramiz
+            deleted = await query.execute(DELETE_EMPTY, storage_key)
+            if deleted == "DELETE 0":
+                await query.execute(CLEAR_DATA, storage_key)
+            return
+
+        await query.execute(SET_DATA, storage_key, self._dumps(data), self.ttl)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        raw = await query.fetchval(GET_DATA, self._key_builder.build(key))
+        return json.loads(raw) if raw else {}
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Mavjud ma'lumot bilan birlashtirish (jsonb ||) - o'qish+yozish bitta so'rovda"""
+        raw = await query.fetchval(UPDATE_DATA, self._key_builder.build(key), self._dumps(data), self.ttl)
+        return json.loads(raw) if raw else {}
+
+    async def purge_expired(self) -> int:
+        """Muddati o'tgan suhbatlarni o'chirish. Qaytaradi: o'chirilganlar soni. Baza xatosida DatabaseError"""
+        result = await query.execute(PURGE_EXPIRED)
+        return int(result.split()[-1])
+
+    async def close(self) -> None:
+        # Pool models.close_db_pool() da yopiladi
+        pass
@@ -1,11 +1,84 @@
 import asyncpg
 import os
+import re
+import time
 import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from typing import Optional
+from utils import metrics
+from database.slow_log import slow_queries
 
 # Connection pool global o'zgaruvchisi
 DB_POOL: Optional[asyncpg.Pool] = None
 
+# pg_trgm kengaytmasi o'rnatilganmi (create_tables aniqlaydi): ism bo'yicha qidiruv shunga qarab tanlanadi
+TRGM_AVAILABLE = False
+
+# payroll_monthly ni xom jadvallardan qayta hisoblash (tuzatish / birinchi to'ldirish)
+REBUILD_PAYROLL_SQL = """
+    INSERT INTO payroll_monthly (worker_id, month, hours, advances, days_present)
+    SELECT worker_id, month, SUM(hours), SUM(advances), SUM(days_present)
+    FROM (
+        SELECT worker_id, date_trunc('month', date)::date AS month,
+               hours, 0 AS advances,
+               CASE WHEN hours > 0 THEN 1 ELSE 0 END AS days_present
+        FROM attendance
+        UNION ALL
+        SELECT worker_id, date_trunc('month', date)::date AS month,
+               0 AS hours, amount AS advances, 0 AS days_present
+        FROM advances
+        WHERE approved = TRUE
+    ) src
+    GROUP BY worker_id, month
+"""
+
+# --- O'LCHOVLAR (har bir so'rov vaqti va pool dan ulanish kutish) ---
+# So'rov nomi (Query.name): metrikalar va sekin so'rovlar jurnali shu nom bilan yoziladi (query.py o'rnatadi)
+QUERY_NAME: ContextVar[Optional[str]] = ContextVar("query_name", default=None)
+
+_SQL_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+@lru_cache(maxsize=512)
+def sql_label(sql: str) -> str:
+    """Nomsiz so'rov uchun ixcham nom: "insert:fsm_storage" (SQL matnlari o'zgarmas - kesh chegaralangan)"""
+    words = sql.split(None, 1)
+    verb = words[0].lower() if words else "?"
+    table = _SQL_TABLE_RE.search(sql)
+    return f"{verb}:{table.group(1).lower()}" if table else verb
+
+def _log_query(record):
+    """asyncpg query logger: har bir execute/fetch tugagach (call_soon orqali, so'rov konteksti bilan)"""
+    name = QUERY_NAME.get() or sql_label(record.query)
+    metrics.QUERY_SECONDS.observe(record.elapsed, name)
+    if record.exception is not None:
+        metrics.QUERY_ERRORS.inc(name)
+    slow_queries.observe(name, record.query, record.args, record.elapsed)
+
+async def _init_connection(conn: asyncpg.Connection):
+    conn.add_query_logger(_log_query)
+
+@asynccontextmanager
+async def acquire():
+    """Pool dan ulanish olish: kutish vaqti POOL_ACQUIRE_SECONDS ga yoziladi
+
+    DB_POOL.acquire() o'rniga ishlatiladi (faqat asyncpg ning ochiq API si).
+    """
+    started = time.perf_counter()
+    try:
+        conn = await DB_POOL.acquire()
+    finally:
+        metrics.POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+    try:
+        yield conn
+    finally:
+        await DB_POOL.release(conn)
+
+metrics.gauge("db_pool_size", "Pool dagi ochiq ulanishlar", lambda: DB_POOL.get_size() if DB_POOL else 0)
+metrics.gauge("db_pool_idle", "Pool dagi bo'sh ulanishlar", lambda: DB_POOL.get_idle_size() if DB_POOL else 0)
+metrics.gauge("db_pool_max_size", "Pool hajmi chegarasi", lambda: DB_POOL.get_max_size() if DB_POOL else 0)
+
 async def create_db_pool():
     """Database connection pool yaratish"""
     global DB_POOL
@@ -19,7 +92,14 @@ async def create_db_pool():
             db_url,
             min_size=5,
             max_size=20,
-            command_timeout=60
+            max_queries=50000,
+            max_inactive_connection_lifetime=300.0,
+            init=_init_connection,
+            command_timeout=60,
+            # Tayyor (prepare qilingan) so'rovlar ulanishda vaqt bo'yicha eskirmaydi:
+            # kam faol soatlardan keyin ham qayta parse/plan qilinmaydi (LRU hajmi chegaralaydi)
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE", "256")),
+            max_cached_statement_lifetime=0
         )
         logging.info("✅ Database pool yaratildi")
         return DB_POOL
@@ -34,7 +114,10 @@ async def create_tables():
         return False
 
     try:
-        async with DB_POOL.acquire() as conn:
+        async with acquire() as conn:
+            # Ma'lumot versiyasi (hisobot keshi kaliti uchun): har bir yozuvda yangi qiymat oladi
+            await conn.execute("CREATE SEQUENCE IF NOT EXISTS data_version_seq")
+
             # 1. Ishchilar jadvali (location ustunisiz)
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS workers(
@@ -45,7 +128,8 @@ async def create_tables():
                     telegram_id BIGINT UNIQUE,
                     active BOOLEAN DEFAULT TRUE,
                     created_at DATE DEFAULT CURRENT_DATE,
-                    archived_at DATE DEFAULT NULL
+                    archived_at DATE DEFAULT NULL,
+                    version BIGINT NOT NULL DEFAULT nextval('data_version_seq')
                 )
             """)
 
@@ -72,6 +156,62 @@ async def create_tables():
                 )
             """)
 
+            # 4. Oylik yig'ma jadval (har bir yozuvda tranzaksiya ichida yangilanadi)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS payroll_monthly(
+                    worker_id INTEGER REFERENCES workers(id) ON DELETE CASCADE,
+                    month DATE NOT NULL,
+                    hours DECIMAL(8,2) NOT NULL DEFAULT 0,
+                    advances DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    days_present INTEGER NOT NULL DEFAULT 0,
+                    version BIGINT NOT NULL DEFAULT nextval('data_version_seq'),
+                    PRIMARY KEY (worker_id, month)
+                )
+            """)
+
+            # 5. FSM holatlari (PostgresStorage): suhbatlar qayta ishga tushganda saqlanadi
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_storage(
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data JSONB NOT NULL DEFAULT '{}',
+                    expires_at TIMESTAMPTZ NOT NULL
+                )
+            """)
+
+            # 6. Xabarlar navbati (outbox): handlerlar yozadi, NotificationSender yuboradi
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS notification_outbox(
+                    id BIGSERIAL PRIMARY KEY,
+                    chat_id BIGINT NOT NULL,
+                    text TEXT NOT NULL,
+                    reply_markup JSONB,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    last_error TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    sent_at TIMESTAMPTZ,
+                    priority SMALLINT NOT NULL DEFAULT 0,
+                    broadcast_id INTEGER
+                )
+            """)
+
+            # 7. Ommaviy xabarlar (masalan, oylik kuni hisoboti): outbox dagi xabarlar broadcast_id bilan bog'lanadi
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS broadcasts(
+                    id SERIAL PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    month DATE NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'running',
+                    total INTEGER NOT NULL DEFAULT 0,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    finished_at TIMESTAMPTZ
+                )
+            """)
+
             # --- MIGRATIONS (Jadvallar yangilanishi) ---
             try:
                 # Agar advances jadvali eski bo'lsa, approved ustunini qo'shamiz
@@ -79,15 +219,71 @@ async def create_tables():
                 
                 # Agar workers jadvalida location qolib ketgan bo'lsa, olib tashlaymiz
                 await conn.execute("ALTER TABLE workers DROP COLUMN IF EXISTS location")
+                
+                # Hisobot keshi uchun versiya ustunlari
+                await conn.execute("ALTER TABLE workers ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('data_version_seq')")
+                await conn.execute("ALTER TABLE payroll_monthly ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('data_version_seq')")
+                
+                # Xabarlar navbati: ommaviy xabarlar oddiy xabarlardan keyin yuboriladi
+                await conn.execute("ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0")
+                await conn.execute("ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS broadcast_id INTEGER")
+                await conn.execute("DROP INDEX IF EXISTS idx_outbox_pending")
             except Exception as e:
                 logging.warning(f"Migration warning: {e}")
 
             # Indexlar
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_workers_telegram ON workers(telegram_id)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_workers_active ON workers(active)")
+            # Ishchilar ro'yxatini keyset sahifalash uchun: (name, id) > kursor ORDER BY name, id
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_workers_active_name ON workers(name, id) WHERE active = TRUE")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_advances_date ON advances(date)")
 
+            # Oylik so'rovlar uchun kompozit indexlar (date >= $1 AND date < $2)
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_worker ON attendance(date, worker_id) INCLUDE (hours)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_advances_worker_date ON advances(worker_id, date)")
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_advances_approved_date
+                ON advances(date, worker_id) INCLUDE (amount)
+                WHERE approved = TRUE
+            """)
+
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_payroll_monthly_month ON payroll_monthly(month)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_expires ON fsm_storage(expires_at)")
+            # Faqat kutilayotgan xabarlar indekslanadi - yuborilganlar ko'paysa ham navbat so'rovi tez
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_outbox_pending_priority
+                ON notification_outbox(priority, next_attempt_at, id) WHERE status = 'pending'
+            """)
+            # Qayta ishga tushirilgan ommaviy xabar bir ishchiga ikki marta yozilmaydi
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_broadcast_chat
+                ON notification_outbox(broadcast_id, chat_id) WHERE broadcast_id IS NOT NULL
+            """)
+            # Bir oy uchun bir vaqtda faqat bitta ommaviy xabar ishlaydi
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_broadcasts_running
+                ON broadcasts(kind, month) WHERE status = 'running'
+            """)
+
+            # Ism bo'yicha noaniq qidiruv: pg_trgm GIN indexi (kengaytma bo'lmasa ILIKE bilan ishlaydi)
+            global TRGM_AVAILABLE
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except Exception as e:
+                logging.warning(f"⚠️ pg_trgm kengaytmasini yaratib bo'lmadi, qidiruv ILIKE bilan ishlaydi: {e}")
+            TRGM_AVAILABLE = await conn.fetchval("SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            if TRGM_AVAILABLE:
+                await conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_workers_name_trgm
+                    ON workers USING gin (name gin_trgm_ops) WHERE active = TRUE
+                """)
+
+            # Yig'ma jadval bo'sh bo'lsa (birinchi ishga tushirish), tarixdan to'ldiramiz
+            has_rollup = await conn.fetchval("SELECT EXISTS(SELECT 1 FROM payroll_monthly)")
+            if not has_rollup:
+                await conn.execute(REBUILD_PAYROLL_SQL)
+
             logging.info("✅ Barcha jadvallar va indexlar yaratildi")
             return True
             
@@ -98,6 +294,7 @@ async def create_tables():
 async def close_db_pool():
     """Database poolni yopish"""
     global DB_POOL
+    await slow_queries.close()
     if DB_POOL:
         await DB_POOL.close()
         logging.info("✅ Database pool yopildi")
@@ -0,0 +1,122 @@
+"""Tiplangan so'rovlar qatlami
+
+database/requests.py dagi barcha so'rovlar shu qatlam orqali bajariladi:
+- har bir natija turi uchun alohida funksiya: fetch, fetchrow, fetchval, execute, executemany
+- so'rov nomlangan Query obyekti (loglar va db_query_seconds metrikasi shu nom bilan). Argumentli
+  so'rovlar har bir ulanishda bir marta prepare qilinadi: asyncpg ulanish keshi
+  (statement_cache_size) SQL matni bo'yicha tayyor statement ni qayta ishlatadi.
+  PreparedStatement ni o'zimiz saqlay olmaymiz - asyncpg uni ulanish pool ga
+  qaytgach yaroqsiz deb hisoblaydi
+- xatolar DatabaseError bo'lib yuqoriga chiqadi (chaqiruvchi qaror qiladi)
+
+Misol:
+    PAYROLL_ROW = Query("payroll_row", "SELECT hours FROM payroll_monthly WHERE worker_id = $1 AND month = $2")
+    row = await query.fetchrow(PAYROLL_ROW, worker_id, month_start)
+    # tranzaksiya ichida:
+    async with query.transaction("add_x") as conn:
+        await query.execute(UPDATE_X, ..., conn=conn)
+"""
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Iterable, List, Optional
+import asyncpg
+from database import models
+
+class DatabaseError(Exception):
+    """So'rov bajarilmadi (ulanish yo'q yoki Postgres xatosi). __cause__ da asl xato"""
+
+    def __init__(self, message: str, query_name: Optional[str] = None):
+        super().__init__(message)
+        self.query_name = query_name
+
+class Query:
+    """Nomlangan SQL so'rovi (modul darajasida bir marta e'lon qilinadi)"""
+    __slots__ = ("name", "sql")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+
+    def __repr__(self) -> str:
+        return f"Query({self.name!r})"
+
+@asynccontextmanager
+async def _connection(conn):
+    if conn is not None:
+        yield conn
+        return
+    if not models.DB_POOL:
+        raise DatabaseError("Database pool mavjud emas")
+    async with models.acquire() as pooled:
+        yield pooled
+
+@asynccontextmanager
+async def transaction(name: str):
+    """Pool dan ulanish va tranzaksiya. Ichidagi xatolar (COPY, commit ham) DatabaseError bo'ladi
+
+    Ichida to'g'ridan-to'g'ri conn orqali bajarilgan so'rovlar (COPY, BEGIN/COMMIT) metrikada shu nom bilan yoziladi.
+    """
+    if not models.DB_POOL:
+        raise DatabaseError("Database pool mavjud emas", name)
+    token = models.QUERY_NAME.set(name)
+    try:
+        async with models.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+    except DatabaseError:
+        raise
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
+        logging.error(f"❌ DB Xatosi ({name}): {e}")
+        raise DatabaseError(str(e), name) from e
+    finally:
+        models.QUERY_NAME.reset(token)
+
+@asynccontextmanager
+async def connection(name: str):
+    """Pool dan ulanish (tranzaksiyasiz) - COPY ... TO STDOUT kabi to'g'ridan-to'g'ri conn chaqiruvlari uchun
+
+    Xatolar transaction() dagi kabi DatabaseError bo'ladi, metrikada shu nom bilan yoziladi.
+    """
+    if not models.DB_POOL:
+        raise DatabaseError("Database pool mavjud emas", name)
+    token = models.QUERY_NAME.set(name)
+    try:
+        async with models.acquire() as conn:
+            yield conn
+    except DatabaseError:
+        raise
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
+        logging.error(f"❌ DB Xatosi ({name}): {e}")
+        raise DatabaseError(str(e), name) from e
+    finally:
+        models.QUERY_NAME.reset(token)
+
+async def _run(query: Query, method: str, args: tuple, conn):
+    token = models.QUERY_NAME.set(query.name)
+    try:
+        async with _connection(conn) as active:
+            return await getattr(active, method)(query.sql, *args)
+    except DatabaseError:
+        raise
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
+        logging.error(f"❌ DB Xatosi ({query.name}): {e}")
+        raise DatabaseError(str(e), query.name) from e
+    finally:
+        models.QUERY_NAME.reset(token)
+
+async def fetch(query: Query, *args: Any, conn=None) -> List[asyncpg.Record]:
+    return await _run(query, "fetch", args, conn)
+
+async def fetchrow(query: Query, *args: Any, conn=None) -> Optional[asyncpg.Record]:
+    return await _run(query, "fetchrow", args, conn)
+
+async def fetchval(query: Query, *args: Any, conn=None) -> Any:
+    return await _run(query, "fetchval", args, conn)
+
+async def execute(query: Query, *args: Any, conn=None) -> str:
+    """INSERT/UPDATE/DELETE. Qaytaradi: Postgres holat satri ("UPDATE 1")"""
+    return await _run(query, "execute", args, conn)
+
+async def executemany(query: Query, args: Iterable[tuple], conn=None) -> None:
+    """Bir xil so'rovni ko'p qator uchun bitta tayyor statement bilan bajarish"""
+    await _run(query, "executemany", (list(args),), conn)
@@ -3,243 +3,771 @@ import os
 import logging
 from datetime import datetime, date, timedelta
 import calendar
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
-from database import models
-
-class DatabaseError(Exception):
-    pass
+from database import models, events, query
+from database.query import Query, DatabaseError
+from database.cache import worker_cache
 
 # --- TIZIM VAQTI (TOSHKENT) ---
 def get_tashkent_time():
     """Hozirgi vaqtga 5 soat qo'shish"""
     return datetime.utcnow() + timedelta(hours=5)
 
-async def execute_query(query: str, *args) -> Any:
-    if not models.DB_POOL:
-        logging.error("❌ Database pool mavjud emas (execute_query) - Baza ulanmagan!")
-        return []
-    
-    try:
-        async with models.DB_POOL.acquire() as conn:
-            if query.strip().upper().startswith('SELECT'):
-                result = await conn.fetch(query, *args)
-            else:
-                result = await conn.execute(query, *args)
-            return result
-    except Exception as e:
-        logging.error(f"❌ DB Xatosi: {e}\nQuery: {query}\nArgs: {args}")
-        return []
+def month_bounds(year: int, month: int) -> tuple:
+    """Oy chegaralari: [oyning 1-kuni, keyingi oyning 1-kuni)
+
+    TO_CHAR(date, ...) o'rniga shu oraliq ishlatiladi, shunda
+    date ustunidagi indexlar ishlaydi.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+# Barcha so'rovlar nomlangan Query orqali (database/query.py): baza xatosi "natija yo'q" bilan
+# adashmasligi uchun DatabaseError bo'lib chaqiruvchiga chiqadi
 
 # --- YANGI: UMUMIY STATISTIKA (Toshkent vaqti bilan) ---
-async def get_general_statistics() -> Dict[str, Any]:
-    try:
-        # 1. Jami aktiv ishchilar
-        res_workers = await execute_query("SELECT COUNT(*) as cnt FROM workers WHERE active = TRUE")
-        total_workers = res_workers[0]['cnt'] if res_workers else 0
-        
-        # Joriy oy (Toshkent vaqti)
-        month_str = get_tashkent_time().strftime("%Y-%m")
-        
-        # 2. Jami soat (Joriy oy)
-        res_hours = await execute_query("""
-            SELECT SUM(hours) as total FROM attendance 
-            WHERE TO_CHAR(date, 'YYYY-MM') = $1
-        """, month_str)
-        total_hours = float(res_hours[0]['total']) if res_hours and res_hours[0]['total'] else 0.0
-        
-        # 3. Jami avans (Joriy oy)
-        res_adv = await execute_query("""
-            SELECT SUM(amount) as total FROM advances 
-            WHERE TO_CHAR(date, 'YYYY-MM') = $1 AND approved = TRUE
-        """, month_str)
-        total_advance = float(res_adv[0]['total']) if res_adv and res_adv[0]['total'] else 0.0
-        
-        # 4. Top ishchi
-        res_top = await execute_query("""
-            SELECT w.name, SUM(a.hours) as total_h
-            FROM attendance a
-            JOIN workers w ON a.worker_id = w.id
-            WHERE TO_CHAR(a.date, 'YYYY-MM') = $1
-            GROUP BY w.name
-            ORDER BY total_h DESC
-            LIMIT 1
-        """, month_str)
-        
-        top_worker = None
-        if res_top:
-            top_worker = {
-                'name': res_top[0]['name'],
-                'hours': float(res_top[0]['total_h'])
-            }
-            
-        return {
-            'workers': total_workers,
-            'hours': total_hours,
-            'advance': total_advance,
-            'top_worker': top_worker
-        }
-    except Exception as e:
-        logging.error(f"Statistika xatosi: {e}")
-        return {}
+@dataclass
+class GeneralStatistics:
+    """Joriy oy bo'yicha umumiy statistika"""
+    workers: int
+    hours: float
+    advance: float
+    top_worker_name: Optional[str] = None
+    top_worker_hours: float = 0.0
+
+# payroll_monthly: har bir ishchi uchun oyiga bitta qator
+GENERAL_STATISTICS = Query("general_statistics", """
+    WITH month_rollup AS (
+        SELECT worker_id, hours, advances
+        FROM payroll_monthly
+        WHERE month = $1
+    ),
+    top AS (
+        SELECT w.name, mr.hours AS total_h
+        FROM month_rollup mr
+        JOIN workers w ON w.id = mr.worker_id
+        WHERE mr.hours > 0
+        ORDER BY mr.hours DESC
+        LIMIT 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM workers WHERE active = TRUE) AS workers,
+        (SELECT SUM(hours) FROM month_rollup) AS hours,
+        (SELECT SUM(advances) FROM month_rollup) AS advance,
+        (SELECT name FROM top) AS top_name,
+        (SELECT total_h FROM top) AS top_hours
+""")
+
+async def get_general_statistics() -> GeneralStatistics:
+    """Barcha ko'rsatkichlar bitta so'rovda (bitta pool ulanishi). Baza xatosida DatabaseError"""
+    # Joriy oy (Toshkent vaqti)
+    now = get_tashkent_time()
+    month_start, _ = month_bounds(now.year, now.month)
+    
+    row = await query.fetchrow(GENERAL_STATISTICS, month_start)
+    return GeneralStatistics(
+        workers=row['workers'] or 0,
+        hours=float(row['hours'] or 0),
+        advance=float(row['advance'] or 0),
+        top_worker_name=row['top_name'],
+        top_worker_hours=float(row['top_hours'] or 0)
+    )
 
 # --- ISHCHILAR ---
+WORKER_CODE_EXISTS = Query("worker_code_exists", "SELECT EXISTS(SELECT 1 FROM workers WHERE code = $1)")
+# created_at ni baza o'zi hal qiladi (CURRENT_DATE), lekin server vaqti muhim bo'lsa
+# Toshkent sanasini jo'natishimiz mumkin. Hozircha DB ga qo'yamiz.
+INSERT_WORKER = Query("insert_worker",
+    "INSERT INTO workers (name, rate, code, active, created_at) VALUES ($1, $2, $3, TRUE, CURRENT_DATE)")
+
 async def add_worker(name: str, rate: float, code: int) -> bool:
-    try:
-        exists = await execute_query("SELECT 1 FROM workers WHERE code = $1", code)
-        if exists: return False
-        
-        # created_at ni baza o'zi hal qiladi (CURRENT_DATE), lekin server vaqti muhim bo'lsa
-        # Toshkent sanasini jo'natishimiz mumkin. Hozircha DB ga qo'yamiz.
-        await execute_query(
-            "INSERT INTO workers (name, rate, code, active, created_at) VALUES ($1, $2, $3, TRUE, CURRENT_DATE)", 
-            name.strip(), float(rate), int(code)
-        )
-        return True
-    except Exception as e:
-        logging.error(f"add_worker xatosi: {e}")
+    """Qaytaradi: False - kod band. Baza xatosida DatabaseError"""
+    if await query.fetchval(WORKER_CODE_EXISTS, int(code)):
         return False
+    
+    await query.execute(INSERT_WORKER, name.strip(), float(rate), int(code))
+    worker_cache.invalidate()
+    await events.notify(events.WORKER_CHANGED)
+    return True
+
+# Keshda topilmagan ishchini olish (ustun nomi so'rov matniga kiradi - faqat shu ro'yxatdan)
+WORKER_BY = {
+    column: Query(f"worker_by_{column}", f"SELECT * FROM workers WHERE {column} = $1")
+    for column in ("id", "code", "telegram_id")
+}
+ACTIVE_WORKERS = Query("active_workers", "SELECT * FROM workers WHERE active = TRUE ORDER BY name")
+
+async def _fetch_worker(column: str, value: Any) -> Optional[Dict[str, Any]]:
+    """Keshda topilmagan ishchini bazadan olib, keshga qo'shish"""
+    row = await query.fetchrow(WORKER_BY[column], value)
+    if not row: return None
+    
+    worker = dict(row)
+    worker_cache.put(worker)
+    return worker
 
 async def get_active_workers() -> List[Dict[str, Any]]:
-    try:
-        rows = await execute_query("SELECT * FROM workers WHERE active = TRUE ORDER BY name")
-        return [dict(row) for row in rows] if rows else []
-    except Exception as e:
-        logging.error(f"get_active_workers xatosi: {e}")
-        return []
+    workers = await worker_cache.get_active()
+    if workers is not None:
+        return workers
+    
+    return [dict(row) for row in await query.fetch(ACTIVE_WORKERS)]
+
+# Keyset sahifalash: kursor - ishchi id si, tartib (name, id) bo'yicha (ismlar takrorlanishi mumkin)
+FIRST_WORKER_PAGE = Query("first_worker_page",
+    "SELECT * FROM workers WHERE active = TRUE ORDER BY name, id LIMIT $1")
+WORKER_PAGE_QUERIES = {
+    "next": Query("worker_page_next", """
+        SELECT * FROM workers
+        WHERE active = TRUE AND (name, id) > (SELECT name, id FROM workers WHERE id = $1)
+        ORDER BY name, id LIMIT $2
+    """),
+    "at": Query("worker_page_at", """
+        SELECT * FROM workers
+        WHERE active = TRUE AND (name, id) >= (SELECT name, id FROM workers WHERE id = $1)
+        ORDER BY name, id LIMIT $2
+    """),
+    "prev": Query("worker_page_prev", """
+        SELECT * FROM workers
+        WHERE active = TRUE AND (name, id) < (SELECT name, id FROM workers WHERE id = $1)
+        ORDER BY name DESC, id DESC LIMIT $2
+    """),
+}
+# Tafsilotdan qaytganda: oldinda ishchi bormi (index bo'yicha bitta qator)
+WORKERS_BEFORE = Query("workers_before",
+    "SELECT EXISTS(SELECT 1 FROM workers WHERE active = TRUE AND (name, id) < ($1, $2))")
+
+async def get_workers_page(cursor_id: Optional[int] = None, direction: str = "next", limit: int = 10) -> tuple:
+    """Aktiv ishchilarning bitta sahifasi (butun jadval o'qilmaydi)
+
+    direction: "next" - kursordan keyingilar, "prev" - oldingilar, "at" - kursordan boshlab.
+    Qaytaradi: (ishchilar ism bo'yicha tartibda, oldingi sahifa bormi, keyingi sahifa bormi).
+    """
+    if cursor_id is None:
+        rows = await query.fetch(FIRST_WORKER_PAGE, limit + 1)
+    else:
+        rows = await query.fetch(WORKER_PAGE_QUERIES[direction], cursor_id, limit + 1)
+
+    workers = [dict(row) for row in rows[:limit]]
+    has_more = len(rows) > limit
+
+    if direction == "prev":
+        workers.reverse()
+        return workers, has_more, True
+    if direction == "at" and workers:
+        before = await query.fetchval(WORKERS_BEFORE, workers[0]['name'], workers[0]['id'])
+        return workers, bool(before), has_more
+    return workers, cursor_id is not None, has_more
+
+WORKER_MONTH = Query("worker_month",
+    "SELECT hours, advances, days_present FROM payroll_monthly WHERE worker_id = $1 AND month = $2")
+
+async def get_worker_month(worker_id: int, year: int, month: int) -> Dict[str, float]:
+    """Bitta ishchining oylik ko'rsatkichlari (payroll_monthly dan)"""
+    month_start, _ = month_bounds(year, month)
+    row = await query.fetchrow(WORKER_MONTH, worker_id, month_start)
+    if not row:
+        return {"hours": 0.0, "advance": 0.0, "days": 0}
+    return {"hours": float(row['hours']), "advance": float(row['advances']), "days": row['days_present']}
 
 async def get_worker_by_id(worker_id: int) -> Optional[Dict[str, Any]]:
-    rows = await execute_query("SELECT * FROM workers WHERE id = $1", worker_id)
-    return dict(rows[0]) if rows else None
+    worker = await worker_cache.get_by_id(worker_id)
+    return worker or await _fetch_worker("id", worker_id)
+
+# Ism bo'yicha qidiruv: avval ism shu matn bilan boshlanganlar, keyin o'xshashlik bo'yicha
+SEARCH_WORKERS_TRGM = Query("search_workers_trgm", """
+    SELECT *, word_similarity($1, name) AS score FROM workers
+    WHERE active = TRUE AND ($1 <% name OR name ILIKE $2)
+    ORDER BY name ILIKE $3 DESC, score DESC, name
+    LIMIT $4
+""")
+
+# pg_trgm bo'lmasa: faqat ichida uchraganlar, matn ismning boshiga qanchalik yaqin bo'lsa shuncha yuqori
+# (strpos ILIKE dan arzon va maxsus belgilarni ekranlash kerak emas)
+SEARCH_WORKERS_PLAIN = Query("search_workers_plain", """
+    SELECT * FROM workers
+    WHERE active = TRUE AND strpos(lower(name), lower($1)) > 0
+    ORDER BY strpos(lower(name), lower($1)), length(name), name
+    LIMIT $2
+""")
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
-async def search_worker_by_name(text: str) -> List[Dict[str, Any]]:
-    rows = await execute_query("SELECT * FROM workers WHERE active = TRUE AND name ILIKE $1", f"%{text}%")
-    return [dict(row) for row in rows] if rows else []
+async def search_worker_by_name(text: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Aktiv ishchilarni ism bo'yicha qidirish (eng mos kelganlari birinchi, `limit` tagacha)"""
+    text = text.strip()
+    if not text: return []
+
+    if models.TRGM_AVAILABLE:
+        pattern = _like_escape(text)
+        rows = await query.fetch(SEARCH_WORKERS_TRGM, text, f"%{pattern}%", f"{pattern}%", limit)
+    else:
+        rows = await query.fetch(SEARCH_WORKERS_PLAIN, text, limit)
+    return [dict(row) for row in rows]
+
+UPDATE_WORKER_FIELD = {
+    field: Query(f"update_worker_{field}",
+                 f"UPDATE workers SET {field} = $1, version = nextval('data_version_seq') WHERE id = $2")
+    for field in ("name", "rate")
+}
+ARCHIVE_WORKER = Query("archive_worker", """
+    UPDATE workers SET active = FALSE, archived_at = CURRENT_DATE, version = nextval('data_version_seq')
+    WHERE id = $1
+""")
 
 async def update_worker_field(worker_id: int, field: str, value: Any) -> bool:
-    if field not in ['name', 'rate']: return False
-    try:
-        await execute_query(f"UPDATE workers SET {field} = $1 WHERE id = $2", value, worker_id)
-        return True
-    except: return False
+    """Qaytaradi: False - maydon noto'g'ri yoki ishchi topilmadi. Baza xatosida DatabaseError"""
+    if field not in UPDATE_WORKER_FIELD: return False
+    status = await query.execute(UPDATE_WORKER_FIELD[field], value, worker_id)
+    worker_cache.invalidate()
+    await events.notify(events.WORKER_CHANGED, id=worker_id)
+    return status == "UPDATE 1"
 
 async def archive_worker(worker_id: int) -> bool:
-    try:
-        await execute_query("UPDATE workers SET active = FALSE, archived_at = CURRENT_DATE WHERE id = $1", worker_id)
-        return True
-    except: return False
+    """Qaytaradi: False - ishchi topilmadi. Baza xatosida DatabaseError"""
+    status = await query.execute(ARCHIVE_WORKER, worker_id)
+    worker_cache.invalidate()
+    await events.notify(events.WORKER_CHANGED, id=worker_id)
+    return status == "UPDATE 1"
 
 # --- DAVOMAT (Sanani Toshkent vaqti bilan olish) ---
-async def add_attendance(worker_id: int, hours: float, status: str) -> bool:
-    try:
-        # Hozirgi sana (Toshkent bo'yicha)
-        tashkent_date = get_tashkent_time().date()
+# Davomat yozish (tranzaksiya ichida, har bir ulanishda bir marta prepare qilinadi)
+LOCK_PAYROLL_ROW = Query("lock_payroll_row", """
+    INSERT INTO payroll_monthly (worker_id, month) VALUES ($1, $2)
+    ON CONFLICT (worker_id, month) DO UPDATE SET hours = payroll_monthly.hours
+""")
+GET_ATTENDANCE_HOURS = Query("get_attendance_hours",
+    "SELECT hours FROM attendance WHERE worker_id = $1 AND date = $2")
+UPSERT_ATTENDANCE = Query("upsert_attendance", """
+    INSERT INTO attendance (worker_id, date, hours, status)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (worker_id, date)
+    DO UPDATE SET hours = EXCLUDED.hours, status = EXCLUDED.status
+""")
+ADD_PAYROLL_HOURS = Query("add_payroll_hours", """
+    UPDATE payroll_monthly
+    SET hours = hours + $3, days_present = days_present + $4,
+        version = nextval('data_version_seq')
+    WHERE worker_id = $1 AND month = $2
+""")
+
+def attendance_delta(old_hours: Optional[float], new_hours: float) -> tuple:
+    """Davomat qayta yozilganda payroll_monthly ga qo'shiladigan farq: (soat, kelgan kunlar)
+
+    Yozuv bo'lmagan kun (None) 0 soat bilan bir xil. APPLY_BULK_ATTENDANCE shu hisobni SQL da qiladi.
+    """
+    old = float(old_hours or 0)
+    new = float(new_hours)
+    return new - old, int(new > 0) - int(old > 0)
+
+async def add_attendance(worker_id: int, hours: float, status: str) -> None:
+    """Bugungi davomatni yozish (qayta yozishda yig'maga faqat farq qo'shiladi). Baza xatosida DatabaseError"""
+    # Hozirgi sana (Toshkent bo'yicha)
+    tashkent_date = get_tashkent_time().date()
+    month_start = tashkent_date.replace(day=1)
+    
+    async with query.transaction("add_attendance") as conn:
+        # Yig'ma qatorni qulflaymiz: bir ishchi-oy uchun yozuvlar navbat bilan o'tadi,
+        # shunda eski qiymat (delta uchun) to'g'ri o'qiladi
+        await query.execute(LOCK_PAYROLL_ROW, worker_id, month_start, conn=conn)
+        old_hours = await query.fetchval(GET_ATTENDANCE_HOURS, worker_id, tashkent_date, conn=conn)
+        await query.execute(UPSERT_ATTENDANCE, worker_id, tashkent_date, float(hours), status, conn=conn)
         
-        await execute_query("""
-            INSERT INTO attendance (worker_id, date, hours, status) 
-            VALUES ($1, $2, $3, $4)
-            ON CONFLICT (worker_id, date) 
-            DO UPDATE SET hours = EXCLUDED.hours, status = EXCLUDED.status
-        """, worker_id, tashkent_date, float(hours), status)
-        return True
-    except Exception as e:
-        logging.error(f"add_attendance error: {e}")
-        return False
+        # ON CONFLICT qayta yozishda faqat farqni qo'shamiz
+        hours_delta, days_delta = attendance_delta(old_hours, hours)
+        await query.execute(ADD_PAYROLL_HOURS, worker_id, month_start, hours_delta, days_delta, conn=conn)
+        
+        await events.notify(events.ATTENDANCE_CHANGED, conn,
+                            month=month_start.strftime("%Y-%m"), worker_id=worker_id)
+
+# Ommaviy davomat: vaqtinchalik jadvalga COPY, keyin bitta tranzaksiyada yozish
+CREATE_BULK_ATTENDANCE = Query("create_bulk_attendance", """
+    CREATE TEMP TABLE bulk_attendance (worker_id INTEGER PRIMARY KEY, hours NUMERIC(4,2) NOT NULL)
+    ON COMMIT DROP
+""")
+LOCK_BULK_PAYROLL_ROWS = Query("lock_bulk_payroll_rows", """
+    INSERT INTO payroll_monthly (worker_id, month)
+    SELECT worker_id, $1 FROM bulk_attendance ORDER BY worker_id
+    ON CONFLICT (worker_id, month) DO UPDATE SET hours = payroll_monthly.hours
+""")
+APPLY_BULK_ATTENDANCE = Query("apply_bulk_attendance", """
+    WITH old AS (
+        SELECT b.worker_id, b.hours AS new_hours, COALESCE(a.hours, 0) AS old_hours
+        FROM bulk_attendance b
+        LEFT JOIN attendance a ON a.worker_id = b.worker_id AND a.date = $1
+    ), upsert AS (
+        INSERT INTO attendance (worker_id, date, hours, status)
+        SELECT worker_id, $1, hours, CASE WHEN hours > 0 THEN 'Keldi' ELSE 'Kelmadi' END
+        FROM bulk_attendance
+        ON CONFLICT (worker_id, date)
+        DO UPDATE SET hours = EXCLUDED.hours, status = EXCLUDED.status
+    )
+    UPDATE payroll_monthly p
+    SET hours = p.hours + (o.new_hours - o.old_hours),
+        days_present = p.days_present + (o.new_hours > 0)::int - (o.old_hours > 0)::int,
+        version = nextval('data_version_seq')
+    FROM old o
+    WHERE p.worker_id = o.worker_id AND p.month = $2
+""")
 
-async def add_advance(worker_id: int, amount: float, approved: bool = True) -> bool:
-    try:
-        tashkent_date = get_tashkent_time().date()
-        await execute_query(
-            "INSERT INTO advances (worker_id, date, amount, approved) VALUES ($1, $2, $3, $4)",
-            worker_id, tashkent_date, float(amount), approved
+async def add_attendance_bulk(entries: List[tuple], day: Optional[date] = None) -> int:
+    """Bir kunlik davomatni ko'p ishchi uchun bitta tranzaksiyada yozish
+
+    entries: [(worker_id, soat), ...] - oldindan tekshirilgan, id lar takrorlanmaydi.
+    Qayta yozishda payroll_monthly ga faqat farq qo'shiladi (add_attendance bilan bir xil).
+    Qaytaradi: yozilgan qatorlar soni. Xato bo'lsa DatabaseError (hech narsa yozilmaydi).
+    """
+    if not entries: return 0
+
+    day = day or get_tashkent_time().date()
+    month_start = day.replace(day=1)
+    async with query.transaction("add_attendance_bulk") as conn:
+        await query.execute(CREATE_BULK_ATTENDANCE, conn=conn)
+        await conn.copy_records_to_table(
+            "bulk_attendance", records=[(int(wid), float(hours)) for wid, hours in entries],
+            columns=["worker_id", "hours"]
         )
-        return True
-    except Exception as e:
-        logging.error(f"add_advance error: {e}")
-        return False
+        # Yig'ma qatorlar id tartibida qulflanadi - parallel add_attendance bilan deadlock bo'lmaydi
+        await query.execute(LOCK_BULK_PAYROLL_ROWS, month_start, conn=conn)
+        await query.execute(APPLY_BULK_ATTENDANCE, day, month_start, conn=conn)
+        await events.notify(events.ATTENDANCE_CHANGED, conn, month=month_start.strftime("%Y-%m"))
+    return len(entries)
+
+ACTIVE_WORKER_IDS = Query("active_worker_ids", "SELECT id FROM workers WHERE active = TRUE ORDER BY id")
+ACTIVE_WORKER_IDS_IN = Query("active_worker_ids_in",
+    "SELECT id FROM workers WHERE active = TRUE AND id = ANY($1::int[])")
+
+async def get_active_worker_ids(ids: Optional[List[int]] = None) -> List[int]:
+    """Aktiv ishchilar id lari (ids berilsa - faqat ulardan aktivlari)"""
+    if ids is None:
+        rows = await query.fetch(ACTIVE_WORKER_IDS)
+    else:
+        rows = await query.fetch(ACTIVE_WORKER_IDS_IN, ids)
+    return [row['id'] for row in rows]
+
+INSERT_ADVANCE = Query("insert_advance",
+    "INSERT INTO advances (worker_id, date, amount, approved) VALUES ($1, $2, $3, $4)")
+ADD_PAYROLL_ADVANCE = Query("add_payroll_advance", """
+    INSERT INTO payroll_monthly (worker_id, month, advances) VALUES ($1, $2, $3)
+    ON CONFLICT (worker_id, month)
+    DO UPDATE SET advances = payroll_monthly.advances + EXCLUDED.advances,
+                  version = nextval('data_version_seq')
+""")
+
+async def add_advance(worker_id: int, amount: float, approved: bool = True) -> None:
+    """Avans yozish (tasdiqlangani yig'maga ham). Baza xatosida DatabaseError"""
+    tashkent_date = get_tashkent_time().date()
+    async with query.transaction("add_advance") as conn:
+        await query.execute(INSERT_ADVANCE, worker_id, tashkent_date, float(amount), approved, conn=conn)
+        # Faqat tasdiqlangan avans yig'ma jadvalga tushadi
+        if approved:
+            await query.execute(ADD_PAYROLL_ADVANCE, worker_id, tashkent_date.replace(day=1), float(amount),
+                                conn=conn)
+        
+        await events.notify(events.ADVANCE_CHANGED, conn,
+                            month=tashkent_date.strftime("%Y-%m"), worker_id=worker_id)
+
+# Qayta hisoblash paytida yangi yozuvlar kutib turadi
+LOCK_PAYROLL_TABLE = Query("lock_payroll_monthly", "LOCK TABLE payroll_monthly IN EXCLUSIVE MODE")
+CLEAR_PAYROLL = Query("clear_payroll_monthly", "DELETE FROM payroll_monthly")
+REBUILD_PAYROLL = Query("rebuild_payroll_monthly", models.REBUILD_PAYROLL_SQL)
+COUNT_PAYROLL = Query("count_payroll_monthly", "SELECT COUNT(*) FROM payroll_monthly")
+
+async def rebuild_payroll_monthly() -> int:
+    """payroll_monthly ni xom davomat/avanslardan qaytadan hisoblash (tuzatish uchun)
+
+    Qaytaradi: qatorlar soni. Baza xatosida DatabaseError (eski qatorlar saqlanadi).
+    """
+    async with query.transaction("rebuild_payroll_monthly") as conn:
+        await query.execute(LOCK_PAYROLL_TABLE, conn=conn)
+        await query.execute(CLEAR_PAYROLL, conn=conn)
+        await query.execute(REBUILD_PAYROLL, conn=conn)
+        count = await query.fetchval(COUNT_PAYROLL, conn=conn)
+        
+        # Oy ko'rsatilmagan - barcha oylar eskirgan
+        await events.notify(events.ATTENDANCE_CHANGED, conn)
+        await events.notify(events.ADVANCE_CHANGED, conn)
+    logging.info(f"✅ payroll_monthly qayta hisoblandi: {count} qator")
+    return count
 
 # --- HISOBOT UCHUN ---
+MONTH_HOURS = Query("month_hours", "SELECT worker_id, hours FROM payroll_monthly WHERE month = $1")
+MONTH_ADVANCES = Query("month_advances", """
+    SELECT worker_id, advances as total FROM payroll_monthly
+    WHERE month = $1 AND advances <> 0
+""")
+MONTH_PAYROLL = Query("month_payroll", """
+    SELECT w.id, w.name, w.rate,
+           COALESCE(p.hours, 0) AS hours,
+           COALESCE(p.advances, 0) AS advance,
+           COALESCE(p.hours, 0) * w.rate AS gross,
+           COALESCE(p.hours, 0) * w.rate - COALESCE(p.advances, 0) AS net
+    FROM workers w
+    LEFT JOIN payroll_monthly p ON p.worker_id = w.id AND p.month = $1
+    WHERE w.active = TRUE
+    ORDER BY w.name
+""")
+
 async def get_month_data(year: int, month: int) -> tuple:
-    date_filter = f"{year}-{month:02d}"
-    
-    att = await execute_query("""
-        SELECT worker_id, hours FROM attendance 
-        WHERE TO_CHAR(date, 'YYYY-MM') = $1
-    """, date_filter)
-    
-    adv = await execute_query("""
-        SELECT worker_id, SUM(amount) as total FROM advances 
-        WHERE TO_CHAR(date, 'YYYY-MM') = $1 AND approved = TRUE
-        GROUP BY worker_id
-    """, date_filter)
+    """Oy bo'yicha ishchi kesimida soat va avanslar (payroll_monthly dan)"""
+    month_start, _ = month_bounds(year, month)
     
+    att = await query.fetch(MONTH_HOURS, month_start)
+    adv = await query.fetch(MONTH_ADVANCES, month_start)
     return att, adv
 
+async def get_month_payroll(year: int, month: int) -> List[Dict[str, Any]]:
+    """Har bir aktiv ishchi uchun bitta qator: soat, avans, hisoblangan va qo'lga tegadi"""
+    month_start, _ = month_bounds(year, month)
+    
+    rows = await query.fetch(MONTH_PAYROLL, month_start)
+    return [{
+        'id': row['id'],
+        'name': row['name'],
+        'rate': float(row['rate']),
+        'hours': float(row['hours']),
+        'advance': float(row['advance']),
+        'gross': float(row['gross']),
+        'net': float(row['net'])
+    } for row in rows]
+
 async def get_workers_for_report(year: int, month: int) -> List[Dict[str, Any]]:
     last_day = calendar.monthrange(year, month)[1]
     end_date = date(year, month, last_day)
     start_date = date(year, month, 1)
-    
-    rows = await execute_query("""
-        SELECT * FROM workers 
-        WHERE (created_at IS NULL OR created_at <= $2)
-          AND (archived_at IS NULL OR archived_at >= $1)
-        ORDER BY name
-    """, start_date, end_date)
-    
-    return [dict(row) for row in rows] if rows else []
+    return await get_workers_for_period(start_date, end_date)
+
+WORKERS_FOR_PERIOD = Query("workers_for_period", """
+    SELECT * FROM workers
+    WHERE (created_at IS NULL OR created_at <= $2)
+      AND (archived_at IS NULL OR archived_at >= $1)
+    ORDER BY name
+""")
+
+async def get_workers_for_period(start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """Oraliqda kamida bir kun ishlagan (ro'yxatda bo'lgan) ishchilar"""
+    rows = await query.fetch(WORKERS_FOR_PERIOD, start_date, end_date)
+    return [dict(row) for row in rows]
+
+# Hisobot keshi kaliti: payroll_monthly va workers dagi har bir o'zgarish data_version_seq dan
+# yangi qiymat oladi, shuning uchun MAX(version) davrdagi har qanday yozuvda oshadi
+PERIOD_VERSION = Query("period_version", """
+    SELECT
+        (SELECT COALESCE(MAX(version), 0) FROM payroll_monthly WHERE month >= $1 AND month < $2) AS data_version,
+        (SELECT COUNT(*) FROM payroll_monthly WHERE month >= $1 AND month < $2) AS data_rows,
+        (SELECT COALESCE(MAX(version), 0) FROM workers) AS roster_version,
+        (SELECT COUNT(*) FROM workers) AS roster_size
+""")
+
+async def _period_version(start: date, end: date) -> tuple:
+    row = await query.fetchrow(PERIOD_VERSION, start, end)
+    return (row['data_version'], row['data_rows'], row['roster_version'], row['roster_size'])
+
+async def get_month_version(year: int, month: int) -> tuple:
+    """Oy ma'lumotlari versiyasi (hisobot keshi kaliti uchun arzon barmoq izi)"""
+    return await _period_version(*month_bounds(year, month))
+
+async def get_year_version(year: int) -> tuple:
+    """Yillik hisobot keshi kaliti (get_month_version ning butun yil uchun varianti)"""
+    return await _period_version(date(year, 1, 1), date(year + 1, 1, 1))
+
+# Yillik davomat bitta so'rovda: har bir (ishchi, oy) uchun kunlar va soatlar massivi.
+# Kunlik qatorlar o'rniga ishchi-oy bo'yicha guruhlanadi - 1000 ishchida ~370 ming emas, ~12 ming qator
+YEAR_ATTENDANCE = Query("year_attendance", """
+    SELECT worker_id,
+           EXTRACT(MONTH FROM date)::int AS month,
+           array_agg(EXTRACT(DAY FROM date)::int ORDER BY date) AS days,
+           array_agg(hours::float8 ORDER BY date) AS hours
+    FROM attendance
+    WHERE date >= $1 AND date < $2
+    GROUP BY worker_id, EXTRACT(MONTH FROM date)
+""")
+YEAR_ADVANCES = Query("year_advances", """
+    SELECT worker_id, EXTRACT(MONTH FROM month)::int AS month, advances::float8 AS total
+    FROM payroll_monthly
+    WHERE month >= $1 AND month < $2 AND advances <> 0
+""")
+MONTH_ATTENDANCE = Query("month_attendance", """
+    SELECT worker_id, TO_CHAR(date, 'YYYY-MM-DD') as date_str, hours
+    FROM attendance
+    WHERE date >= $1 AND date < $2
+""")
+
+async def get_year_attendance(year: int):
+    return await query.fetch(YEAR_ATTENDANCE, date(year, 1, 1), date(year + 1, 1, 1))
+
+async def get_year_advances(year: int):
+    """Yillik avanslar oylar bo'yicha (payroll_monthly dan)"""
+    return await query.fetch(YEAR_ADVANCES, date(year, 1, 1), date(year + 1, 1, 1))
 
 async def get_month_attendance(year: int, month: int):
-    date_filter = f"{year}-{month:02d}"
-    return await execute_query("""
-        SELECT worker_id, TO_CHAR(date, 'YYYY-MM-DD') as date_str, hours 
-        FROM attendance 
-        WHERE TO_CHAR(date, 'YYYY-MM') = $1
-    """, date_filter)
+    return await query.fetch(MONTH_ATTENDANCE, *month_bounds(year, month))
 
 async def get_month_advances(year: int, month: int):
-    date_filter = f"{year}-{month:02d}"
-    return await execute_query("""
-        SELECT worker_id, SUM(amount) as total 
-        FROM advances 
-        WHERE TO_CHAR(date, 'YYYY-MM') = $1 AND approved = TRUE
-        GROUP BY worker_id
-    """, date_filter)
+    month_start, _ = month_bounds(year, month)
+    return await query.fetch(MONTH_ADVANCES, month_start)
+
+# --- EKSPORT (COPY, buxgalteriya uchun) ---
+# Barcha so'rovlar $1 (boshlanish) va $2 (tugashdan keyingi kun) oralig'ini oladi
+EXPORT_QUERIES = {
+    'attendance': """
+        SELECT a.date, a.worker_id, w.name, a.hours, a.status
+        FROM attendance a
+        JOIN workers w ON w.id = a.worker_id
+        WHERE a.date >= $1 AND a.date < $2
+        ORDER BY a.date, a.worker_id
+    """,
+    'advances': """
+        SELECT a.date, a.worker_id, w.name, a.amount, a.approved
+        FROM advances a
+        JOIN workers w ON w.id = a.worker_id
+        WHERE a.date >= $1 AND a.date < $2
+        ORDER BY a.date, a.id
+    """,
+    # Oylik hisob: oraliqqa tushgan har bir oy uchun ishchi bo'yicha bitta qator
+    'payroll': """
+        SELECT TO_CHAR(p.month, 'YYYY-MM') AS month, p.worker_id, w.name, w.rate,
+               p.days_present, p.hours, p.advances,
+               (p.hours * w.rate)::numeric(14,2) AS gross,
+               (p.hours * w.rate - p.advances)::numeric(14,2) AS net
+        FROM payroll_monthly p
+        JOIN workers w ON w.id = p.worker_id
+        WHERE p.month >= date_trunc('month', $1::date) AND p.month < $2
+        ORDER BY p.month, w.name
+    """,
+}
+
+# Ko'p yillik eksport pool ning odatiy command_timeout idan uzoq davom etishi mumkin
+EXPORT_TIMEOUT = 600
+
+async def copy_export(kind: str, start_date: date, end_date: date, output, delimiter: str = ",") -> int:
+    """COPY ... TO STDOUT: server CSV ni to'g'ridan-to'g'ri output ga oqizadi
+
+    output - fayl obyekti, yo'l yoki async callable (asyncpg copy_from_query kabi).
+    Python qator obyektlari yaratilmaydi. Qaytaradi: qatorlar soni. Baza xatosida DatabaseError.
+    """
+    async with query.connection(f"copy_export_{kind}") as conn:
+        status = await conn.copy_from_query(
+            EXPORT_QUERIES[kind], start_date, end_date + timedelta(days=1),
+            output=output, format='csv', header=True, delimiter=delimiter,
+            timeout=EXPORT_TIMEOUT
+        )
+    return int(status.split()[-1])
+
+# --- XABARLAR NAVBATI (OUTBOX) ---
+ENQUEUE_NOTIFICATIONS = Query("enqueue_notifications", """
+    INSERT INTO notification_outbox (chat_id, text, reply_markup)
+    SELECT * FROM unnest($1::bigint[], $2::text[], $3::jsonb[])
+""")
+# Olingan xabarlar `lease` soniyaga band qilinadi: jarayon yuborish paytida to'xtab qolsa,
+# muddat tugagach ular yana navbatga qaytadi
+CLAIM_NOTIFICATIONS = Query("claim_notifications", """
+    UPDATE notification_outbox
+    SET attempts = attempts + 1, next_attempt_at = now() + make_interval(secs => $2)
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE status = 'pending' AND next_attempt_at <= now()
+        ORDER BY priority, next_attempt_at, id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, chat_id, text, reply_markup, attempts, priority
+""")
+MARK_NOTIFICATIONS_SENT = Query("mark_notifications_sent", """
+    UPDATE notification_outbox SET status = 'sent', sent_at = now(), last_error = NULL
+    WHERE id = ANY($1::bigint[])
+""")
+RELEASE_NOTIFICATIONS = Query("release_notifications", """
+    UPDATE notification_outbox SET attempts = attempts - 1, next_attempt_at = now()
+    WHERE id = ANY($1::bigint[]) AND status = 'pending'
+""")
+RETRY_NOTIFICATION = Query("retry_notification", """
+    UPDATE notification_outbox SET next_attempt_at = now() + make_interval(secs => $2), last_error = $3
+    WHERE id = $1
+""")
+# Telegram flood limiti (RetryAfter) xabarning xatosi emas: claim da qo'shilgan urinish qaytariladi
+DEFER_NOTIFICATION = Query("defer_notification", """
+    UPDATE notification_outbox
+    SET attempts = attempts - 1, next_attempt_at = now() + make_interval(secs => $2), last_error = $3
+    WHERE id = $1
+""")
+FAIL_NOTIFICATION = Query("fail_notification", """
+    UPDATE notification_outbox SET status = 'failed', last_error = $2
+    WHERE id = $1
+""")
+PURGE_NOTIFICATIONS = Query("purge_notifications", """
+    DELETE FROM notification_outbox
+    WHERE status <> 'pending' AND created_at < now() - make_interval(days => $1)
+""")
+
+async def enqueue_notifications(items: List[tuple]) -> int:
+    """(chat_id, matn, reply_markup JSON yoki None) larni bitta so'rovda navbatga qo'shish
+
+    Qaytaradi: qo'shilgan xabarlar soni. Baza xatosida DatabaseError.
+    """
+    if not items: return 0
+    chat_ids, texts, markups = (list(column) for column in zip(*items))
+    await query.execute(ENQUEUE_NOTIFICATIONS, chat_ids, texts, markups)
+    return len(items)
+
+async def claim_notifications(limit: int, lease: float) -> List[Dict[str, Any]]:
+    """Yuborish uchun xabarlarni olish (SKIP LOCKED - bir nechta jarayon bir xil xabarni olmaydi)
+
+    Oddiy xabarlar (priority 0) ommaviy xabarlardan oldin olinadi.
+    """
+    rows = await query.fetch(CLAIM_NOTIFICATIONS, limit, lease)
+    return sorted((dict(row) for row in rows), key=lambda row: (row['priority'], row['id']))
+
+async def mark_notifications_sent(ids: List[int]) -> None:
+    if not ids: return
+    await query.execute(MARK_NOTIFICATIONS_SENT, ids)
+
+async def release_notifications(ids: List[int]) -> None:
+    """Olingan, lekin yuborilmagan xabarlarni darhol navbatga qaytarish (urinish hisoblanmaydi)"""
+    if not ids: return
+    await query.execute(RELEASE_NOTIFICATIONS, ids)
+
+async def retry_notification(notification_id: int, delay: float, error: str, count_attempt: bool = True) -> None:
+    """Xabarni `delay` soniyadan keyin qayta yuborish uchun qoldirish
+
+    count_attempt=False - urinish max_attempts ga hisoblanmaydi (bot bo'yicha flood limiti).
+    """
+    await query.execute(RETRY_NOTIFICATION if count_attempt else DEFER_NOTIFICATION, notification_id, delay, error)
+
+async def fail_notification(notification_id: int, error: str) -> None:
+    """Qayta urinib bo'lmaydigan xato (bloklangan bot, chat topilmadi, urinishlar tugadi)"""
+    await query.execute(FAIL_NOTIFICATION, notification_id, error)
+
+async def purge_notifications(days: int = 7) -> int:
+    """Eski yuborilgan/muvaffaqiyatsiz xabarlarni o'chirish. Qaytaradi: o'chirilganlar soni"""
+    status = await query.execute(PURGE_NOTIFICATIONS, days)
+    return int(status.split()[-1])
+
+# --- OMMAVIY XABARLAR (OYLIK KUNI) ---
+# get_worker_stats bilan bir xil maydonlar + id, telegram_id
+PAYDAY_STATS = Query("payday_stats", """
+    SELECT w.id, w.telegram_id, w.name,
+           w.rate::float8 AS rate,
+           COALESCE(p.hours, 0)::float8 AS hours,
+           COALESCE(p.advances, 0)::float8 AS advance
+    FROM workers w
+    LEFT JOIN payroll_monthly p ON p.worker_id = w.id AND p.month = $1
+    WHERE w.active = TRUE AND w.telegram_id IS NOT NULL
+    ORDER BY w.id
+""")
+INSERT_BROADCAST = Query("insert_broadcast", """
+    INSERT INTO broadcasts (kind, month, total) VALUES ($1, $2, $3)
+    ON CONFLICT (kind, month) WHERE status = 'running' DO NOTHING
+    RETURNING id
+""")
+RUNNING_BROADCAST = Query("running_broadcast",
+    "SELECT id, total FROM broadcasts WHERE kind = $1 AND month = $2 AND status = 'running'")
+ENQUEUE_BROADCAST = Query("enqueue_broadcast", """
+    INSERT INTO notification_outbox (chat_id, text, reply_markup, priority, broadcast_id)
+    SELECT chat_id, text, markup, $4, $5
+    FROM unnest($1::bigint[], $2::text[], $3::jsonb[]) AS t(chat_id, text, markup)
+    ON CONFLICT (broadcast_id, chat_id) WHERE broadcast_id IS NOT NULL DO NOTHING
+""")
+RUNNING_BROADCASTS = Query("running_broadcasts",
+    "SELECT id, kind, month, total FROM broadcasts WHERE status = 'running' ORDER BY id")
+BROADCAST_PROGRESS = Query("broadcast_progress", """
+    SELECT status, COUNT(*) AS count FROM notification_outbox
+    WHERE broadcast_id = $1 GROUP BY status
+""")
+BROADCAST_FAILURES = Query("broadcast_failures", """
+    SELECT w.name, o.last_error
+    FROM notification_outbox o
+    LEFT JOIN workers w ON w.telegram_id = o.chat_id
+    WHERE o.broadcast_id = $1 AND o.status = 'failed'
+    ORDER BY o.id
+    LIMIT $2
+""")
+FINISH_BROADCAST = Query("finish_broadcast", """
+    UPDATE broadcasts SET status = 'done', sent = $2, failed = $3, finished_at = now()
+    WHERE id = $1 AND status = 'running'
+""")
+
+async def get_payday_stats(year: int, month: int) -> List[Dict[str, Any]]:
+    """Telegramga ulangan barcha aktiv ishchilarning oylik ko'rsatkichlari (bitta so'rov)"""
+    month_start, _ = month_bounds(year, month)
+    return [dict(row) for row in await query.fetch(PAYDAY_STATS, month_start)]
+
+async def create_broadcast(kind: str, month: date, items: List[tuple], priority: int = 1) -> Dict[str, Any]:
+    """Ommaviy xabarni yaratish: broadcasts yozuvi va barcha xabarlar bitta tranzaksiyada
+
+    Shu oy uchun tugallanmagan xabar bo'lsa yangisi yaratilmaydi - o'sha qaytariladi
+    (resumed=True), chunki uning xabarlari navbatda allaqachon bor. Baza xatosida DatabaseError.
+    """
+    chat_ids, texts, markups = (list(column) for column in zip(*items)) if items else ([], [], [])
+    async with query.transaction("create_broadcast") as conn:
+        broadcast_id = await query.fetchval(INSERT_BROADCAST, kind, month, len(items), conn=conn)
+        if broadcast_id is None:
+            running = await query.fetchrow(RUNNING_BROADCAST, kind, month, conn=conn)
+            return {"id": running['id'], "total": running['total'], "resumed": True}
+
+        await query.execute(ENQUEUE_BROADCAST, chat_ids, texts, markups, priority, broadcast_id, conn=conn)
+    return {"id": broadcast_id, "total": len(items), "resumed": False}
+
+async def get_running_broadcasts() -> List[Dict[str, Any]]:
+    return [dict(row) for row in await query.fetch(RUNNING_BROADCASTS)]
+
+async def get_broadcast_progress(broadcast_id: int) -> Dict[str, int]:
+    """Xabarlar holati: {'pending': .., 'sent': .., 'failed': ..}"""
+    rows = await query.fetch(BROADCAST_PROGRESS, broadcast_id)
+    progress = {"pending": 0, "sent": 0, "failed": 0}
+    progress.update({row['status']: row['count'] for row in rows})
+    return progress
+
+async def get_broadcast_failures(broadcast_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+    """Yetkazilmagan xabarlar: ishchi ismi va xato sababi"""
+    return [dict(row) for row in await query.fetch(BROADCAST_FAILURES, broadcast_id, limit)]
+
+async def finish_broadcast(broadcast_id: int, sent: int, failed: int) -> bool:
+    """Qaytaradi: True - shu chaqiruv yakunladi (boshqa jarayon emas)"""
+    return await query.execute(FINISH_BROADCAST, broadcast_id, sent, failed) == "UPDATE 1"
 
 # --- LOGIN ---
+BIND_TELEGRAM_ID = Query("bind_telegram_id", "UPDATE workers SET telegram_id = $1 WHERE id = $2")
+
 async def verify_login(code: str, telegram_id: int) -> tuple:
     if not code.isdigit(): return False, "Faqat raqam kiriting"
     
-    rows = await execute_query("SELECT * FROM workers WHERE code = $1", int(code))
-    if not rows: return False, "❌ Noto'g'ri kod"
+    worker = await worker_cache.get_by_code(int(code)) or await _fetch_worker("code", int(code))
+    if not worker: return False, "❌ Noto'g'ri kod"
     
-    worker = dict(rows[0])
     if not worker['active']: return False, "❌ Profil aktiv emas"
     
     if worker['telegram_id'] and worker['telegram_id'] != telegram_id:
         return False, "❌ Bu kod band"
         
-    await execute_query("UPDATE workers SET telegram_id = $1 WHERE id = $2", telegram_id, worker['id'])
+    await query.execute(BIND_TELEGRAM_ID, telegram_id, worker['id'])
+    worker['telegram_id'] = telegram_id
+    worker_cache.put(worker)
+    await events.notify(events.WORKER_CHANGED, id=worker['id'])
     return True, worker['name']
 
+PAYROLL_MONTH_ROW = Query("payroll_month_row",
+    "SELECT hours::float8, advances::float8 FROM payroll_monthly WHERE worker_id = $1 AND month = $2")
+
 async def get_worker_stats(telegram_id: int) -> Optional[Dict[str, Any]]:
-    rows = await execute_query("SELECT * FROM workers WHERE telegram_id = $1 AND active = TRUE", telegram_id)
-    if not rows: return None
+    """Ishchining joriy oydagi hisobi. Profil topilmasa None, baza xatosida DatabaseError"""
+    worker = await worker_cache.get_by_telegram_id(telegram_id) or await _fetch_worker("telegram_id", telegram_id)
+    if not worker or not worker['active']: return None
     
-    worker = dict(rows[0])
     # TIZIM VAQTINI ISHLATISH (Toshkent)
-    month = get_tashkent_time().strftime("%Y-%m")
-    
-    h_data = await execute_query("SELECT SUM(hours) as t FROM attendance WHERE worker_id=$1 AND TO_CHAR(date, 'YYYY-MM')=$2", worker['id'], month)
-    a_data = await execute_query("SELECT SUM(amount) as t FROM advances WHERE worker_id=$1 AND TO_CHAR(date, 'YYYY-MM')=$2 AND approved=TRUE", worker['id'], month)
+    now = get_tashkent_time()
+    month_start, _ = month_bounds(now.year, now.month)
     
-    total_hours = float(h_data[0]['t']) if h_data and h_data[0]['t'] else 0.0
-    total_adv = float(a_data[0]['t']) if a_data and a_data[0]['t'] else 0.0
+    row = await query.fetchrow(PAYROLL_MONTH_ROW, worker['id'], month_start)
     
     return {
         "name": worker['name'],
         "rate": float(worker['rate']),
-        "hours": total_hours,
-        "advance": total_adv
+        "hours": row['hours'] if row else 0.0,
+        "advance": row['advances'] if row else 0.0
     }
 
 
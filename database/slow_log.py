@@ -0,0 +1,162 @@
+import asyncio
+import os
+import re
+import random
+import time
+import logging
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional, Set
+import asyncpg
+from utils import metrics
+
+# Sekin so'rov chegarasi (ms). 0 - o'chirilgan
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Sekin so'rovlarning qanchasiga EXPLAIN (ANALYZE, BUFFERS) olinadi (0..1)
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.2"))
+# Bitta so'rov uchun EXPLAIN lar orasidagi minimal vaqt (soniya)
+SLOW_QUERY_EXPLAIN_COOLDOWN = float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN", "600"))
+# Rejalar fayli (aylanuvchi)
+SLOW_QUERY_PLAN_FILE = os.getenv("SLOW_QUERY_PLAN_FILE", "slow_queries.log")
+SLOW_QUERY_PLAN_MAX_BYTES = int(os.getenv("SLOW_QUERY_PLAN_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_PLAN_BACKUPS = int(os.getenv("SLOW_QUERY_PLAN_BACKUPS", "3"))
+
+# Faqat shu so'rovlar uchun reja olinadi (DDL, COPY, tranzaksiya buyruqlari emas)
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "VALUES")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """Bitta qatorga yig'ilgan, literal qiymatlari ? bilan almashtirilgan SQL ($1, $2 saqlanadi)"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+def arg_shape(value: Any) -> str:
+    """Argument qiymati emas, ko'rinishi: int, str(12), list[int](300). Shaxsiy ma'lumot logga tushmaydi"""
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        inner = type(value[0]).__name__ if value else "?"
+        return f"list[{inner}]({len(value)})"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+class SlowQueryLog:
+    """Chegaradan sekin so'rovlarni logga yozish va tanlab EXPLAIN (ANALYZE, BUFFERS) olish
+
+    - models._log_query har bir so'rov tugaganda observe() ni chaqiradi (chegaradan tez bo'lsa - bitta taqqoslash)
+    - reja pool dan tashqaridagi alohida ulanishda olinadi (bir vaqtda bittadan, band bo'lsa tashlab ketiladi)
+    - so'rov READ ONLY tranzaksiyada ishlatilib ROLLBACK qilinadi: INSERT/UPDATE lar uchun faqat
+      taxminiy reja (ANALYZE siz) olinadi, ma'lumot o'zgarmaydi
+    - rejalar aylanuvchi faylga thread da yoziladi (event loop diskni kutmaydi)
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, sample: float = SLOW_QUERY_EXPLAIN_SAMPLE,
+                 cooldown: float = SLOW_QUERY_EXPLAIN_COOLDOWN, plan_file: str = SLOW_QUERY_PLAN_FILE):
+        self.threshold = threshold_ms / 1000
+        self.sample = sample
+        self.cooldown = cooldown
+        self.plan_file = plan_file
+        self.slow = 0
+        self.explained = 0
+        self._explained_at: Dict[str, float] = {}
+        self._conn: Optional[asyncpg.Connection] = None
+        self._busy = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._plan_logger: Optional[logging.Logger] = None
+
+    def observe(self, name: str, sql: str, args: tuple, elapsed: float):
+        if not self.threshold or elapsed < self.threshold:
+            return
+        self.slow += 1
+        metrics.SLOW_QUERIES.inc(name)
+        normalized = normalize_sql(sql)
+        shapes = ", ".join(arg_shape(arg) for arg in args) if args else "-"
+        logging.warning(f"🐢 Sekin so'rov ({name}) {elapsed * 1000:.0f} ms: {normalized[:500]} | args: {shapes}")
+
+        if self._should_explain(normalized):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(name, sql, normalized, args, elapsed, shapes)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, normalized: str) -> bool:
+        if self._busy or self.sample <= 0 or random.random() >= self.sample:
+            return False
+        if not normalized.upper().startswith(EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        if now - self._explained_at.get(normalized, -self.cooldown) < self.cooldown:
+            return False
+        self._explained_at[normalized] = now
+        self._busy = True
+        return True
+
+    async def _connection(self) -> Optional[asyncpg.Connection]:
+        if self._conn is None or self._conn.is_closed():
+            db_url = os.getenv("DATABASE_URL")
+            if not db_url:
+                return None
+            # Rejani olish ham cheksiz davom etmasin
+            self._conn = await asyncpg.connect(db_url, server_settings={"statement_timeout": "30000"})
+        return self._conn
+
+    async def _explain(self, name: str, sql: str, normalized: str, args: tuple, elapsed: float, shapes: str):
+        try:
+            conn = await self._connection()
+            if conn is None:
+                return
+            plan = await self._fetch_plan(conn, sql, args, analyze=True)
+            analyzed = plan is not None
+            if plan is None:
+                plan = await self._fetch_plan(conn, sql, args, analyze=False)
+            self.explained += 1
+            mode = "ANALYZE" if analyzed else "faqat reja (so'rov ma'lumotni o'zgartiradi)"
+            text = (
+                f"=== {name} | {elapsed * 1000:.1f} ms | {datetime.now():%Y-%m-%d %H:%M:%S} | {mode}\n"
+                f"SQL: {normalized}\nargs: {shapes}\n{plan}\n"
+            )
+            await asyncio.to_thread(self._write_plan, text)
+        except Exception as e:
+            logging.error(f"❌ Sekin so'rov rejasini olishda xato ({name}): {e}")
+        finally:
+            self._busy = False
+
+    async def _fetch_plan(self, conn: asyncpg.Connection, sql: str, args: tuple, analyze: bool) -> Optional[str]:
+        explain = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+        tx = conn.transaction(readonly=True)
+        await tx.start()
+        try:
+            rows = await conn.fetch(f"{explain} {sql}", *args)
+        except asyncpg.ReadOnlySQLTransactionError:
+            return None
+        finally:
+            await tx.rollback()
+        return "\n".join(row[0] for row in rows)
+
+    def _write_plan(self, text: str):
+        if self._plan_logger is None:
+            plan_logger = logging.getLogger("slow_query_plans")
+            plan_logger.propagate = False
+            plan_logger.setLevel(logging.INFO)
+            plan_logger.addHandler(RotatingFileHandler(
+                self.plan_file, maxBytes=SLOW_QUERY_PLAN_MAX_BYTES,
+                backupCount=SLOW_QUERY_PLAN_BACKUPS, encoding="utf-8"
+            ))
+            self._plan_logger = plan_logger
+        self._plan_logger.info(text)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+slow_queries = SlowQueryLog()
@@ -1,15 +1,27 @@
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import (Message, CallbackQuery, BufferedInputFile, FSInputFile,
+                           InlineQuery, InlineQueryResultArticle, InputTextMessageContent)
 from aiogram.fsm.context import FSMContext
-from aiogram.filters import StateFilter
+from aiogram.filters import StateFilter, Command
+from aiogram.exceptions import TelegramBadRequest
 from utils.states import AddWorker, EditWorker, DeleteWorker, DailyReport, AdminAdvance
-from utils.keyboards import admin_main_kb, cancel_kb, settings_kb, edit_options_kb, approval_kb, remove_kb, report_kb
+from utils.keyboards import (admin_main_kb, cancel_kb, settings_kb, edit_options_kb, approval_kb, remove_kb, report_kb,
+                             report_period_kb, workers_page_kb, worker_detail_kb, bulk_report_kb, attendance_grid_kb)
 from database import requests as db
-from utils.excel_gen import generate_report
+from utils.excel_gen import (generate_report_bytes, report_filename, year_report_filename,
+                             split_year_data, build_month_rows, generate_year_report_bytes)
+from utils.report_service import report_service, ReportAlreadyRunning, ReportQueueFull, ProgressMessage
+from utils.report_cache import report_cache, CachedReport, YEAR_REPORT
+from utils.csv_export import EXPORT_KINDS, EXPORT_FORMATS, export_filename, export_to_file, parse_period
+from utils.notifier import notifier
+from utils.payday import payday
+from utils.attendance_import import BulkInput, parse_lines, parse_timesheet, validate, format_errors, timesheet_template
+import asyncio
 import os
 import random
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+from io import BytesIO
 from typing import Dict, Any, List
 
 router = Router()
@@ -22,9 +34,6 @@ try:
 except (ValueError, TypeError):
     logging.critical("❌ ADMIN_ID .env faylida noto'g'ri ko'rsatilgan! Format: ID1,ID2,ID3")
 
-# FSM ma'lumotlari
-fsm_data: Dict[int, Dict[str, Any]] = {}
-
 # Oylar tarjimasi
 MONTHS = {
     1: "Yanvar", 2: "Fevral", 3: "Mart", 4: "Aprel",
@@ -72,58 +81,91 @@ async def settings_menu(message: Message, state: FSMContext):
     )
     await message.answer(menu_text, reply_markup=settings_kb)
 
+# --- ISHCHILAR RO'YXATI (keyset sahifalash, bitta xabar tahrirlanadi) ---
+WORKERS_PAGE_SIZE = 10
+
+WORKERS_LIST_TEXT = (
+    f"📋 {format_bold('ISHCHILAR ROYXATI')}\n"
+    f"────────────────\n\n"
+    f"👇 <i>Batafsil ko'rish uchun ishchini tanlang</i>\n"
+    f"🟢 - Botga ulangan\n⚪️ - Hali kirmagan"
+)
+
+async def _workers_page(cursor_id: int = None, direction: str = "next"):
+    """Sahifa matni va klaviaturasi. Ro'yxat bo'sh bo'lsa None"""
+    workers, has_prev, has_next = await db.get_workers_page(cursor_id, direction, WORKERS_PAGE_SIZE)
+    if not workers and cursor_id is not None:
+        # Kursor chetga yetgan yoki ishchi arxivlangan - boshidan ko'rsatamiz
+        workers, has_prev, has_next = await db.get_workers_page(None, "next", WORKERS_PAGE_SIZE)
+    if not workers:
+        return None
+    return WORKERS_LIST_TEXT, workers_page_kb(workers, has_prev, has_next)
+
 @router.message(F.text == "👥 Ishchilar")
 async def show_workers_list(message: Message, state: FSMContext):
     if not await is_admin(message.from_user.id, message): return
     await state.clear()
     
-    try:
-        workers = await db.get_active_workers()
-        
-        header = (
-            f"📋 {format_bold('ISHCHILAR ROYXATI')}\n"
-            f"────────────────\n\n"
+    page = await _workers_page()
+    if page is None:
+        await message.answer(
+            f"📋 {format_bold('ISHCHILAR ROYXATI')}\n────────────────\n\n<i>🤷 Hozircha ishchilar ro'yxati bo'sh</i>",
+            reply_markup=admin_main_kb()
         )
-        
-        if not workers:
-            await message.answer(header + "<i>🤷 Hozircha ishchilar ro'yxati bo'sh</i>", reply_markup=admin_main_kb())
-            return
+        return
+    
+    text, markup = page
+    await message.answer(text, reply_markup=markup)
 
-        # --- Xabarni bo'laklash (Chunking) ---
-        current_text = header
-        
-        for worker in workers:
-            # Login qilganmi yoki yo'q (telegram_id borligiga qarab)
-            status_icon = "🟢" if worker.get('telegram_id') else "⚪️"
-            
-            worker_info = (
-                f"{status_icon} 🆔 <b>ID:</b> <code>{worker['id']}</code>\n"
-                f"👤 <b>Ism:</b> {worker['name']}\n"
-                f"💰 <b>Stavka:</b> {worker['rate']:,.0f} so'm/soat\n"
-                f"🔑 <b>KOD:</b> <code>{worker['code']}</code>\n"
-                f"➖➖➖➖➖➖➖➖➖➖➖\n"
-            )
-            
-            # Agar xabar uzunligi 4000 belgidan oshsa, jo'natamiz va yangisini boshlaymiz
-            if len(current_text) + len(worker_info) > 4000:
-                await message.answer(current_text)
-                current_text = "" # Bo'shatish
-            
-            current_text += worker_info
-        
-        # Oxirgi qismni va footer ni qo'shib jo'natamiz
-        footer = "\n👇 <i>O'zgartirish kiritish uchun 'Sozlamalar' menyusidan foydalaning</i>\n🟢 - Botga ulangan\n⚪️ - Hali kirmagan"
-        
-        if len(current_text) + len(footer) > 4000:
-             await message.answer(current_text)
-             await message.answer(footer, reply_markup=admin_main_kb())
-        else:
-             current_text += footer
-             await message.answer(current_text, reply_markup=admin_main_kb())
+@router.callback_query(F.data.startswith(("wl_next_", "wl_prev_", "wl_at_")))
+async def page_workers_list(call: CallbackQuery):
+    if not await is_admin(call.from_user.id): return
+    # data formati: wl_{yo'nalish}_{kursor ishchi id}
+    _, direction, cursor_id = call.data.split("_")
+    
+    page = await _workers_page(int(cursor_id), direction)
+    if page is None:
+        await call.answer("🤷 Ishchilar ro'yxati bo'sh", show_alert=True)
+        return
+    
+    text, markup = page
+    try:
+        await call.message.edit_text(text, reply_markup=markup)
+    except TelegramBadRequest:
+        # Xabar o'zgarmagan (masalan, ikki marta bosilgan)
+        pass
+    await call.answer()
 
-    except Exception as e:
-        logging.error(f"Ishchilar ro'yxatida xato: {e}")
-        await message.answer("❌ <b>Ma'lumotlar bazasidan o'qishda xatolik bo'ldi.</b>")
+@router.callback_query(F.data.startswith("wl_show_"))
+async def show_worker_detail(call: CallbackQuery):
+    if not await is_admin(call.from_user.id): return
+    worker = await db.get_worker_by_id(int(call.data.split("_")[2]))
+    if not worker:
+        await call.answer("❌ Ishchi topilmadi", show_alert=True)
+        return
+    
+    now = get_current_time()
+    month = await db.get_worker_month(worker['id'], now.year, now.month)
+    salary = month['hours'] * float(worker['rate'])
+    status = "🟢 Botga ulangan" if worker.get('telegram_id') else "⚪️ Hali kirmagan"
+    if not worker['active']:
+        status = "🗄 Arxivlangan"
+    
+    text = (
+        f"👤 {format_bold(worker['name'])}\n"
+        f"────────────────\n\n"
+        f"🆔 <b>ID:</b> <code>{worker['id']}</code>\n"
+        f"🔑 <b>KOD:</b> <code>{worker['code']}</code>\n"
+        f"💰 <b>Stavka:</b> {worker['rate']:,.0f} so'm/soat\n"
+        f"📶 {status}\n\n"
+        f"🗓 <b>{MONTHS.get(now.month, str(now.month))} {now.year}:</b>\n"
+        f"📅 Kelgan kunlar: {month['days']}\n"
+        f"⏱ Ishlangan: {month['hours']} soat\n"
+        f"💸 Avanslar: {month['advance']:,.0f} so'm\n"
+        f"💰 <b>Qolga tegadi: {salary - month['advance']:,.0f} so'm</b>"
+    )
+    await call.message.edit_text(text, reply_markup=worker_detail_kb(worker['id']))
+    await call.answer()
 
 @router.message(F.text == "📊 Joriy holat")
 async def show_current_status(message: Message, state: FSMContext):
@@ -132,21 +174,8 @@ async def show_current_status(message: Message, state: FSMContext):
     
     try:
         now = get_current_time() # Vaqt to'g'irlandi
-        workers = await db.get_active_workers()
-        attendance, advances = await db.get_month_data(now.year, now.month)
-        
-        # Ma'lumotlarni tayyorlash
-        attendance_dict = {}
-        for record in attendance:
-            worker_id = record['worker_id']
-            hours = record['hours']
-            attendance_dict[worker_id] = attendance_dict.get(worker_id, 0) + hours
-        
-        advances_dict = {}
-        for record in advances:
-            worker_id = record['worker_id']
-            total = record['total']
-            advances_dict[worker_id] = total
+        # Hisob-kitob bazada: har bir ishchi uchun bitta qator
+        workers = await db.get_month_payroll(now.year, now.month)
         
         # Oyni o'zbekcha chiqarish
         month_name = MONTHS.get(now.month, str(now.month))
@@ -166,18 +195,13 @@ async def show_current_status(message: Message, state: FSMContext):
         total_salary = 0
         
         for worker in workers:
-            total_hours = attendance_dict.get(worker['id'], 0)
-            advance = advances_dict.get(worker['id'], 0)
-            salary = total_hours * float(worker['rate'])
-            net_salary = salary - float(advance)
-            
-            total_salary += net_salary
+            total_salary += worker['net']
             
             worker_info = (
                 f"👤 {worker['name']}\n"
-                f"⏱ {total_hours} soat | "
-                f"💸 {advance:,.0f} so'm avans\n"
-                f"💰 <b>{net_salary:,.0f} so'm</b>\n\n"
+                f"⏱ {worker['hours']} soat | "
+                f"💸 {worker['advance']:,.0f} so'm avans\n"
+                f"💰 <b>{worker['net']:,.0f} so'm</b>\n\n"
             )
             
             if len(current_text) + len(worker_info) > 4000:
@@ -210,20 +234,77 @@ async def generate_excel_report(message: Message, state: FSMContext):
     if not await is_admin(message.from_user.id, message): return
     await state.clear()
     
-    processing_msg = await message.answer("🔄 <i>Hisobot tayyorlanmoqda...</i>")
-    
+    now = get_current_time() # Vaqt to'g'irlandi
+    await message.answer(
+        f"📥 {format_bold('EXCEL HISOBOT')}\n"
+        f"────────────────\n\n"
+        f"🗓 <b>Hisobot davrini tanlang:</b>\n"
+        f"<i>Oy yoki butun yil (har oy alohida varaqda + yig'ma varaq)</i>",
+        reply_markup=_period_kb(now.year)
+    )
+
+def _period_kb(year: int):
+    now = get_current_time()
+    year = min(year, now.year)
+    last_month = now.month if year == now.year else 12
+    return report_period_kb(year, last_month, MONTHS, has_next=year < now.year)
+
+@router.callback_query(F.data.startswith("report_pick_"))
+async def pick_report_year(call: CallbackQuery):
+    if not await is_admin(call.from_user.id): return
+    year = int(call.data.split("_")[2])
+    await call.message.edit_reply_markup(reply_markup=_period_kb(year))
+    await call.answer()
+
+@router.callback_query(F.data.startswith("report_month_"))
+async def report_month_selected(call: CallbackQuery):
+    if not await is_admin(call.from_user.id): return
+    # data formati: report_month_{yil}_{oy}
+    parts = call.data.split("_")
+    year, month = int(parts[2]), int(parts[3])
+    await call.answer()
+    await call.message.delete()
+    await _run_report_job(call, (call.from_user.id, year, month), lambda: _send_excel_report(call.message, year, month))
+
+@router.callback_query(F.data.startswith("report_year_"))
+async def report_year_selected(call: CallbackQuery):
+    if not await is_admin(call.from_user.id): return
+    year = int(call.data.split("_")[2])
+    await call.answer()
+    await call.message.delete()
+    await _run_report_job(call, (call.from_user.id, year, YEAR_REPORT), lambda: _send_year_report(call.message, year))
+
+async def _run_report_job(call: CallbackQuery, key: tuple, send_report):
     try:
-        now = get_current_time() # Vaqt to'g'irlandi
-        
+        # Bir admin bir davr uchun faqat bitta hisobot kutadi
+        with report_service.job(key):
+            await send_report()
+    except ReportAlreadyRunning:
+        await call.message.answer("⏳ <b>Bu hisobot allaqachon tayyorlanmoqda.</b>\nBiroz kuting.")
+    except ReportQueueFull:
+        await call.message.answer("⏳ <b>Hisobotlar navbati to'la.</b>\nBir necha daqiqadan keyin qayta urinib ko'ring.", reply_markup=admin_main_kb())
+
+def _report_caption(title: str, workers_count: int) -> str:
+    now = get_current_time()
+    return (
+        f"📊 {format_bold(title)}\n"
+        f"────────────────\n\n"
+        f"👥 Ishchilar: {workers_count} ta\n"
+        f"📅 Sana: {now.strftime('%d.%m.%Y %H:%M')}"
+    )
+
+async def _send_excel_report(message: Message, year: int, month: int):
+    month_name = MONTHS.get(month, str(month))
+    version = await db.get_month_version(year, month)
+    
+    async def build(progress: ProgressMessage):
         # Bazadan ma'lumot olish
-        workers = await db.get_workers_for_report(now.year, now.month)
-        attendance = await db.get_month_attendance(now.year, now.month)
-        advances = await db.get_month_advances(now.year, now.month)
-        
+        await progress.stage("📥 Ma'lumotlar olinmoqda...")
+        workers = await db.get_workers_for_report(year, month)
+        attendance = await db.get_month_attendance(year, month)
+        advances = await db.get_month_advances(year, month)
         if not workers:
-            await processing_msg.delete()
-            await message.answer("⚠️ <b>Hisobot uchun ma'lumot topilmadi.</b>\nBazada ishchilar borligiga ishonch hosil qiling.", reply_markup=admin_main_kb())
-            return
+            return None
         
         # Ma'lumotlarni tayyorlash
         attendance_dict = {}
@@ -235,31 +316,96 @@ async def generate_excel_report(message: Message, state: FSMContext):
         for record in advances:
             advances_dict[record['worker_id']] = float(record['total'])
         
-        # Excel yaratish
-        filename = generate_report(now.year, now.month, workers, attendance_dict, advances_dict)
+        # Excel yaratish (pool da, event loop ni bloklamasdan)
+        await progress.stage(f"📊 Excel yaratilmoqda: 0/{len(workers)}")
+        report = await report_service.run(
+            generate_report_bytes, year, month, workers, attendance_dict, advances_dict,
+            progress=progress.rows
+        )
+        return report, len(workers)
+    
+    await _send_report(message, (year, month, version) if version else None,
+                       report_filename(year, month), f"{month_name} {year} OYI HISOBOTI", build)
+
+async def _send_year_report(message: Message, year: int):
+    now = get_current_time()
+    months = list(range(1, (now.month if year == now.year else 12) + 1))
+    version = await db.get_year_version(year)
+    
+    async def build(progress: ProgressMessage):
+        # Butun yil uchun uchta so'rov: ishchilar, davomat (ishchi-oy massivlari), avanslar
+        await progress.stage("📥 Ma'lumotlar olinmoqda...")
+        workers = await db.get_workers_for_period(date(year, 1, 1), date(year, 12, 31))
+        attendance = await db.get_year_attendance(year)
+        advances = await db.get_year_advances(year)
         
-        await processing_msg.delete()
+        month_data = split_year_data(year, months, workers, attendance, advances)
+        if not month_data:
+            return None
         
-        # Faylni yuborish (O'zbekcha oy)
-        month_name = MONTHS.get(now.month, str(now.month))
-        caption = (
-            f"📊 {format_bold(f'{month_name} {now.year} OYI HISOBOTI')}\n"
-            f"────────────────\n\n"
-            f"👥 Ishchilar: {len(workers)} ta\n"
-            f"📅 Sana: {now.strftime('%d.%m.%Y %H:%M')}"
-        )
+        # Oylar qatorlari parallel (process pool), keyin tartib bilan bitta kitobga yoziladi.
+        # Bitta yadroda pool faqat pickle xarajatini qo'shadi - qatorlar yozish bilan birga hisoblanadi
+        month_rows = None
+        if report_service.sheet_workers > 1:
+            await progress.stage(f"🧮 Oylar hisoblandi: 0/{len(month_data)}")
+            month_rows = await report_service.run_parallel(
+                build_month_rows, {month: (year, month, *data) for month, data in month_data.items()},
+                progress=progress.months
+            )
+        await progress.stage(f"📊 Oy varaqlari: 0/{len(month_data)}")
+        report = await report_service.run(generate_year_report_bytes, year, month_data, month_rows,
+                                          progress=progress.sheets)
+        return report, len({w['id'] for data in month_data.values() for w in data[0]})
+    
+    await _send_report(message, (year, YEAR_REPORT, version) if version else None,
+                       year_report_filename(year), f"{year} YILLIK HISOBOT", build)
+
+async def _send_report(message: Message, cache_key, filename: str, title: str, build):
+    """Keshdan yoki build(progress) orqali hisobotni yuborish
+
+    Ma'lumot o'zgarmagan bo'lsa, avval yuborilgan fayl file_id orqali qayta yuboriladi.
+    build -> (baytlar, ishchilar soni) yoki ma'lumot bo'lmasa None.
+    """
+    cached = report_cache.get(cache_key) if cache_key else None
+    
+    if cached and cached.file_id:
+        await message.answer_document(cached.file_id, caption=_report_caption(title, cached.workers_count))
+        return
+    
+    processing_msg = await message.answer("🔄 <i>Hisobot tayyorlanmoqda...</i>")
+    progress = ProgressMessage(processing_msg, "🔄 <b>Hisobot tayyorlanmoqda...</b>")
+    
+    try:
+        if cached:
+            # Fayl tayyor, lekin hali Telegramga yuklanmagan
+            report, workers_count = cached.data, cached.workers_count
+        else:
+            result = await build(progress)
+            if result is None:
+                progress.close()
+                await processing_msg.delete()
+                await message.answer("⚠️ <b>Hisobot uchun ma'lumot topilmadi.</b>\nBazada ishchilar borligiga ishonch hosil qiling.", reply_markup=admin_main_kb())
+                return
+            
+            report, workers_count = result
+            if cache_key:
+                report_cache.put(cache_key, CachedReport(data=report, workers_count=workers_count))
         
-        await message.answer_document(
-            FSInputFile(filename),
-            caption=caption
+        await progress.stage("📤 Yuborilmoqda...")
+        
+        # Faylni yuborish (O'zbekcha oy)
+        sent = await message.answer_document(
+            BufferedInputFile(report, filename=filename),
+            caption=_report_caption(title, workers_count)
         )
+        if cache_key and sent.document:
+            report_cache.set_file_id(cache_key, sent.document.file_id)
         
-        try:
-            os.remove(filename)
-        except:
-            pass
+        progress.close()
+        await processing_msg.delete()
         
     except Exception as e:
+        progress.close()
         await processing_msg.delete()
         logging.error(f"Excel hisobot xatosi: {e}")
         await message.answer(f"❌ <b>Hisobot yaratishda xatolik:</b>\n\n{str(e)}", reply_markup=admin_main_kb())
@@ -312,7 +458,7 @@ async def process_worker_rate(message: Message, state: FSMContext):
                 reply_markup=admin_main_kb()
             )
         else:
-            await message.answer("❌ Xatolik! Kod takrorlandi yoki baza xatosi.", reply_markup=admin_main_kb())
+            await message.answer("❌ Kod takrorlandi, qaytadan qo'shib ko'ring.", reply_markup=admin_main_kb())
             
     except ValueError:
         await message.answer("⚠️ Iltimos, faqat raqam kiriting!")
@@ -321,6 +467,43 @@ async def process_worker_rate(message: Message, state: FSMContext):
     
     await state.clear()
 
+# --- INLINE QIDIRUV (@bot ism - istalgan chatda) ---
+def _worker_card(worker: Dict[str, Any]) -> str:
+    status = "🟢 Botga ulangan" if worker.get('telegram_id') else "⚪️ Hali kirmagan"
+    return (
+        f"🆔 <code>{worker['id']}</code> · <b>{worker['name']}</b>\n"
+        f"💰 Stavka: {worker['rate']:,.0f} so'm/soat\n"
+        f"🔑 KOD: <code>{worker['code']}</code>\n"
+        f"📶 {status}"
+    )
+
+@router.inline_query()
+async def inline_worker_search(query: InlineQuery):
+    if not await is_admin(query.from_user.id):
+        await query.answer([], cache_time=60, is_personal=True)
+        return
+    
+    text = query.query.strip()
+    if text.isdigit():
+        worker = await db.get_worker_by_id(int(text))
+        workers = [worker] if worker and worker['active'] else []
+    elif text:
+        workers = await db.search_worker_by_name(text, limit=20)
+    else:
+        workers, _, _ = await db.get_workers_page(limit=20)
+    
+    results = [
+        InlineQueryResultArticle(
+            id=str(worker['id']),
+            title=worker['name'],
+            description=f"ID {worker['id']} · {worker['rate']:,.0f} so'm/soat"
+                        + (" · 🟢" if worker.get('telegram_id') else ""),
+            input_message_content=InputTextMessageContent(message_text=_worker_card(worker))
+        )
+        for worker in workers
+    ]
+    await query.answer(results, cache_time=5, is_personal=True)
+
 # --- AVANS YOZISH (Admin tomonidan) ---
 @router.message(F.text == "💰 Avans yozish")
 async def start_admin_advance(message: Message, state: FSMContext):
@@ -339,15 +522,20 @@ async def process_worker_selection(message: Message, state: FSMContext):
     search = message.text.strip()
     worker = None
     
+    # Inline qidiruvdan (@bot ism) tanlangan ishchi kartasi: birinchi qatorda ID
+    if message.via_bot and search.startswith("🆔"):
+        search = search.split()[1]
+    
     if search.isdigit():
         worker = await db.get_worker_by_id(int(search))
         if worker and not worker['active']: worker = None
     else:
         workers = await db.search_worker_by_name(search)
-        if len(workers) == 1:
-            worker = workers[0]
+        exact = [w for w in workers if w['name'].casefold() == search.casefold()]
+        if len(workers) == 1 or len(exact) == 1:
+            worker = exact[0] if exact else workers[0]
         elif len(workers) > 1:
-            text = "🔍 <b>Bir nechta ishchi topildi, ID sini kiriting:</b>\n\n"
+            text = "🔍 <b>Bir nechta ishchi topildi (eng mosi birinchi), ID sini kiriting:</b>\n\n"
             for w in workers:
                 text += f"🆔 <code>{w['id']}</code> - {w['name']}\n"
             await message.answer(text)
@@ -371,21 +559,21 @@ async def process_advance_amount(message: Message, state: FSMContext):
         amount = float(message.text.strip())
         data = await state.get_data()
         
-        success = await db.add_advance(data['worker_id'], amount)
-        if success:
-            await message.answer(f"✅ <b>{data['worker_name']}</b> ga {amount:,.0f} so'm avans yozildi.", reply_markup=admin_main_kb())
-            
-            # Ishchiga xabar
-            worker = await db.get_worker_by_id(data['worker_id'])
-            if worker and worker['telegram_id']:
-                try:
-                    await message.bot.send_message(worker['telegram_id'], f"💰 Sizga {amount:,.0f} so'm avans yozildi.")
-                except: pass
-        else:
-            await message.answer("❌ Bazaga yozishda xatolik!", reply_markup=admin_main_kb())
-            
+        await db.add_advance(data['worker_id'], amount)
     except ValueError:
         await message.answer("⚠️ Faqat raqam kiriting!")
+    except db.DatabaseError:
+        await message.answer("❌ Bazaga yozishda xatolik!", reply_markup=admin_main_kb())
+    else:
+        await message.answer(f"✅ <b>{data['worker_name']}</b> ga {amount:,.0f} so'm avans yozildi.", reply_markup=admin_main_kb())
+        
+        # Ishchiga xabar: avans allaqachon saqlangan, xabar navbatga tushmasa ham yozuv qoladi
+        try:
+            worker = await db.get_worker_by_id(data['worker_id'])
+            if worker and worker['telegram_id']:
+                await notifier.enqueue(worker['telegram_id'], f"💰 Sizga {amount:,.0f} so'm avans yozildi.")
+        except db.DatabaseError:
+            await message.answer("⚠️ Avans saqlandi, lekin ishchiga xabar yuborilmadi.")
     
     await state.clear()
 
@@ -400,27 +588,37 @@ async def start_daily_report(message: Message, state: FSMContext):
         await message.answer("⚠️ Ishchilar yo'q", reply_markup=admin_main_kb())
         return
     
-    fsm_data[message.from_user.id] = {'queue': workers, 'index': 0}
+    # Navbat FSM storage da: faqat ishchi id lari (ism va boshqalar keshdan olinadi)
     await state.set_state(DailyReport.enter_hours)
+    await state.set_data({'queue': [w['id'] for w in workers], 'index': 0})
     await show_report_step(message, state)
 
 async def show_report_step(message: Message, state: FSMContext):
-    user_data = fsm_data.get(message.from_user.id)
-    if not user_data: return
+    data = await state.get_data()
+    queue = data.get('queue')
+    if not queue: return
     
-    idx = user_data['index']
-    workers = user_data['queue']
+    idx = data.get('index', 0)
     
-    if idx >= len(workers):
+    # Navbat tuzilgandan keyin o'chirilgan ishchilarni tashlab ketamiz
+    worker = None
+    while idx < len(queue):
+        worker = await db.get_worker_by_id(queue[idx])
+        if worker and worker['active']:
+            break
+        idx += 1
+    
+    if idx >= len(queue):
         await message.answer("✅ <b>Barcha ishchilar kiritildi!</b>", reply_markup=admin_main_kb())
         await state.clear()
-        del fsm_data[message.from_user.id]
         return
     
-    worker = workers[idx]
+    if idx != data.get('index', 0):
+        await state.update_data(index=idx)
+    
     # report_kb ishlatilmoqda (O'tkazib yuborish tugmasi bor)
     await message.answer(
-        f"👤 <b>{worker['name']}</b> ({idx+1}/{len(workers)})\n\n"
+        f"👤 <b>{worker['name']}</b> ({idx+1}/{len(queue)})\n\n"
         f"Bugun necha soat ishladi? (0 = kelmadi)",
         reply_markup=report_kb
     )
@@ -428,36 +626,208 @@ async def show_report_step(message: Message, state: FSMContext):
 # YANGI: O'tkazib yuborish handler
 @router.message(DailyReport.enter_hours, F.text == "➡️ O'tkazib yuborish")
 async def skip_report_item(message: Message, state: FSMContext):
-    user_data = fsm_data.get(message.from_user.id)
-    if not user_data: return
+    data = await state.get_data()
+    if not data.get('queue'): return
     
     # Shunchaki indeksni oshiramiz, bazaga hech narsa yozmaymiz
-    user_data['index'] += 1
+    await state.update_data(index=data.get('index', 0) + 1)
     await message.answer("⏩ O'tkazib yuborildi.")
     await show_report_step(message, state)
 
+@router.message(DailyReport.enter_hours, F.text == "📋 Ommaviy kiritish")
+async def start_bulk_report(message: Message, state: FSMContext):
+    await state.set_state(DailyReport.bulk)
+    await state.set_data({'grid_default': 8, 'grid_hours': {}})
+    await message.answer("📋 <b>Ommaviy kiritish</b>", reply_markup=cancel_kb)
+    await message.answer(
+        "Bugungi davomatni bitta xabarda yuboring:\n\n"
+        "<code>12 8\n15 0\n21 6.5</code>\n"
+        "(ishchi ID va soat, har biri alohida qatorda)\n\n"
+        "<code>hamma 8</code> qatori ro'yxatda yo'q barcha aktiv ishchilarga 8 soat yozadi.\n\n"
+        "Yoki to'ldirilgan tabelni (xlsx/csv) yuboring, yoki jadvalda belgilang 👇\n"
+        "<i>Xato bo'lsa hech narsa yozilmaydi.</i>",
+        reply_markup=bulk_report_kb
+    )
+
 @router.message(DailyReport.enter_hours)
 async def process_report_hours(message: Message, state: FSMContext):
     if message.text == "❌ Bekor qilish":
         await state.clear()
-        if message.from_user.id in fsm_data: del fsm_data[message.from_user.id]
         await message.answer("⏹️ To'xtatildi", reply_markup=admin_main_kb())
         return
 
     try:
         hours = float(message.text.strip())
-        user_data = fsm_data.get(message.from_user.id)
-        worker = user_data['queue'][user_data['index']]
+        data = await state.get_data()
+        queue, idx = data.get('queue'), data.get('index', 0)
+        if not queue or idx >= len(queue):
+            await state.clear()
+            await message.answer("⚠️ Hisobot navbati topilmadi, qaytadan boshlang.", reply_markup=admin_main_kb())
+            return
         
         status = "Keldi" if hours > 0 else "Kelmadi"
-        await db.add_attendance(worker['id'], hours, status)
+        await db.add_attendance(queue[idx], hours, status)
         
-        user_data['index'] += 1
+        await state.update_data(index=idx + 1)
         await show_report_step(message, state)
         
     except ValueError:
         await message.answer("⚠️ Faqat raqam kiriting!")
 
+# --- OMMAVIY DAVOMAT ---
+# Tabel fayli uchun chegara (300 ishchi ~ 10 KB)
+BULK_FILE_LIMIT = 2 * 1024 * 1024
+
+async def _save_bulk(message: Message, state: FSMContext, bulk: BulkInput):
+    """Tekshirish (bitta so'rov) va bitta tranzaksiyada yozish. Xato bo'lsa holat saqlanadi - qayta yuborish mumkin"""
+    ids = [worker_id for _, worker_id, _ in bulk.rows]
+    active_ids = await db.get_active_worker_ids(None if bulk.default is not None else ids)
+    entries, errors = validate(bulk, active_ids)
+
+    if errors:
+        await message.answer(
+            f"⚠️ <b>Xatolar topildi, hech narsa yozilmadi:</b>\n\n{format_errors(errors)}\n\n"
+            f"Tuzatib qayta yuboring yoki ❌ Bekor qilish."
+        )
+        return
+    if not entries:
+        await message.answer("⚠️ Birorta ham qator topilmadi.")
+        return
+
+    try:
+        count = await db.add_attendance_bulk(list(entries.items()))
+    except db.DatabaseError:
+        await message.answer("❌ Bazaga yozishda xatolik! Qayta urinib ko'ring.")
+        return
+
+    present = sum(1 for hours in entries.values() if hours > 0)
+    await state.clear()
+    await message.answer(
+        f"✅ {format_bold('DAVOMAT SAQLANDI')}\n"
+        f"────────────────\n\n"
+        f"👥 Yozildi: <b>{count}</b> ta\n"
+        f"🟢 Keldi: <b>{present}</b>\n"
+        f"🔴 Kelmadi: <b>{count - present}</b>\n"
+        f"⏱ Jami: <b>{sum(entries.values()):g} soat</b>",
+        reply_markup=admin_main_kb()
+    )
+
+@router.message(DailyReport.bulk, F.document)
+async def process_bulk_file(message: Message, state: FSMContext):
+    document = message.document
+    if document.file_size and document.file_size > BULK_FILE_LIMIT:
+        await message.answer("⚠️ Fayl juda katta.")
+        return
+
+    buffer = BytesIO()
+    await message.bot.download(document, destination=buffer)
+    try:
+        # openpyxl sof Python - event loop ni bloklamaslik uchun alohida thread da
+        bulk = await asyncio.to_thread(parse_timesheet, document.file_name or "", buffer.getvalue())
+    except ValueError as e:
+        await message.answer(f"⚠️ Faylni o'qib bo'lmadi (xlsx, csv yoki tsv kerak).\n<i>{e}</i>")
+        return
+    await _save_bulk(message, state, bulk)
+
+@router.message(DailyReport.bulk, F.text)
+async def process_bulk_text(message: Message, state: FSMContext):
+    if message.text == "❌ Bekor qilish":
+        await state.clear()
+        await message.answer("⏹️ To'xtatildi", reply_markup=admin_main_kb())
+        return
+    await _save_bulk(message, state, parse_lines(message.text))
+
+@router.callback_query(DailyReport.bulk, F.data == "dg_template")
+async def send_bulk_template(call: CallbackQuery):
+    workers = await db.get_active_workers()
+    content = await asyncio.to_thread(timesheet_template, workers)
+    await call.message.answer_document(
+        BufferedInputFile(content, filename=f"tabel_{get_current_time():%Y%m%d}.xlsx"),
+        caption="📄 <b>soat</b> ustunini to'ldirib, shu yerga qaytarib yuboring (bo'sh qatorlar yozilmaydi)."
+    )
+    await call.answer()
+
+async def _grid_page(state: FSMContext, cursor_id: int = None, direction: str = "next"):
+    data = await state.get_data()
+    default = data.get('grid_default', 8)
+    hours = {int(worker_id): value for worker_id, value in data.get('grid_hours', {}).items()}
+
+    workers, has_prev, has_next = await db.get_workers_page(cursor_id, direction, WORKERS_PAGE_SIZE)
+    if not workers and cursor_id is not None:
+        workers, has_prev, has_next = await db.get_workers_page(None, "next", WORKERS_PAGE_SIZE)
+    text = (
+        f"🔲 {format_bold('DAVOMAT JADVALI')}\n"
+        f"────────────────\n\n"
+        f"Hamma: <b>{default:g} soat</b>, o'zgartirilgan: <b>{len(hours)}</b> ta\n"
+        f"<i>Ishchini bosing: {default:g} → 0 → {default / 2:g} soat</i>"
+    )
+    return text, attendance_grid_kb(workers, hours, default, has_prev, has_next)
+
+async def _show_grid(call: CallbackQuery, state: FSMContext, cursor_id: int = None, direction: str = "next"):
+    text, markup = await _grid_page(state, cursor_id, direction)
+    try:
+        await call.message.edit_text(text, reply_markup=markup)
+    except TelegramBadRequest:
+        pass
+    await call.answer()
+
+@router.callback_query(DailyReport.bulk, F.data == "dg_open")
+async def open_attendance_grid(call: CallbackQuery, state: FSMContext):
+    text, markup = await _grid_page(state)
+    await call.message.answer(text, reply_markup=markup)
+    await call.answer()
+
+@router.callback_query(DailyReport.bulk, F.data.startswith(("dg_n_", "dg_p_")))
+async def page_attendance_grid(call: CallbackQuery, state: FSMContext):
+    # data formati: dg_{n|p}_{kursor ishchi id}
+    _, direction, cursor_id = call.data.split("_")
+    await _show_grid(call, state, int(cursor_id), "next" if direction == "n" else "prev")
+
+@router.callback_query(DailyReport.bulk, F.data.startswith("dg_t_"))
+async def toggle_attendance_grid(call: CallbackQuery, state: FSMContext):
+    # data formati: dg_t_{ishchi id}_{sahifa boshidagi ishchi id}
+    _, _, worker_id, first_id = call.data.split("_")
+    data = await state.get_data()
+    default = data.get('grid_default', 8)
+    hours = data.get('grid_hours', {})
+
+    # hamma uchun -> 0 (kelmadi) -> yarim kun -> hamma uchun
+    current = hours.get(worker_id)
+    if current is None:
+        hours[worker_id] = 0
+    elif current == 0:
+        hours[worker_id] = default / 2
+    else:
+        hours.pop(worker_id)
+
+    await state.update_data(grid_hours=hours)
+    await _show_grid(call, state, int(first_id), "at")
+
+@router.callback_query(DailyReport.bulk, F.data.startswith("dg_d_"))
+async def set_grid_default(call: CallbackQuery, state: FSMContext):
+    # data formati: dg_d_{soat}_{sahifa boshidagi ishchi id}
+    _, _, value, first_id = call.data.split("_")
+    await state.update_data(grid_default=float(value))
+    await _show_grid(call, state, int(first_id), "at")
+
+@router.callback_query(DailyReport.bulk, F.data == "dg_save")
+async def save_attendance_grid(call: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    bulk = BulkInput()
+    bulk.default = data.get('grid_default', 8)
+    # Jadval ochilgandan keyin arxivlangan ishchilar xato emas - tashlab ketiladi
+    active_ids = set(await db.get_active_worker_ids())
+    bulk.rows = [
+        (0, int(worker_id), value) for worker_id, value in data.get('grid_hours', {}).items()
+        if int(worker_id) in active_ids
+    ]
+    await call.answer()
+    try:
+        await call.message.edit_reply_markup(reply_markup=None)
+    except TelegramBadRequest:
+        pass
+    await _save_bulk(call.message, state, bulk)
+
 # --- AVANS SO'ROVINI TASDIQLASH (QAYTARILGAN QISM) ---
 @router.callback_query(F.data.startswith("approve_adv_"))
 async def approve_advance_request(call: CallbackQuery):
@@ -467,26 +837,25 @@ async def approve_advance_request(call: CallbackQuery):
         worker_id = int(parts[2])
         amount = float(parts[3])
         
-        success = await db.add_advance(worker_id, amount, approved=True)
+        try:
+            await db.add_advance(worker_id, amount, approved=True)
+        except db.DatabaseError:
+            await call.answer("❌ Bazaga yozishda xatolik!", show_alert=True)
+            return
         
-        if success:
-            await call.message.edit_text(
-                f"{call.message.text}\n\n✅ <b>TASDIQLANDI!</b>\n"
-                f"👨‍💼 Tasdiqladi: {call.from_user.full_name}"
+        await call.message.edit_text(
+            f"{call.message.text}\n\n✅ <b>TASDIQLANDI!</b>\n"
+            f"👨‍💼 Tasdiqladi: {call.from_user.full_name}"
+        )
+        
+        # Ishchiga xabar yuborish
+        worker = await db.get_worker_by_id(worker_id)
+        if worker and worker['telegram_id']:
+            await notifier.enqueue(
+                worker['telegram_id'],
+                f"✅ <b>Xushxabar!</b>\nSiz so'ragan {amount:,.0f} so'm avans tasdiqlandi."
             )
             
-            # Ishchiga xabar yuborish
-            worker = await db.get_worker_by_id(worker_id)
-            if worker and worker['telegram_id']:
-                try:
-                    await call.bot.send_message(
-                        worker['telegram_id'], 
-                        f"✅ <b>Xushxabar!</b>\nSiz so'ragan {amount:,.0f} so'm avans tasdiqlandi."
-                    )
-                except: pass
-        else:
-            await call.answer("❌ Bazaga yozishda xatolik!", show_alert=True)
-            
     except Exception as e:
         logging.error(f"Approve advance error: {e}")
         await call.answer("❌ Xatolik yuz berdi", show_alert=True)
@@ -505,12 +874,10 @@ async def reject_advance_request(call: CallbackQuery):
         # Ishchiga xabar
         worker = await db.get_worker_by_id(worker_id)
         if worker and worker['telegram_id']:
-            try:
-                await call.bot.send_message(
-                    worker['telegram_id'], 
-                    "❌ <b>Afsuski</b>, sizning avans so'rovingiz rad etildi."
-                )
-            except: pass
+            await notifier.enqueue(
+                worker['telegram_id'],
+                "❌ <b>Afsuski</b>, sizning avans so'rovingiz rad etildi."
+            )
             
     except Exception as e:
         logging.error(f"Reject advance error: {e}")
@@ -524,28 +891,129 @@ async def show_stats_callback(call: CallbackQuery, state: FSMContext):
     stats = await db.get_general_statistics()
     now = get_current_time()
     month_name = MONTHS.get(now.month, str(now.month))
-    
-    if not stats:
-        await call.message.answer("❌ Statistika ma'lumotlari topilmadi", reply_markup=admin_main_kb())
-        return
 
     top_text = "Hozircha yo'q"
-    if stats.get('top_worker'):
-        top_text = f"{stats['top_worker']['name']} ({stats['top_worker']['hours']} soat)"
+    if stats.top_worker_name:
+        top_text = f"{stats.top_worker_name} ({stats.top_worker_hours} soat)"
 
     text = (
         f"📊 {format_bold('UMUMIY STATISTIKA')}\n"
         f"🗓 {month_name} {now.year}\n"
         f"────────────────\n\n"
-        f"👥 <b>Jami ishchilar:</b> {stats.get('workers', 0)}\n"
-        f"⏱ <b>Jami ishlangan soat:</b> {stats.get('hours', 0)}\n"
-        f"💸 <b>To'langan avanslar:</b> {stats.get('advance', 0):,.0f} so'm\n\n"
+        f"👥 <b>Jami ishchilar:</b> {stats.workers}\n"
+        f"⏱ <b>Jami ishlangan soat:</b> {stats.hours}\n"
+        f"💸 <b>To'langan avanslar:</b> {stats.advance:,.0f} so'm\n\n"
         f"🏆 <b>Oy ilg'ori (Top ishchi):</b>\n"
         f"⭐️ {top_text}"
     )
     
     await call.message.answer(text, reply_markup=admin_main_kb())
 
+# --- YIG'MA JADVALNI TUZATISH ---
+@router.message(Command("rebuild_payroll"))
+async def rebuild_payroll(message: Message, state: FSMContext):
+    if not await is_admin(message.from_user.id, message): return
+    await state.clear()
+    
+    processing_msg = await message.answer("🔄 <i>Oylik hisoblar qayta hisoblanmoqda...</i>")
+    try:
+        count = await db.rebuild_payroll_monthly()
+    except db.DatabaseError:
+        await processing_msg.delete()
+        await message.answer("❌ <b>Qayta hisoblashda xatolik!</b>", reply_markup=admin_main_kb())
+        return
+    
+    await processing_msg.delete()
+    await message.answer(f"✅ <b>Oylik hisoblar yangilandi:</b> {count} ta yozuv", reply_markup=admin_main_kb())
+
+# --- BUXGALTERIYA UCHUN EKSPORT (CSV/TSV, gzip) ---
+# Telegram bot API orqali yuboriladigan hujjat chegarasi
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+
+EXPORT_HELP = (
+    f"📤 {format_bold('EKSPORT')}\n"
+    f"────────────────\n\n"
+    f"<code>/export turi [davr] [csv|tsv]</code>\n\n"
+    f"<b>Turlar:</b> davomat, avans, oylik\n"
+    f"<b>Davr:</b> bo'sh - joriy oy, <code>2025</code>, <code>2025-03</code> yoki "
+    f"<code>2024-01-01 2025-12-31</code>"
+)
+
+@router.message(Command("export"))
+async def export_data(message: Message, state: FSMContext):
+    if not await is_admin(message.from_user.id, message): return
+    await state.clear()
+    
+    args = message.text.split()[1:]
+    fmt = "csv"
+    if args and args[-1].lower() in EXPORT_FORMATS:
+        fmt = args.pop().lower()
+    
+    if not args or args[0].lower() not in EXPORT_KINDS:
+        await message.answer(EXPORT_HELP)
+        return
+    
+    kind = EXPORT_KINDS[args[0].lower()]
+    try:
+        start_date, end_date = parse_period(args[1:], get_current_time().date())
+    except ValueError:
+        await message.answer("⚠️ <b>Davr noto'g'ri ko'rsatilgan.</b>\n\n" + EXPORT_HELP)
+        return
+    
+    processing_msg = await message.answer("🔄 <i>Eksport tayyorlanmoqda...</i>")
+    try:
+        path, rows = await export_to_file(kind, start_date, end_date, fmt)
+    except db.DatabaseError:
+        await message.answer("❌ <b>Eksportda xatolik!</b>", reply_markup=admin_main_kb())
+        return
+    finally:
+        await processing_msg.delete()
+    
+    try:
+        if os.path.getsize(path) > MAX_DOCUMENT_SIZE:
+            await message.answer("⚠️ <b>Fayl juda katta (50 MB dan ortiq).</b>\nOraliqni qisqartiring.", reply_markup=admin_main_kb())
+            return
+        
+        await message.answer_document(
+            FSInputFile(path, filename=export_filename(args[0].lower(), start_date, end_date, fmt)),
+            caption=(
+                f"📤 {format_bold('EKSPORT')}\n"
+                f"────────────────\n\n"
+                f"📄 Turi: {args[0].lower()} ({fmt.upper()}, gzip)\n"
+                f"🗓 Davr: {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}\n"
+                f"🔢 Qatorlar: {rows} ta"
+            )
+        )
+    finally:
+        os.remove(path)
+
+# --- OYLIK KUNI: HAR BIR ISHCHIGA SHAXSIY HISOB ---
+@router.message(Command("payday"))
+async def payday_broadcast(message: Message, state: FSMContext):
+    if not await is_admin(message.from_user.id, message): return
+    await state.clear()
+
+    args = message.text.split()[1:]
+    period = get_current_time().date()
+    if args:
+        try:
+            period = datetime.strptime(args[0], "%Y-%m").date()
+        except ValueError:
+            await message.answer("⚠️ Format: <code>/payday</code> yoki <code>/payday 2025-03</code>")
+            return
+
+    month_name = MONTHS.get(period.month, str(period.month))
+    title = f"📨 {format_bold('OYLIK XABARLARI')} ({month_name} {period.year})"
+    progress_msg = await message.answer(f"{title}\n\n<i>🔄 Tayyorlanmoqda...</i>")
+
+    info = await payday.start(period.year, period.month, ADMIN_LIST, ProgressMessage(progress_msg, title))
+    if info is None:
+        await progress_msg.edit_text(f"{title}\n\n❌ <b>Xatolik yuz berdi!</b>")
+    elif info['resumed']:
+        await message.answer("ℹ️ Bu oy uchun yuborish allaqachon davom etmoqda.", reply_markup=admin_main_kb())
+    elif not info['total']:
+        await message.answer("⚠️ Telegramga ulangan aktiv ishchilar yo'q.", reply_markup=admin_main_kb())
+
 @router.callback_query(F.data == "edit_worker")
 async def start_edit_worker(call: CallbackQuery, state: FSMContext):
     await call.message.delete()
@@ -596,8 +1064,10 @@ async def process_edit_value(message: Message, state: FSMContext):
             await message.answer("⚠️ Raqam kiriting!")
             return
             
-    await db.update_worker_field(data['worker_id'], data['edit_field'], val)
-    await message.answer("✅ Yangilandi!", reply_markup=admin_main_kb())
+    if await db.update_worker_field(data['worker_id'], data['edit_field'], val):
+        await message.answer("✅ Yangilandi!", reply_markup=admin_main_kb())
+    else:
+        await message.answer("❌ Ishchi topilmadi", reply_markup=admin_main_kb())
     await state.clear()
 
 @router.callback_query(F.data == "delete_worker")
@@ -617,5 +1087,5 @@ async def process_delete(message: Message, state: FSMContext):
         if success:
             await message.answer("✅ Ishchi arxivlandi", reply_markup=admin_main_kb())
         else:
-            await message.answer("❌ Xatolik yoki ishchi topilmadi", reply_markup=admin_main_kb())
+            await message.answer("❌ Ishchi topilmadi", reply_markup=admin_main_kb())
     await state.clear()
@@ -1,6 +1,6 @@
 from aiogram import Router, F
-from aiogram.types import Message
-from aiogram.filters import Command, CommandStart
+from aiogram.types import Message, ErrorEvent
+from aiogram.filters import Command, CommandStart, ExceptionTypeFilter
 from aiogram.fsm.context import FSMContext
 from utils.keyboards import admin_main_kb, worker_main_kb, remove_kb
 from utils.states import WorkerLogin
@@ -22,6 +22,8 @@ except (ValueError, TypeError):
 # Login urinishlari
 login_attempts: Dict[int, int] = {}
 
+DB_ERROR_TEXT = "❌ Tizimda vaqtincha xatolik. Birozdan keyin qayta urinib ko'ring."
+
 def format_bold(text: str) -> str:
     """Matnni qalin qilish"""
     bold_map = str.maketrans(
@@ -142,3 +144,13 @@ async def cancel_handler(message: Message, state: FSMContext):
         await message.answer("✅ <b>Amal bekor qilindi</b>", reply_markup=admin_main_kb())
     else:
         await message.answer("✅ <b>Amal bekor qilindi</b>", reply_markup=worker_main_kb())
+
+# --- BAZA XATOSI (barcha routerlar uchun) ---
+@router.errors(ExceptionTypeFilter(db.DatabaseError))
+async def database_error_handler(event: ErrorEvent):
+    """Handler ushlamagan DatabaseError: foydalanuvchi javobsiz qolmasin (xato query qatlamida loglangan)"""
+    update = event.update
+    if update.message:
+        await update.message.answer(DB_ERROR_TEXT)
+    elif update.callback_query:
+        await update.callback_query.answer(DB_ERROR_TEXT, show_alert=True)
@@ -4,6 +4,8 @@ from aiogram.fsm.context import FSMContext
 from utils.keyboards import worker_main_kb, cancel_kb
 from utils.states import WorkerAdvance
 from database import requests as db
+from utils.notifier import notifier
+from utils.payday import stats_text
 import os
 import logging
 from datetime import datetime, timedelta
@@ -20,6 +22,8 @@ try:
 except (ValueError, TypeError):
     logging.warning("ADMIN_ID worker.py da topilmadi")
 
+DB_ERROR_TEXT = "❌ Tizimda vaqtincha xatolik. Birozdan keyin qayta urinib ko'ring."
+
 def format_bold(text: str) -> str:
     return f"<b>{text}</b>"
 
@@ -29,37 +33,27 @@ def get_tashkent_time():
 # --- SHAXSIY HISOB ---
 @router.message(F.text == "💰 Mening hisobim")
 async def show_worker_stats(message: Message):
-    stats = await db.get_worker_stats(message.from_user.id)
+    try:
+        stats = await db.get_worker_stats(message.from_user.id)
+    except db.DatabaseError:
+        await message.answer(DB_ERROR_TEXT)
+        return
     
     if not stats:
         await message.answer("❌ Profilingiz topilmadi yoki aktiv emas.")
         return
     
-    salary = stats['hours'] * stats['rate']
-    net_salary = salary - stats['advance']
-    
-    now = get_tashkent_time()
-    
-    # Xatosiz oddiy matn
-    text = (
-        f"🧾 {format_bold('SHAXSIY HISOB')}\n"
-        f"🗓 {now.strftime('%m.%Y')}\n"
-        f"────────────────\n\n"
-        f"👤 <b>{stats['name']}</b>\n"
-        f"💎 Stavka: {stats['rate']:,.0f} so'm\n\n"
-        f"⏱ Ishlangan: <b>{stats['hours']} soat</b>\n"
-        f"💵 Hisoblangan: <b>{salary:,.0f} so'm</b>\n"
-        f"💸 Avanslar: <b>{stats['advance']:,.0f} so'm</b>\n"
-        f"────────────────\n"
-        f"💰 <b>QOLGA TEGADI: {net_salary:,.0f} so'm</b>"
-    )
-    
+    text = stats_text(stats, get_tashkent_time())
     await message.answer(text, reply_markup=worker_main_kb())
 
 # --- AVANS SO'RASH ---
 @router.message(F.text == "💸 Avans so'rash")
 async def start_advance_request(message: Message, state: FSMContext):
-    stats = await db.get_worker_stats(message.from_user.id)
+    try:
+        stats = await db.get_worker_stats(message.from_user.id)
+    except db.DatabaseError:
+        await message.answer(DB_ERROR_TEXT)
+        return
     if not stats:
         await message.answer("❌ Profil topilmadi")
         return
@@ -92,6 +86,10 @@ async def process_advance_request(message: Message, state: FSMContext):
 
         # Limitni tekshirish
         stats = await db.get_worker_stats(message.from_user.id)
+        if not stats:
+            await state.clear()
+            await message.answer("❌ Profil topilmadi")
+            return
         max_advance = (stats['hours'] * stats['rate']) * 0.7
         
         if max_advance > 0 and amount > max_advance:
@@ -109,20 +107,16 @@ async def process_advance_request(message: Message, state: FSMContext):
             f"📅 Vaqt: {now.strftime('%d.%m.%Y %H:%M')}"
         )
         
-        for admin_id in ADMIN_LIST:
-            try:
-                await message.bot.send_message(
-                    admin_id, 
-                    msg_text, 
-                    reply_markup=approval_kb(message.from_user.id, amount)
-                )
-            except:
-                pass
+        # Navbatga bitta so'rov bilan qo'yiladi, yuborishni NotificationSender bajaradi
+        markup = approval_kb(message.from_user.id, amount)
+        await notifier.enqueue_many((admin_id, msg_text, markup) for admin_id in ADMIN_LIST)
         
         await message.answer("✅ So'rov adminga yuborildi!", reply_markup=worker_main_kb())
         await state.clear()
         
     except ValueError:
         await message.answer("⚠️ Faqat raqam kiriting!")
+    except db.DatabaseError:
+        await message.answer(DB_ERROR_TEXT)
 
 
@@ -4,10 +4,21 @@ import os
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from database.models import create_db_pool, create_tables, close_db_pool
+from database import events
+from database import requests as db
+from database.fsm_storage import PostgresStorage
 from handlers import admin, worker, other
+from utils.report_service import report_service
+from utils.webhook import WebhookSettings, run_webhook
+from utils.notifier import notifier
+from utils.payday import payday
+from utils import metrics
+from utils.loop_monitor import LoopMonitor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import signal
@@ -33,11 +44,25 @@ class WorkforceBot:
         self.bot = None
         self.dp = None
         self.scheduler = None
+        self.storage = None
+        self.metrics_server = None
+        self.loop_monitor = None
+        self.mode = os.getenv("BOT_MODE", "polling").lower()
+        self.webhook_settings = None
         
     async def startup(self):
         """Botni ishga tushirish"""
         logger.info("🚀 Workforce Bot ishga tushmoqda...")
         
+        # Webhook sozlamalari xato bo'lsa, hech narsani ishga tushirmasdan to'xtaymiz
+        if self.mode == "webhook":
+            self.webhook_settings = WebhookSettings.from_env()
+            try:
+                self.webhook_settings.validate()
+            except ValueError as e:
+                logger.error(f"❌ {e}")
+                return False
+        
         # Database pool yaratish
         db_pool = await create_db_pool()
         if not db_pool:
@@ -50,26 +75,52 @@ class WorkforceBot:
             logger.error("❌ Jadvallarni yaratishda xatolik!")
             return False
         
+        # Boshqa bot jarayonlaridan kesh hodisalarini tinglash (LISTEN/NOTIFY)
+        if not await events.start_listener():
+            logger.warning("⚠️ Kesh hodisalari tinglanmayapti, faqat TTL ishlaydi")
+        
         # Botni yaratish
         token = os.getenv("BOT_TOKEN")
         if not token:
             logger.error("❌ BOT_TOKEN topilmadi!")
             return False
         
+        # Mahalliy Bot API server (yoki oflayn sinov uchun soxta Telegram)
+        session = None
+        api_url = os.getenv("BOT_API_URL")
+        if api_url:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
+            logger.info(f"ℹ️ Bot API manzili: {api_url}")
+        
         self.bot = Bot(
             token=token,
+            session=session,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML)
         )
         
-        # Dispatcher yaratish
-        storage = MemoryStorage()
-        self.dp = Dispatcher(storage=storage)
+        # Dispatcher yaratish: FSM holati Postgres da (FSM_STORAGE=memory - faqat bitta jarayon uchun)
+        if os.getenv("FSM_STORAGE", "postgres").lower() == "memory":
+            self.storage = MemoryStorage()
+        else:
+            self.storage = PostgresStorage()
+        self.dp = Dispatcher(storage=self.storage)
         
         # Routerlarni qo'shish
         self.dp.include_router(admin.router)
         self.dp.include_router(worker.router)
         self.dp.include_router(other.router)
         
+        # Handler va so'rov o'lchovlari: http://METRICS_HOST:METRICS_PORT/metrics
+        metrics.setup_dispatcher(self.dp)
+        self.metrics_server = metrics.metrics_server_from_env()
+        if self.metrics_server and not await self.metrics_server.start():
+            self.metrics_server = None
+        
+        # Event loop ni bloklayotgan handlerlarni aniqlash (LOOP_LAG_THRESHOLD=off - o'chirilgan)
+        self.loop_monitor = LoopMonitor.from_env()
+        if self.loop_monitor:
+            self.loop_monitor.start()
+        
         # Scheduler ni sozlash
         self.scheduler = AsyncIOScheduler()
         self._setup_scheduler()
@@ -85,21 +136,77 @@ class WorkforceBot:
             CronTrigger(hour=18, minute=0),
             id='daily_reminder'
         )
+        
+        # Tashlab ketilgan suhbatlarni har soatda tozalash
+        if isinstance(self.storage, PostgresStorage):
+            self.scheduler.add_job(
+                self._purge_fsm_storage,
+                CronTrigger(minute=30),
+                id='purge_fsm_storage'
+            )
+        
+        # Oylik kuni: har bir ishchiga shaxsiy hisobi (PAYDAY_CRON, standart - oyning oxirgi kuni 19:00)
+        payday_cron = os.getenv("PAYDAY_CRON", "0 19 last * *")
+        if payday_cron != "off":
+            self.scheduler.add_job(
+                self._payday_broadcast,
+                CronTrigger.from_crontab(payday_cron),
+                id='payday_broadcast'
+            )
+        
+        # Eski yuborilgan xabarlarni navbatdan tozalash
+        self.scheduler.add_job(
+            self._purge_notifications,
+            CronTrigger(hour=3, minute=15),
+            id='purge_notifications'
+        )
     
-    async def _send_daily_reminder(self):
-        """Kunlik eslatma yuborish"""
+    async def _payday_broadcast(self):
+        """Joriy oy bo'yicha shaxsiy hisoblarni barcha aktiv ishchilarga yuborish"""
+        now = admin.get_current_time()
+        if await payday.start(now.year, now.month, admin.ADMIN_LIST) is None:
+            logger.error("❌ Oylik xabarlarini boshlab bo'lmadi")
+    
+    async def _purge_notifications(self):
+        """7 kundan eski yuborilgan/muvaffaqiyatsiz xabarlarni o'chirish"""
         try:
-            admin_id = os.getenv("ADMIN_ID")
-            if admin_id and self.bot:
-                await self.bot.send_message(
-                    chat_id=int(admin_id),
-                    text="⏰ <b>Kunlik eslatma</b>\n\n"
-                         "📝 Bugungi hisobotni kiritishni unutmang!\n"
-                         "💰 Yangi avans so'rovlari bo'lsa tekshiring."
-                )
-                logger.info("✅ Kunlik eslatma yuborildi")
-        except Exception as e:
-            logger.error(f"❌ Eslatma yuborishda xato: {e}")
+            count = await db.purge_notifications(days=7)
+        except db.DatabaseError:
+            # Xato query qatlamida loglangan; navbatdagi ishga tushishda qayta urinadi
+            return
+        if count:
+            logger.info(f"🧹 Eski xabarlar o'chirildi: {count} ta")
+    
+    async def _purge_fsm_storage(self):
+        """Muddati o'tgan FSM yozuvlarini o'chirish"""
+        try:
+            count = await self.storage.purge_expired()
+        except db.DatabaseError:
+            # Xato query qatlamida loglangan; navbatdagi ishga tushishda qayta urinadi
+            return
+        if count:
+            logger.info(f"🧹 Eskirgan suhbatlar o'chirildi: {count} ta")
+    
+    async def _send_daily_reminder(self):
+        """Kunlik eslatma yuborish (barcha adminlarga, navbat orqali)"""
+        text = ("⏰ <b>Kunlik eslatma</b>\n\n"
+                "📝 Bugungi hisobotni kiritishni unutmang!\n"
+                "💰 Yangi avans so'rovlari bo'lsa tekshiring.")
+        count = await notifier.enqueue_many((admin_id, text, None) for admin_id in admin.ADMIN_LIST)
+        if count:
+            logger.info(f"✅ Kunlik eslatma navbatga qo'yildi: {count} ta admin")
+    
+    async def run(self):
+        """Update larni qabul qilish: BOT_MODE=webhook yoki polling (standart)"""
+        notifier.start(self.bot)  # handlerlar faqat navbatga yozadi, yuborish fonda
+        await payday.resume(admin.ADMIN_LIST)
+        if self.mode == "webhook":
+            await run_webhook(self.bot, self.dp, self.webhook_settings)
+            return
+        
+        # Avval webhook rejimida ishlagan bo'lsa, getUpdates ishlashi uchun o'chiramiz
+        await self.bot.delete_webhook()
+        await self.dp.start_polling(self.bot)
     
     async def shutdown(self):
         """Botni to'xtatish"""
@@ -109,10 +216,20 @@ class WorkforceBot:
             self.scheduler.shutdown()
             logger.info("✅ Scheduler to'xtatildi")
         
+        report_service.shutdown()
+        await payday.stop()
+        await notifier.stop()
+        
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        
         if self.bot:
             await self.bot.session.close()
             logger.info("✅ Bot sessiyasi yopildi")
         
+        await events.stop_listener()
         await close_db_pool()
         logger.info("✅ Database pool yopildi")
         
@@ -142,8 +259,8 @@ async def main():
         bot.scheduler.start()
         logger.info("✅ Scheduler ishga tushirildi")
         
-        # Botni ishga tushirish
-        await bot.dp.start_polling(bot.bot)
+        # Update larni qabul qilish (polling yoki webhook)
+        await bot.run()
         
     except Exception as e:
         logger.error(f"❌ Botda xatolik yuz berdi: {e}")
@@ -0,0 +1,32 @@
+"""Umumiy fixture lar
+
+Postgres talab qiladigan testlar `run` fixture ini oladi: TEST_DATABASE_URL berilmasa
+ular o'tkazib yuboriladi.
+"""
+import asyncio
+import os
+import pytest
+from database.cache import worker_cache
+from benchmarks.harness import scratch_database
+
+TEST_DSN = os.getenv("TEST_DATABASE_URL")
+
+@pytest.fixture(scope="module")
+def run():
+    """Modul uchun vaqtinchalik baza (benchmarks.harness.scratch_database) va event loop
+
+    Qaytaradi: loop.run_until_complete - testlar korutinalarni shu orqali bajaradi.
+    """
+    if not TEST_DSN:
+        pytest.skip("TEST_DATABASE_URL berilmagan")
+
+    loop = asyncio.new_event_loop()
+    scratch = scratch_database(TEST_DSN, "workforce_test")
+    loop.run_until_complete(scratch.__aenter__())
+    worker_cache.invalidate()
+    try:
+        yield loop.run_until_complete
+    finally:
+        worker_cache.invalidate()
+        loop.run_until_complete(scratch.__aexit__(None, None, None))
+        loop.close()
@@ -0,0 +1,45 @@
+from utils.attendance_import import parse_lines, validate, MAX_HOURS
+
+def test_parse_lines_formats():
+    bulk = parse_lines("12 8\n13: 7,5\n\n14=10h\n15 - 6 soat\n16;4")
+    assert [(worker_id, hours) for _, worker_id, hours in bulk.rows] == [
+        (12, 8.0), (13, 7.5), (14, 10.0), (15, 6.0), (16, 4.0)
+    ]
+    # Bo'sh qator tashlab ketiladi, lekin satr raqamlari asl matn bo'yicha
+    assert [line_no for line_no, _, _ in bulk.rows] == [1, 2, 4, 5, 6]
+    assert bulk.default is None
+    assert bulk.errors == []
+
+def test_parse_lines_default_and_errors():
+    bulk = parse_lines("hamma 8\n12 0\nabc\n* 9")
+    assert bulk.default == 9.0
+    assert bulk.rows == [(2, 12, 0.0)]
+    assert [line_no for line_no, _ in bulk.errors] == [3, 4]
+
+def test_parse_lines_default_spellings():
+    for text in ("hamma 8", "Barchasi: 8", "* 8", "hamma=8 soat"):
+        assert parse_lines(text).default == 8.0, text
+
+def test_validate_default_with_overrides():
+    bulk = parse_lines("hamma 8\n2 0\n3 10")
+    entries, errors = validate(bulk, [1, 2, 3, 4])
+    assert errors == []
+    assert entries == {1: 8.0, 2: 0.0, 3: 10.0, 4: 8.0}
+
+def test_validate_without_default_only_listed():
+    entries, errors = validate(parse_lines("1 8\n2 9"), [1, 2, 3])
+    assert errors == []
+    assert entries == {1: 8.0, 2: 9.0}
+
+def test_validate_errors():
+    bulk = parse_lines(f"1 8\n1 9\n5 8\n2 {MAX_HOURS + 1}\nxato")
+    entries, errors = validate(bulk, [1, 2])
+    assert entries == {1: 8.0}
+    # Xatolar satr raqami bo'yicha tartiblangan: takror, noma'lum id, oraliq, format
+    assert [line_no for line_no, _ in errors] == [2, 3, 4, 5]
+    assert "takrorlangan" in errors[0][1]
+    assert "topilmadi" in errors[1][1]
+
+def test_validate_default_out_of_range():
+    entries, errors = validate(parse_lines(f"hamma {MAX_HOURS + 1}"), [1])
+    assert errors and errors[0][0] == 0
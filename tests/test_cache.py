@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from database import events, models, query
+from database.cache import WorkerCache, worker_cache
+
+def _worker(worker_id, name, code, telegram_id=None):
+    return {'id': worker_id, 'name': name, 'code': code, 'telegram_id': telegram_id, 'active': True}
+
+class FakeTable:
+    """query.fetch o'rnida: workers jadvali, yuklashlar soni va ixtiyoriy to'xtash"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+        self.gate = None
+
+    async def fetch(self, q, *args, conn=None):
+        self.loads += 1
+        rows = [dict(row) for row in self.rows]
+        if self.gate:
+            await self.gate.wait()
+        return rows
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable([_worker(1, "Aziz", 101, 5001), _worker(2, "Bekzod", 102)])
+    monkeypatch.setattr(models, "DB_POOL", object())
+    monkeypatch.setattr(query, "fetch", table.fetch)
+    return table
+
+def test_reads_hit_cache_until_invalidated(table):
+    cache = WorkerCache(ttl=300)
+
+    async def scenario():
+        assert (await cache.get_by_id(1))['name'] == "Aziz"
+        assert (await cache.get_by_code(102))['id'] == 2
+        assert (await cache.get_by_telegram_id(5001))['id'] == 1
+        assert table.loads == 1
+
+        table.rows[0]['name'] = "Aziz Karimov"
+        assert (await cache.get_by_id(1))['name'] == "Aziz"
+        cache.invalidate()
+        assert (await cache.get_by_id(1))['name'] == "Aziz Karimov"
+        assert table.loads == 2
+
+    asyncio.run(scenario())
+    assert cache.stats() == {'hits': 3, 'misses': 2, 'size': 2, 'fresh': True}
+
+def test_invalidate_during_load_forces_reload(table):
+    cache = WorkerCache(ttl=300)
+
+    async def scenario():
+        table.gate = asyncio.Event()
+        loading = asyncio.create_task(cache.get_by_id(1))
+        await asyncio.sleep(0)
+        assert table.loads == 1
+
+        # Yuklash paytida o'zgarish: natija qaytadi, lekin kesh yangi deb belgilanmaydi
+        cache.invalidate()
+        table.rows[0]['name'] = "Aziz Karimov"
+        table.gate.set()
+        assert (await loading)['name'] == "Aziz"
+        assert not cache.stats()['fresh']
+
+        assert (await cache.get_by_id(1))['name'] == "Aziz Karimov"
+        assert table.loads == 2
+        assert cache.stats()['fresh']
+
+    asyncio.run(scenario())
+
+def test_expired_ttl_reloads(table):
+    cache = WorkerCache(ttl=0)
+
+    async def scenario():
+        await cache.get_by_id(1)
+        await cache.get_by_id(1)
+
+    asyncio.run(scenario())
+    assert table.loads == 2
+
+def test_put_reindexes_changed_fields(table):
+    cache = WorkerCache(ttl=300)
+
+    async def scenario():
+        worker = await cache.get_by_id(1)
+        cache.put({**worker, 'code': 201, 'telegram_id': None})
+        assert await cache.get_by_code(101) is None
+        assert await cache.get_by_telegram_id(5001) is None
+        assert (await cache.get_by_code(201))['id'] == 1
+
+    asyncio.run(scenario())
+
+def test_load_error_falls_back_to_database(monkeypatch):
+    async def failing_fetch(q, *args, conn=None):
+        raise query.DatabaseError("connection refused", q.name)
+
+    monkeypatch.setattr(models, "DB_POOL", object())
+    monkeypatch.setattr(query, "fetch", failing_fetch)
+    cache = WorkerCache(ttl=300)
+    # None - chaqiruvchi (requests._fetch_worker) bazadan o'zi o'qiydi
+    assert asyncio.run(cache.get_by_id(1)) is None
+    assert not cache.stats()['fresh']
+
+def test_worker_changed_event_invalidates_shared_cache(table):
+    asyncio.run(worker_cache.get_active())
+    assert worker_cache.stats()['fresh']
+    events._dispatch(events.WORKER_CHANGED, {})
+    assert not worker_cache.stats()['fresh']
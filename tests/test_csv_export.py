@@ -0,0 +1,59 @@
+import csv
+import gzip
+import os
+from datetime import date
+import pytest
+from database import requests as db
+from utils.csv_export import export_to_file, parse_period
+
+TODAY = date(2025, 3, 17)
+
+@pytest.mark.parametrize("tokens, expected", [
+    ([], (date(2025, 3, 1), TODAY)),
+    (["2024"], (date(2024, 1, 1), date(2024, 12, 31))),
+    (["2024-02"], (date(2024, 2, 1), date(2024, 2, 29))),
+    (["2025-12"], (date(2025, 12, 1), date(2025, 12, 31))),
+    (["2024-01-01", "2025-06-30"], (date(2024, 1, 1), date(2025, 6, 30))),
+    (["2024-05-05", "2024-05-05"], (date(2024, 5, 5), date(2024, 5, 5))),
+])
+def test_parse_period(tokens, expected):
+    assert parse_period(tokens, TODAY) == expected
+
+@pytest.mark.parametrize("tokens", [
+    ["2024-13"],
+    ["mart"],
+    ["2025-02-01", "2025-01-01"],
+    ["2025-01-01", "2025-02"],
+    ["2024", "2025", "2026"],
+])
+def test_parse_period_invalid(tokens):
+    with pytest.raises(ValueError):
+        parse_period(tokens, TODAY)
+
+# --- COPY eksport (TEST_DATABASE_URL, tests/conftest.py) ---
+
+def test_export_to_file_writes_gzipped_csv(run):
+    run(db.add_worker("Aziz", 15000, 2001))
+    worker_id = run(db.get_active_worker_ids())[0]
+    run(db.add_attendance(worker_id, 8, "Keldi"))
+    today = db.get_tashkent_time().date()
+
+    for fmt, delimiter in (("csv", ","), ("tsv", "\t")):
+        path, rows = run(export_to_file("attendance", today, today, fmt))
+        try:
+            with gzip.open(path, "rt", newline="") as f:
+                lines = list(csv.reader(f, delimiter=delimiter))
+        finally:
+            os.remove(path)
+        assert rows == 1
+        assert lines[0] == ["date", "worker_id", "name", "hours", "status"]
+        assert lines[1][1:] == [str(worker_id), "Aziz", "8.00", "Keldi"]
+
+def test_export_error_raises_and_removes_temp_file(run, monkeypatch, tmp_path):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    monkeypatch.setitem(db.EXPORT_QUERIES, "attendance", "SELECT * FROM no_such_table WHERE $1::date < $2")
+
+    with pytest.raises(db.DatabaseError) as error:
+        run(export_to_file("attendance", date(2025, 1, 1), date(2025, 1, 31)))
+    assert error.value.query_name == "copy_export_attendance"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+from database import events, models
+
+KIND = "test_event"
+
+@pytest.fixture
+def received(monkeypatch):
+    """KIND hodisasi uchun yagona ishlovchi: kelgan data lar ro'yxati"""
+    received = []
+    monkeypatch.setitem(events._handlers, KIND, [received.append])
+    return received
+
+def _payload(origin, **data):
+    return json.dumps({"kind": KIND, "origin": origin, **data})
+
+def test_foreign_notification_dispatched_own_ignored(received):
+    events._on_notification(None, 0, events.CHANNEL, _payload("boshqa", worker_id=7))
+    events._on_notification(None, 0, events.CHANNEL, _payload(events.INSTANCE_ID, worker_id=8))
+    events._on_notification(None, 0, events.CHANNEL, "{buzilgan")
+    assert received == [{"worker_id": 7}]
+
+def test_failing_handler_does_not_stop_others(monkeypatch):
+    received = []
+
+    def broken(data):
+        raise RuntimeError("xato")
+
+    monkeypatch.setitem(events._handlers, KIND, [broken, received.append])
+    events._dispatch(KIND, {"x": 1})
+    assert received == [{"x": 1}]
+
+# --- LISTEN/NOTIFY (TEST_DATABASE_URL, tests/conftest.py) ---
+
+async def _send_foreign(**data):
+    """Boshqa bot jarayoni yuborgandek NOTIFY"""
+    async with models.acquire() as conn:
+        await conn.execute("SELECT pg_notify($1, $2)", events.CHANNEL, _payload("boshqa", **data))
+
+async def _wait_for(received, count, timeout=10.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while len(received) < count and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    return received
+
+def test_notify_dispatched_after_listener_reconnect(run, received):
+    async def scenario():
+        assert await events.start_listener()
+        try:
+            await _send_foreign(worker_id=1)
+            assert await _wait_for(received, 1) == [{"worker_id": 1}]
+
+            # Tinglovchi ulanishni server tomonidan uzamiz
+            pid = events._listener_conn.get_server_pid()
+            async with models.acquire() as conn:
+                await conn.execute("SELECT pg_terminate_backend($1)", pid)
+
+            # Qayta ulangach: uzilish paytida yo'qolgan bo'lishi mumkin xabarlar uchun hamma kesh tozalanadi
+            assert await _wait_for(received, 2) == [{"worker_id": 1}, {}]
+            assert events._listener_conn.get_server_pid() != pid
+
+            await _send_foreign(worker_id=2)
+            assert await _wait_for(received, 3) == [{"worker_id": 1}, {}, {"worker_id": 2}]
+
+            # O'zimiz yuborgan xabar qayta ishlanmaydi
+            await events.notify(KIND, worker_id=3)
+            await _send_foreign(worker_id=4)
+            assert (await _wait_for(received, 4))[3:] == [{"worker_id": 4}]
+        finally:
+            await events.stop_listener()
+
+    run(scenario())
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import date
+from io import BytesIO
+from openpyxl import load_workbook
+from utils import excel_gen
+from utils.report_service import ReportService
+
+YEAR = 2025
+# 2-ishchi mart o'rtasida keladi, 3-ishchi aprelda ketadi
+WORKERS = [
+    {'id': 1, 'name': "Aziz", 'rate': 10000, 'created_at': date(2024, 5, 1), 'archived_at': None},
+    {'id': 2, 'name': "Bekzod", 'rate': 12000, 'created_at': date(2025, 3, 10), 'archived_at': None},
+    {'id': 3, 'name': "Dilnoza", 'rate': 15000, 'created_at': None, 'archived_at': date(2025, 4, 5)},
+]
+ATTENDANCE = [
+    {'worker_id': 1, 'month': 3, 'days': [3, 4], 'hours': [8.0, 6.0]},
+    {'worker_id': 2, 'month': 3, 'days': [10], 'hours': [8.0]},
+    {'worker_id': 3, 'month': 4, 'days': [1], 'hours': [4.0]},
+]
+ADVANCES = [{'worker_id': 1, 'month': 3, 'total': 5000.0}]
+
+def _month_data():
+    return excel_gen.split_year_data(YEAR, [3, 4, 5], WORKERS, ATTENDANCE, ADVANCES)
+
+def _values(report: bytes):
+    wb = load_workbook(BytesIO(report))
+    return {ws.title: [[cell.value for cell in row] for row in ws.iter_rows()] for ws in wb.worksheets}
+
+def test_year_report_from_parallel_rows_matches_serial():
+    month_data = _month_data()
+    calls = {month: (YEAR, month, *data) for month, data in month_data.items()}
+    service = ReportService(sheet_workers=2)
+    try:
+        month_rows = asyncio.run(service.run_parallel(excel_gen.build_month_rows, calls))
+    finally:
+        service.shutdown()
+
+    parallel = _values(excel_gen.generate_year_report_bytes(YEAR, month_data, month_rows))
+    serial = _values(excel_gen.generate_year_report_bytes(YEAR, month_data))
+    assert parallel == serial
+    assert list(parallel) == [f"Yillik-{YEAR}", f"03-{YEAR}", f"04-{YEAR}", f"05-{YEAR}"]
+
+def test_year_summary_totals():
+    summary = _values(excel_gen.generate_year_report_bytes(YEAR, _month_data()))[f"Yillik-{YEAR}"]
+    # №, F.I.O, MART, APREL, MAY, narx, jami soat, avans, hisoblangan, qo'lga tegadi
+    rows = {row[1]: row[2:] for row in summary[2:]}
+    assert rows["Aziz"] == [14.0, None, None, 10000, 14.0, 5000.0, 140000.0, 135000.0]
+    assert rows["Bekzod"] == [8.0, None, None, 12000, 8.0, 0, 96000.0, 96000.0]
+    assert rows["Dilnoza"][:2] == [None, 4.0]
+
+def test_absent_days_use_one_conditional_format():
+    month_data = _month_data()
+    rows, totals = excel_gen.build_month_rows(YEAR, 3, *month_data[3])
+    assert totals == {1: 14.0, 2: 8.0, 3: 0}
+
+    report = excel_gen.generate_report_bytes(
+        YEAR, 3, month_data[3][0], excel_gen._month_attendance(YEAR, 3, month_data[3][1]), month_data[3][2]
+    )
+    ws = load_workbook(BytesIO(report)).active
+    absent = [cf for cf in ws.conditional_formatting if cf.rules[0].type == "expression"]
+    assert len(absent) == 1
+    # Bekzod (4-qator): 1-9 mart - C..K ustunlar
+    assert str(absent[0].sqref) == "C4:K4"
+    assert ws["C4"].style == ws["L4"].style == excel_gen.DAY_STYLE
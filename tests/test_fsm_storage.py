@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from database import models
+from database.fsm_storage import PostgresStorage
+from database.query import DatabaseError
+
+class Form(StatesGroup):
+    name = State()
+    amount = State()
+
+def _key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+def test_database_error_propagates(monkeypatch):
+    # Holat jimgina yo'qolmasligi kerak: update xato bilan to'xtaydi (handlers/other.py)
+    monkeypatch.setattr(models, "DB_POOL", None)
+    with pytest.raises(DatabaseError):
+        asyncio.run(PostgresStorage().set_state(_key(1), Form.name))
+
+# --- Postgres (TEST_DATABASE_URL, tests/conftest.py) ---
+
+async def _expire(storage: PostgresStorage, key: StorageKey):
+    async with models.acquire() as conn:
+        await conn.execute("UPDATE fsm_storage SET expires_at = now() - interval '1 second' WHERE key = $1",
+                           storage._key_builder.build(key))
+
+async def _rows() -> int:
+    async with models.acquire() as conn:
+        return await conn.fetchval("SELECT COUNT(*) FROM fsm_storage")
+
+def test_state_and_data_roundtrip(run):
+    storage, key = PostgresStorage(), _key(10)
+    assert run(storage.get_state(key)) is None
+    assert run(storage.get_data(key)) == {}
+
+    run(storage.set_state(key, Form.name))
+    run(storage.set_data(key, {'queue': [3, 1, 2], 'index': 0, 'ism': "Ozodbek"}))
+    assert run(storage.update_data(key, {'index': 1})) == {'queue': [3, 1, 2], 'index': 1, 'ism': "Ozodbek"}
+    run(storage.set_state(key, Form.amount))
+
+    # Yangi storage obyekti (bot qayta ishga tushgandek) - holat bazadan o'qiladi
+    restarted = PostgresStorage()
+    assert run(restarted.get_state(key)) == Form.amount.state
+    assert run(restarted.get_data(key))['index'] == 1
+    assert run(restarted.get_state(_key(11))) is None
+
+def test_clear_removes_row(run):
+    storage, key = PostgresStorage(), _key(20)
+    run(storage.set_state(key, Form.name))
+    run(storage.set_data(key, {'a': 1}))
+    before = run(_rows())
+
+    # FSMContext.clear(): set_state(None) + set_data({})
+    run(storage.set_state(key, None))
+    run(storage.set_data(key, {}))
+    assert run(storage.get_state(key)) is None
+    assert run(storage.get_data(key)) == {}
+    assert run(_rows()) == before - 1
+
+def test_expired_conversation_is_not_read_and_is_purged(run):
+    storage, key, alive = PostgresStorage(), _key(30), _key(31)
+    run(storage.set_state(key, Form.name))
+    run(storage.set_data(key, {'worker_id': 5}))
+    run(storage.set_state(alive, Form.name))
+    run(_expire(storage, key))
+
+    assert run(storage.get_state(key)) is None
+    assert run(storage.get_data(key)) == {}
+    # Eskirgan yozuv ustiga yangi suhbat eski ma'lumotni ko'rmaydi
+    assert run(storage.update_data(key, {'index': 0})) == {'index': 0}
+    assert run(storage.get_state(key)) is None
+
+    run(_expire(storage, key))
+    assert run(storage.purge_expired()) == 1
+    assert run(storage.get_state(alive)) == Form.name.state
@@ -0,0 +1,53 @@
+import asyncio
+import time
+from datetime import datetime
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+from utils import metrics
+from utils.loop_monitor import STALL_SECONDS, STALLS, LoopMonitor
+from benchmarks.fake_telegram import FakeBotSession
+
+BLOCK = 0.3
+
+router = Router()
+
+@router.message()
+async def on_blocking(message: Message):
+    time.sleep(BLOCK)
+
+async def background_blocker():
+    time.sleep(BLOCK)
+
+def _update() -> Update:
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"),
+                      from_user=User(id=1, is_bot=False, first_name="Admin"), text="salom")
+    return Update(update_id=1, message=message)
+
+def test_stall_is_attributed_to_running_handler():
+    dp = Dispatcher()
+    dp.include_router(router)
+    metrics.setup_dispatcher(dp)
+    bot = Bot("42:TEST", session=FakeBotSession())
+    handler = "test_loop_monitor.on_blocking"
+    stalls_before = STALLS.value(handler)
+    seconds_before = STALL_SECONDS.value(handler)
+    background_before = STALLS.value("background_blocker")
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.02, threshold=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            await dp.feed_update(bot, _update())
+            await asyncio.sleep(0.05)      # loop qaytgach davomiylik yoziladi
+            await asyncio.create_task(background_blocker())
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+        return monitor.stalls
+
+    assert asyncio.run(scenario()) == 2
+    assert STALLS.value(handler) == stalls_before + 1
+    # Kuzatuvchi thread bloklanishni bir marta yozadi, davomiylik esa to'liq hisoblanadi
+    assert STALL_SECONDS.value(handler) - seconds_before >= BLOCK - 0.05
+    assert STALLS.value("background_blocker") == background_before + 1
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Chat, Message, Update, User
+from utils import metrics
+from benchmarks.fake_telegram import FakeBotSession
+
+def test_histogram_exposition_format():
+    histogram = metrics.Histogram("test_seconds", "Sinov", ("query",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, "a")
+    histogram.observe(0.25, 'b"\\')
+
+    assert histogram.render() == [
+        "# HELP test_seconds Sinov",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{query="a",le="0.1"} 2',      # chegara (le) ichiga kiradi
+        'test_seconds_bucket{query="a",le="1.0"} 3',
+        'test_seconds_bucket{query="a",le="+Inf"} 4',
+        'test_seconds_sum{query="a"} 5.65',
+        'test_seconds_count{query="a"} 4',
+        'test_seconds_bucket{query="b\\"\\\\",le="0.1"} 0',
+        'test_seconds_bucket{query="b\\"\\\\",le="1.0"} 1',
+        'test_seconds_bucket{query="b\\"\\\\",le="+Inf"} 1',
+        'test_seconds_sum{query="b\\"\\\\"} 0.25',
+        'test_seconds_count{query="b\\"\\\\"} 1',
+    ]
+    assert histogram.count("a") == 4
+
+def test_unlabelled_histogram_and_counter():
+    histogram = metrics.Histogram("wait_seconds", "Kutish", buckets=(0.5,))
+    histogram.observe(0.2)
+    assert histogram.render()[2:] == ['wait_seconds_bucket{le="0.5"} 1', 'wait_seconds_bucket{le="+Inf"} 1',
+                                      'wait_seconds_sum 0.2', 'wait_seconds_count 1']
+
+    counter = metrics.Counter("errors_total", "Xatolar", ("error",))
+    counter.inc("ValueError")
+    counter.inc("ValueError", amount=2)
+    counter.inc("KeyError", amount=0.5)
+    assert counter.render()[2:] == ['errors_total{error="KeyError"} 0.5', 'errors_total{error="ValueError"} 3']
+
+def test_registry_skips_failing_gauge():
+    registry = metrics.Registry()
+    registry.register(metrics.Gauge("pool_size", "Pool", lambda: 4))
+    registry.register(metrics.Gauge("broken", "Xato", lambda: 1 / 0))
+    assert registry.render() == "# HELP pool_size Pool\n# TYPE pool_size gauge\npool_size 4\n"
+
+# --- Handler o'lchovlari: Dispatcher orqali (tarmoqsiz) ---
+
+def _text_update(update_id: int, text: str) -> Update:
+    user = User(id=1, is_bot=False, first_name="Admin")
+    message = Message(message_id=update_id, date=datetime.now(), chat=Chat(id=1, type="private"),
+                      from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+router = Router()
+
+@router.message(F.text == "ok")
+async def on_ok(message: Message):
+    pass
+
+@router.message(F.text == "xato")
+async def on_error(message: Message):
+    raise ValueError("sinov")
+
+def test_middleware_labels_handler_and_counts_errors():
+    dp = Dispatcher()
+    dp.include_router(router)
+    metrics.setup_dispatcher(dp)
+    bot = Bot("42:TEST", session=FakeBotSession())
+    ok_before = metrics.HANDLER_SECONDS.count("test_metrics.on_ok")
+    errors_before = metrics.HANDLER_ERRORS.value("test_metrics.on_error", "ValueError")
+    unhandled_before = metrics.HANDLER_SECONDS.count(metrics.UNHANDLED)
+
+    async def scenario():
+        await dp.feed_update(bot, _text_update(1, "ok"))
+        await dp.feed_update(bot, _text_update(2, "boshqa"))
+        with pytest.raises(ValueError):
+            await dp.feed_update(bot, _text_update(3, "xato"))
+
+    asyncio.run(scenario())
+    assert metrics.HANDLER_SECONDS.count("test_metrics.on_ok") == ok_before + 1
+    assert metrics.HANDLER_SECONDS.count(metrics.UNHANDLED) == unhandled_before + 1
+    assert metrics.HANDLER_ERRORS.value("test_metrics.on_error", "ValueError") == errors_before + 1
+    assert 'bot_handler_seconds_count{handler="test_metrics.on_ok"}' in metrics.registry.render()
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from aiogram import Bot
+from database import models
+from database import requests as db
+from utils.notifier import NotificationSender, RateLimiter
+from benchmarks.fake_telegram import FakeBotSession
+
+TOKEN = "42:TEST"
+
+def test_rate_limiter_spaces_reservations():
+    async def scenario():
+        limiter = RateLimiter(10)
+        delays = [limiter.reserve() for _ in range(4)]
+        limiter.pause(2.0)
+        return delays, limiter.reserve()
+
+    delays, after_pause = asyncio.run(scenario())
+    assert delays == pytest.approx([0.0, 0.1, 0.2, 0.3], abs=0.01)
+    # RetryAfter: keyingi yuborish pauza tugaguncha kutadi
+    assert after_pause == pytest.approx(2.0, abs=0.01)
+
+def _item(item_id, chat_id):
+    return {'id': item_id, 'chat_id': chat_id, 'text': f"xabar {item_id}", 'reply_markup': None, 'attempts': 1}
+
+def _sender(session, **kwargs) -> NotificationSender:
+    sender = NotificationSender(**kwargs)
+    sender._bot = Bot(TOKEN, session=session)
+    sender._limiter = RateLimiter(sender.global_rate)
+    return sender
+
+def _gaps(session):
+    times = [at for _, _, at in session.calls]
+    return [later - earlier for earlier, later in zip(times, times[1:])]
+
+def test_global_rate_paces_sends():
+    session = FakeBotSession()
+    sender = _sender(session, global_rate=20, concurrency=10)
+
+    async def scenario():
+        slots, outcome = asyncio.Semaphore(sender.concurrency), {}
+        await asyncio.gather(*(sender._send(_item(i, 100 + i), slots, outcome) for i in range(6)))
+        return outcome
+
+    assert all(asyncio.run(scenario()).values())
+    assert min(_gaps(session)) >= 0.05 - 0.005
+
+def test_same_chat_waits_per_chat_interval():
+    session = FakeBotSession()
+    sender = _sender(session, global_rate=1000, per_chat_interval=0.2)
+
+    async def scenario():
+        slots, outcome = asyncio.Semaphore(sender.concurrency), {}
+        await asyncio.gather(*(sender._send(_item(i, 7), slots, outcome) for i in range(3)))
+        return outcome
+
+    assert list(asyncio.run(scenario())) == [0, 1, 2]   # tartib saqlanadi
+    assert min(_gaps(session)) >= 0.2 - 0.01
+
+# --- Outbox bilan (TEST_DATABASE_URL, tests/conftest.py) ---
+
+class BrokenBot:
+    """Tarmoq xatosi: har bir yuborish urinishni sarflaydi"""
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        raise ConnectionError("tarmoq yo'q")
+
+async def _outbox(chat_id):
+    async with models.acquire() as conn:
+        return await conn.fetchrow(
+            "SELECT status, attempts, next_attempt_at > now() AS deferred FROM notification_outbox WHERE chat_id = $1",
+            chat_id)
+
+async def _due_now():
+    async with models.acquire() as conn:
+        await conn.execute("UPDATE notification_outbox SET next_attempt_at = now() WHERE status = 'pending'")
+
+def test_retry_after_does_not_use_an_attempt(run):
+    session = FakeBotSession(retry_after=1.0)
+    sender = _sender(session, global_rate=1000, per_chat_interval=0, max_attempts=1)
+    run(db.enqueue_notifications([(501, "avans", None)]))
+
+    async def attempt():
+        sender._limiter = RateLimiter(sender.global_rate)
+        await _due_now()
+        return await sender.process_batch()
+
+    # max_attempts=1 bo'lsa ham: flood limit xabarni 'failed' qilmaydi
+    for _ in range(3):
+        assert run(attempt()) == 1
+        assert dict(run(_outbox(501))) == {'status': 'pending', 'attempts': 0, 'deferred': True}
+    assert sender.stats() == {'sent': 0, 'retried': 3, 'failed': 0}
+
+    session.retry_after = 0.0
+    run(attempt())
+    assert run(_outbox(501))['status'] == 'sent'
+
+def test_network_error_uses_attempts(run):
+    sender = _sender(FakeBotSession(), global_rate=1000, max_attempts=1)
+    sender._bot = BrokenBot()
+    run(db.enqueue_notifications([(502, "avans", None)]))
+
+    run(_due_now())
+    run(sender.process_batch())
+    assert run(_outbox(502))['status'] == 'failed'
@@ -0,0 +1,62 @@
+from datetime import date
+from database import events
+from database import requests as db
+from utils.report_cache import ReportCache, CachedReport, YEAR_REPORT, report_cache
+
+def test_lru_eviction_and_file_id():
+    cache = ReportCache(max_entries=2)
+    cache.put((2025, 1, (1,)), CachedReport(b"a", 1))
+    cache.put((2025, 2, (1,)), CachedReport(b"b", 1))
+    assert cache.get((2025, 1, (1,))).data == b"a"   # endi eng yangi
+    cache.put((2025, 3, (1,)), CachedReport(b"c", 1))
+
+    assert cache.get((2025, 2, (1,))) is None
+    cache.set_file_id((2025, 1, (1,)), "file-1")
+    assert cache.get((2025, 1, (1,))).file_id == "file-1"
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2}
+
+def test_other_instance_change_evicts_month_and_year(monkeypatch):
+    monkeypatch.setattr(report_cache, "_entries", type(report_cache._entries)())
+    for key in [(2025, 3, (1,)), (2025, YEAR_REPORT, (1,)), (2025, 4, (1,)), (2024, 3, (1,))]:
+        report_cache.put(key, CachedReport(b"x", 1))
+
+    events._dispatch(events.ATTENDANCE_CHANGED, {"month": "2025-03"})
+    assert sorted(report_cache._entries) == [(2024, 3, (1,)), (2025, 4, (1,))]
+
+    # Bo'sh data (LISTEN qayta ulandi) - hammasi
+    events._dispatch(events.ADVANCE_CHANGED, {})
+    assert report_cache.stats()['size'] == 0
+
+# --- Kesh kaliti: ma'lumot versiyasi (TEST_DATABASE_URL, tests/conftest.py) ---
+
+def test_month_version_changes_with_month_data(run):
+    today = db.get_tashkent_time().date()
+    other_year = today.year - 1
+    run(db.add_worker("Aziz", 15000, 3001))
+    worker_id = run(db.get_active_worker_ids())[0]
+
+    def versions():
+        return (run(db.get_month_version(today.year, today.month)), run(db.get_year_version(today.year)),
+                run(db.get_month_version(other_year, today.month)))
+
+    month, year, other = versions()
+    run(db.add_attendance(worker_id, 8, "Keldi"))
+    month2, year2, other2 = versions()
+    assert month2 != month and year2 != year
+
+    run(db.add_attendance(worker_id, 10, "Keldi"))   # qayta yozish ham
+    month3, year3, _ = versions()
+    assert month3 != month2 and year3 != year2
+
+    run(db.add_advance(worker_id, 50000))
+    month4, _, _ = versions()
+    assert month4 != month3
+
+    run(db.update_worker_field(worker_id, "rate", 20000))   # ro'yxat (stavka) o'zgardi
+    month5, _, _ = versions()
+    assert month5 != month4
+
+    # Boshqa oyga yozuv bu oy kalitini o'zgartirmaydi
+    run(db.add_attendance_bulk([(worker_id, 8)], day=date(other_year, today.month, 1)))
+    assert versions()[0] == month5
+    assert versions()[2] != other2
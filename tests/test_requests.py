@@ -0,0 +1,39 @@
+from datetime import date
+import pytest
+from database.requests import attendance_delta, month_bounds, _like_escape
+
+def test_month_bounds_half_open():
+    assert month_bounds(2025, 2) == (date(2025, 2, 1), date(2025, 3, 1))
+    assert month_bounds(2024, 12) == (date(2024, 12, 1), date(2025, 1, 1))
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ali", "Ali"),
+    ("100%", "100\\%"),
+    ("a_b", "a\\_b"),
+    ("c:\\d", "c:\\\\d"),
+    ("\\%_", "\\\\\\%\\_"),
+])
+def test_like_escape(text, expected):
+    assert _like_escape(text) == expected
+
+@pytest.mark.parametrize("old, new, expected", [
+    (None, 8, (8.0, 1)),      # birinchi yozuv
+    (None, 0, (0.0, 0)),      # kelmadi deb yozildi
+    (8, 10, (2.0, 0)),        # soat o'zgardi, kun o'sha
+    (8, 0, (-8.0, -1)),       # keldi -> kelmadi
+    (0, 6, (6.0, 1)),         # kelmadi -> keldi
+    (7.5, 7.5, (0.0, 0)),     # qayta yozish o'zgarishsiz
+])
+def test_attendance_delta(old, new, expected):
+    assert attendance_delta(old, new) == expected
+
+def test_attendance_delta_sequence_matches_final_value():
+    # Bir kunni ketma-ket qayta yozish: farqlar yig'indisi oxirgi qiymatga teng
+    hours = days = 0
+    previous = None
+    for value in (8, 10, 0, 0, 4):
+        hours_delta, days_delta = attendance_delta(previous, value)
+        hours += hours_delta
+        days += days_delta
+        previous = value
+    assert (hours, days) == (4.0, 1)
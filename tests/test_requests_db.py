@@ -0,0 +1,87 @@
+"""database.requests: Postgres talab qiladigan testlar (TEST_DATABASE_URL, tests/conftest.py)"""
+from datetime import date
+import pytest
+from database import models
+from database import requests as db
+
+# Ismlar takrorlanadi: keyset tartibi (name, id) bo'yicha
+NAMES = ["Aziz", "Bekzod", "Bekzod", "Bekzod", "Dilnoza", "Jasur", "Jasur", "Madina", "Otabek", "Zafar", "Zarina"]
+
+@pytest.fixture(scope="module", autouse=True)
+def workers(run):
+    for code, name in enumerate(NAMES, 1000):
+        run(db.add_worker(name, 15000, code))
+
+def _expected_order(run):
+    workers = run(db.get_active_workers())
+    return [w['id'] for w in sorted(workers, key=lambda w: (w['name'], w['id']))]
+
+def test_keyset_pages_cover_all_workers_once(run):
+    ordered = _expected_order(run)
+    seen, cursor, pages = [], None, []
+    while True:
+        workers, has_prev, has_next = run(db.get_workers_page(cursor, "next", limit=3))
+        pages.append((has_prev, has_next))
+        seen += [w['id'] for w in workers]
+        if not has_next:
+            break
+        cursor = workers[-1]['id']
+
+    assert seen == ordered
+    assert pages[0] == (False, True)
+    assert pages[-1] == (True, False)
+    assert all(page == (True, True) for page in pages[1:-1])
+
+def test_keyset_prev_and_at(run):
+    ordered = _expected_order(run)
+    # Takrorlangan ism ichidagi kursor: "Bekzod" larning ikkinchisi
+    cursor = ordered[2]
+
+    workers, has_prev, has_next = run(db.get_workers_page(cursor, "prev", limit=3))
+    assert [w['id'] for w in workers] == ordered[:2]
+    assert (has_prev, has_next) == (False, True)
+
+    workers, has_prev, has_next = run(db.get_workers_page(cursor, "at", limit=3))
+    assert [w['id'] for w in workers] == ordered[2:5]
+    assert (has_prev, has_next) == (True, True)
+
+def test_keyset_exact_last_page(run):
+    ordered = _expected_order(run)
+    workers, has_prev, has_next = run(db.get_workers_page(ordered[-3], "at", limit=3))
+    assert [w['id'] for w in workers] == ordered[-3:]
+    assert (has_prev, has_next) == (True, False)
+
+def test_search_ranks_prefix_first_and_treats_wildcards_literally(run):
+    names = [w['name'] for w in run(db.search_worker_by_name("za"))]
+    # "Zafar", "Zarina" ism boshida; "Dilnoza" da oxirida
+    assert names[:2] == ["Zafar", "Zarina"]
+    assert "Dilnoza" in names
+    assert run(db.search_worker_by_name("%")) == []
+    assert run(db.search_worker_by_name("_")) == []
+
+async def _rollup_snapshot():
+    async with models.acquire() as conn:
+        rows = await conn.fetch("SELECT worker_id, month, hours, advances, days_present FROM payroll_monthly")
+    return {(r['worker_id'], r['month']): (float(r['hours']), float(r['advances']), r['days_present'])
+            for r in rows if r['hours'] or r['advances'] or r['days_present']}
+
+def test_attendance_rollup_matches_rebuild(run):
+    ids = run(db.get_active_worker_ids())
+    today = db.get_tashkent_time().date()
+
+    run(db.add_attendance(ids[0], 8, "Keldi"))
+    run(db.add_attendance(ids[0], 10, "Keldi"))       # qayta yozish: faqat farq
+    run(db.add_attendance(ids[1], 8, "Keldi"))
+    run(db.add_attendance(ids[1], 0, "Kelmadi"))      # keldi -> kelmadi
+    run(db.add_attendance_bulk([(ids[0], 6), (ids[2], 8), (ids[3], 0)]))
+    run(db.add_attendance_bulk([(ids[2], 9), (ids[4], 8)], day=date(today.year, today.month, 1)))
+    run(db.add_advance(ids[0], 50000))
+
+    incremental = run(_rollup_snapshot())
+    month = today.replace(day=1)
+    assert incremental[(ids[0], month)] == (6.0, 50000.0, 1)
+    assert (ids[1], month) not in incremental
+    assert (ids[3], month) not in incremental
+
+    run(db.rebuild_payroll_monthly())
+    assert run(_rollup_snapshot()) == incremental
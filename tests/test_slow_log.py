@@ -0,0 +1,77 @@
+import asyncio
+from database import slow_log
+from database.slow_log import SlowQueryLog, arg_shape, normalize_sql
+from utils import metrics
+
+SQL = "SELECT * FROM workers WHERE code = $1 AND name = 'Ali'  AND rate > 10.5"
+
+def test_normalize_sql_and_arg_shape():
+    assert normalize_sql(SQL) == "SELECT * FROM workers WHERE code = $1 AND name = ? AND rate > ?"
+    assert normalize_sql("SELECT 'it''s', t1.x\n  FROM t1") == "SELECT ?, t1.x FROM t1"
+    # Qiymat emas, faqat ko'rinish logga tushadi
+    assert [arg_shape(a) for a in (None, 7, "parol", [1, 2, 3], (), b"ab")] == \
+        ["null", "int", "str(5)", "list[int](3)", "list[?](0)", "bytes(2)"]
+
+def test_threshold():
+    log = SlowQueryLog(threshold_ms=100, sample=0)
+    before = metrics.SLOW_QUERIES.value("get_worker")
+    log.observe("get_worker", SQL, (1,), 0.099)
+    assert log.slow == 0
+    log.observe("get_worker", SQL, (1,), 0.1)
+    assert log.slow == 1
+    assert metrics.SLOW_QUERIES.value("get_worker") == before + 1
+
+    disabled = SlowQueryLog(threshold_ms=0, sample=1)
+    disabled.observe("get_worker", SQL, (1,), 60.0)
+    assert disabled.slow == 0
+
+def test_explain_sampling_cooldown_and_busy(monkeypatch):
+    log = SlowQueryLog(threshold_ms=100, sample=0.2, cooldown=600)
+    normalized = normalize_sql(SQL)
+
+    monkeypatch.setattr(slow_log.random, "random", lambda: 0.2)
+    assert not log._should_explain(normalized)          # namunaga tushmadi
+    monkeypatch.setattr(slow_log.random, "random", lambda: 0.19)
+    assert not log._should_explain("CREATE INDEX i ON t(x)")
+    assert log._should_explain(normalized)
+    assert not log._should_explain("SELECT 1")          # bitta EXPLAIN bir vaqtda
+
+    log._busy = False
+    assert not log._should_explain(normalized)          # cooldown
+    assert log._should_explain("SELECT 1")
+    log._busy = False
+    log._explained_at[normalized] -= 600
+    assert log._should_explain(normalized)
+
+    assert not SlowQueryLog(sample=0)._should_explain(normalized)
+
+# --- EXPLAIN (TEST_DATABASE_URL, tests/conftest.py) ---
+
+def test_explain_writes_plans_without_changing_data(run, tmp_path):
+    plan_file = tmp_path / "plans.log"
+    log = SlowQueryLog(threshold_ms=1, sample=1, cooldown=0, plan_file=str(plan_file))
+
+    async def observe(name, sql, args):
+        log.observe(name, sql, args, 0.5)
+        await asyncio.gather(*log._tasks)
+
+    async def count():
+        conn = await log._connection()
+        return await conn.fetchval("SELECT count(*) FROM workers")
+
+    try:
+        run(observe("count_workers", "SELECT count(*) FROM workers WHERE code > $1", (0,)))
+        run(observe("add_worker", "INSERT INTO workers (name, rate, code) VALUES ($1, $2, $3)", ("Ali", 10, 1)))
+        rows = run(count())
+    finally:
+        run(log.close())
+        for handler in list(log._plan_logger.handlers if log._plan_logger else []):
+            log._plan_logger.removeHandler(handler)
+            handler.close()
+
+    text = plan_file.read_text(encoding="utf-8")
+    assert log.explained == 2
+    assert "=== count_workers" in text and "| ANALYZE" in text and "Buffers" in text
+    assert "=== add_worker" in text and "faqat reja" in text and "Insert on workers" in text
+    assert "args: str(3), int, int" in text
+    assert rows == 0
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+from utils.webhook import ConcurrentRequestHandler, WebhookSettings
+from benchmarks.fake_telegram import FakeBotSession
+
+SECRET = "maxfiy_kalit-1"
+
+def test_settings_require_valid_secret():
+    WebhookSettings(base_url="https://bot.example.uz", secret=SECRET).validate()
+    for secret in ("", "bo'sh joy", "x" * 257):
+        with pytest.raises(ValueError):
+            WebhookSettings(base_url="https://bot.example.uz", secret=secret).validate()
+    with pytest.raises(ValueError):
+        WebhookSettings(base_url="", secret=SECRET).validate()
+
+def _update_json(update_id: int) -> str:
+    message = Message(message_id=update_id, date=datetime.now(), chat=Chat(id=1, type="private"),
+                      from_user=User(id=1, is_bot=False, first_name="Admin"), text="salom")
+    return Update(update_id=update_id, message=message).model_dump_json(exclude_none=True)
+
+def test_webhook_rejects_missing_or_wrong_secret():
+    received = []
+    router = Router()
+
+    @router.message()
+    async def on_message(message: Message):
+        received.append(message.message_id)
+
+    async def scenario():
+        dp = Dispatcher()
+        dp.include_router(router)
+        bot = Bot("42:TEST", session=FakeBotSession())
+        app = web.Application()
+        handler = ConcurrentRequestHandler(dp, bot, concurrency=2, secret_token=SECRET)
+        handler.register(app, path="/webhook")
+
+        statuses = []
+        async with TestClient(TestServer(app)) as client:
+            for update_id, headers in ((1, {}),
+                                       (2, {"X-Telegram-Bot-Api-Secret-Token": "boshqa"}),
+                                       (3, {"X-Telegram-Bot-Api-Secret-Token": SECRET})):
+                response = await client.post("/webhook", data=_update_json(update_id),
+                                             headers={"Content-Type": "application/json", **headers})
+                statuses.append(response.status)
+            # Qabul qilingan update fonda qayta ishlanadi
+            await asyncio.gather(*handler._background_feed_update_tasks)
+        return statuses
+
+    assert asyncio.run(scenario()) == [401, 401, 200]
+    assert received == [3]
@@ -0,0 +1,154 @@
+import csv
+import re
+from io import BytesIO, StringIO
+from typing import Dict, Iterable, List, Optional, Tuple
+from openpyxl import Workbook, load_workbook
+
+# Kunlik soat chegarasi
+MAX_HOURS = 24
+
+# "12 8", "12: 7.5", "12=8h", "12 - 8 soat"
+LINE_RE = re.compile(r"^\s*(\d+)\s*[\s:=;,\-]\s*(\d+(?:[.,]\d+)?)\s*(?:h|soat|s)?\s*$", re.IGNORECASE)
+# "hamma 8", "barchasi: 8", "* 8" - ro'yxatda yo'q aktiv ishchilarga
+DEFAULT_RE = re.compile(r"^\s*(?:hamma|barchasi|\*)\s*[\s:=]?\s*(\d+(?:[.,]\d+)?)\s*(?:h|soat|s)?\s*$", re.IGNORECASE)
+
+# Jadval faylidagi ustun sarlavhalari
+ID_HEADERS = {"id", "№", "raqam"}
+HOURS_HEADERS = {"soat", "hours", "soatlar"}
+
+class BulkInput:
+    """Ommaviy kiritish natijasi (hali bazaga tekshirilmagan)
+
+    rows: [(satr raqami, worker_id, soat), ...]; default: qolgan aktiv ishchilar uchun soat
+    errors: [(satr raqami, sabab), ...]
+    """
+    __slots__ = ("rows", "default", "errors")
+
+    def __init__(self):
+        self.rows: List[Tuple[int, int, float]] = []
+        self.default: Optional[float] = None
+        self.errors: List[Tuple[int, str]] = []
+
+def _hours(raw) -> float:
+    return float(str(raw).strip().replace(",", "."))
+
+def parse_lines(text: str) -> BulkInput:
+    """Xabardagi "id soat" qatorlari (bo'sh qatorlar tashlab ketiladi)"""
+    result = BulkInput()
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        default = DEFAULT_RE.match(line)
+        if default:
+            if result.default is not None:
+                result.errors.append((line_no, "\"hamma\" ikki marta berilgan"))
+            result.default = _hours(default.group(1))
+            continue
+        match = LINE_RE.match(line)
+        if not match:
+            result.errors.append((line_no, f"format noto'g'ri: <code>{line.strip()[:30]}</code>"))
+            continue
+        result.rows.append((line_no, int(match.group(1)), _hours(match.group(2))))
+    return result
+
+def _table_rows(filename: str, data: bytes) -> Iterable[list]:
+    if filename.lower().endswith(".xlsx"):
+        workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+        return
+
+    text = data.decode("utf-8-sig")
+    try:
+        dialect = csv.Sniffer().sniff(text[:2048], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(StringIO(text), dialect)
+
+def parse_timesheet(filename: str, data: bytes) -> BulkInput:
+    """To'ldirilgan jadval (xlsx/csv/tsv). Ustunlar sarlavha bo'yicha (id, soat),
+    sarlavha bo'lmasa - birinchi ustun id, oxirgisi soat. Soat bo'sh qatorlar tashlab ketiladi.
+    O'qib bo'lmaydigan fayl uchun ValueError.
+    """
+    result = BulkInput()
+    id_col, hours_col = 0, -1
+    try:
+        rows = list(_table_rows(filename, data))
+    except Exception as e:
+        raise ValueError(f"faylni o'qib bo'lmadi: {e}") from e
+
+    for line_no, row in enumerate(rows, start=1):
+        cells = ["" if cell is None else str(cell).strip() for cell in row]
+        if not any(cells):
+            continue
+        header = [cell.lower() for cell in cells]
+        if line_no == 1 and ID_HEADERS & set(header):
+            id_col = next(i for i, cell in enumerate(header) if cell in ID_HEADERS)
+            hours_col = next((i for i, cell in enumerate(header) if cell in HOURS_HEADERS), -1)
+            continue
+        try:
+            raw_id, raw_hours = cells[id_col], cells[hours_col]
+        except IndexError:
+            result.errors.append((line_no, "ustunlar yetarli emas"))
+            continue
+        if raw_hours == "":
+            continue
+        try:
+            # xlsx dan raqamlar "12.0" bo'lib keladi
+            result.rows.append((line_no, int(float(raw_id)), _hours(raw_hours)))
+        except ValueError:
+            result.errors.append((line_no, f"format noto'g'ri: <code>{raw_id[:10]} | {raw_hours[:10]}</code>"))
+    return result
+
+def validate(bulk: BulkInput, active_ids: Iterable[int]) -> Tuple[Dict[int, float], List[Tuple[int, str]]]:
+    """Bir o'tishda tekshirish: soat oralig'i, noma'lum/nofaol id, takrorlar.
+
+    active_ids: kiritilgan id lar ichidagi aktivlari (default berilgan bo'lsa - barcha aktivlar).
+    Qaytaradi: ({worker_id: soat}, xatolar). Xato bo'lsa hech narsa yozilmasligi kerak.
+    """
+    active = set(active_ids)
+    errors = list(bulk.errors)
+    entries: Dict[int, float] = {}
+    seen: Dict[int, int] = {}
+
+    if bulk.default is not None and not 0 <= bulk.default <= MAX_HOURS:
+        errors.append((0, f"\"hamma\" soati 0-{MAX_HOURS} oralig'ida bo'lishi kerak"))
+
+    for line_no, worker_id, hours in bulk.rows:
+        if worker_id in seen:
+            errors.append((line_no, f"ID {worker_id} takrorlangan ({seen[worker_id]}-qatorda ham bor)"))
+            continue
+        seen[worker_id] = line_no
+        if worker_id not in active:
+            errors.append((line_no, f"ID {worker_id} topilmadi yoki arxivda"))
+        elif not 0 <= hours <= MAX_HOURS:
+            errors.append((line_no, f"ID {worker_id}: {hours:g} soat (0-{MAX_HOURS} bo'lishi kerak)"))
+        else:
+            entries[worker_id] = hours
+
+    if bulk.default is not None:
+        for worker_id in active:
+            entries.setdefault(worker_id, bulk.default)
+
+    errors.sort(key=lambda error: error[0])
+    return entries, errors
+
+def format_errors(errors: List[Tuple[int, str]], limit: int = 15) -> str:
+    lines = [f"• {f'{line_no}-qator: ' if line_no else ''}{reason}" for line_no, reason in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"… va yana {len(errors) - limit} ta xato")
+    return "\n".join(lines)
+
+def timesheet_template(workers: List[Dict]) -> bytes:
+    """Bo'sh tabel: id, ism, soat (soat ustuni to'ldiriladi va botga qaytariladi)"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Tabel")
+    sheet.append(["id", "ism", "soat"])
+    for worker in workers:
+        sheet.append([worker['id'], worker['name'], None])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
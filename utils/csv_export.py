@@ -0,0 +1,72 @@
+import calendar
+import gzip
+import os
+import tempfile
+from datetime import date, datetime
+from typing import List, Tuple
+from database import requests as db
+
+# Buyruqdagi nomlar -> database.requests.EXPORT_QUERIES kalitlari
+EXPORT_KINDS = {
+    "davomat": "attendance",
+    "avans": "advances",
+    "oylik": "payroll",
+}
+
+# Format -> ajratuvchi belgi
+EXPORT_FORMATS = {
+    "csv": ",",
+    "tsv": "\t",
+}
+
+def export_filename(kind: str, start_date: date, end_date: date, fmt: str = "csv", compressed: bool = True) -> str:
+    """Eksport fayli nomi"""
+    name = f"eksport_{kind}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{fmt}"
+    return f"{name}.gz" if compressed else name
+
+def parse_period(tokens: List[str], today: date) -> Tuple[date, date]:
+    """Buyruq argumentlaridan oraliq (ikkala chegara ham kiradi)
+
+    []                        - joriy oy
+    ["2025"]                  - butun yil
+    ["2025-03"]               - bitta oy
+    ["2024-01-01", "2025-12-31"] - ixtiyoriy oraliq
+    Noto'g'ri format bo'lsa ValueError.
+    """
+    if not tokens:
+        return date(today.year, today.month, 1), today
+
+    if len(tokens) == 1:
+        token = tokens[0]
+        if len(token) == 4:
+            year = int(token)
+            return date(year, 1, 1), date(year, 12, 31)
+        parsed = datetime.strptime(token, "%Y-%m").date()
+        last_day = calendar.monthrange(parsed.year, parsed.month)[1]
+        return parsed, parsed.replace(day=last_day)
+
+    if len(tokens) == 2:
+        start_date = datetime.strptime(tokens[0], "%Y-%m-%d").date()
+        end_date = datetime.strptime(tokens[1], "%Y-%m-%d").date()
+        if start_date > end_date:
+            raise ValueError("start > end")
+        return start_date, end_date
+
+    raise ValueError("too many arguments")
+
+async def export_to_file(kind: str, start_date: date, end_date: date, fmt: str = "csv") -> Tuple[str, int]:
+    """Eksportni vaqtinchalik .gz faylga yozish
+
+    COPY bo'laklari kelishi bilan siqilib diskka yoziladi (asyncpg yozishni
+    executor da bajaradi), shuning uchun xotira oraliq uzunligiga bog'liq emas.
+    Qaytaradi: (fayl yo'li, qatorlar soni). Faylni chaqiruvchi o'chiradi.
+    Baza xatosida DatabaseError (chala fayl o'chiriladi).
+    """
+    fd, path = tempfile.mkstemp(prefix=f"eksport_{kind}_", suffix=f".{fmt}.gz")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as output:
+            rows = await db.copy_export(kind, start_date, end_date, output, EXPORT_FORMATS[fmt])
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, rows
@@ -1,9 +1,12 @@
 import calendar
+from io import BytesIO
 from datetime import datetime, date
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Callable, Optional, Tuple
 import logging
 
 # --- STILLAR VA FORMATLAR ---
@@ -14,210 +17,431 @@ class ExcelStyles:
     ABSENT_FILL = PatternFill(start_color="F4CCCC", end_color="F4CCCC", fill_type="solid")
     POSITIVE_FILL = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
     WARNING_FILL = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
-    
+
     # Shriftlar
     TITLE_FONT = Font(bold=True, name='Arial', size=14)
     HEADER_FONT = Font(bold=True, name='Arial', size=11)
     DATA_FONT = Font(name='Arial', size=10)
     BOLD_FONT = Font(bold=True, name='Arial', size=10)
-    
+
     # Joylashuv
     CENTER_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
     LEFT_ALIGN = Alignment(horizontal="left", vertical="center")
     RIGHT_ALIGN = Alignment(horizontal="right", vertical="center")
-    
+
     # Chegaralar
     THIN_BORDER = Border(
         left=Side(style='thin'), right=Side(style='thin'),
         top=Side(style='thin'), bottom=Side(style='thin')
     )
 
+# Kitobda bir marta ro'yxatdan o'tkaziladigan nomli stillar
+TITLE_STYLE = "hisobot_sarlavha"
+HEADER_STYLE = "hisobot_ustun"
+COUNTER_STYLE = "hisobot_raqam"
+NAME_STYLE = "hisobot_ism"
+DAY_STYLE = "hisobot_kun"
+MONEY_STYLE = "hisobot_summa"
+TOTAL_STYLE = "hisobot_jami"
+NET_STYLE = "hisobot_qolga"
+# Ishlamagan kun belgisi (nomli stil emas): katak DAY_STYLE bilan yoziladi,
+# rang esa varaqdagi bitta shartli formatlash qoidasidan keladi
+ABSENT = "ishlamagan"
+
+# Ustun kengliklari: № , F.I.O, kunlar, hisob ustunlari
+COUNTER_WIDTH = 6
+NAME_WIDTH = 35
+DAY_WIDTH = 5
+CALC_WIDTH = 15
+MAX_WIDTH = 50
+
 # O'zbekcha oy nomlari
 MONTHS_UZ = {
     1: "YANVAR", 2: "FEVRAL", 3: "MART", 4: "APREL", 5: "MAY", 6: "IYUN",
     7: "IYUL", 8: "AVGUST", 9: "SENTABR", 10: "OKTABR", 11: "NOYABR", 12: "DEKABR"
 }
 
-def generate_report(year: int, month: int, workers_data: List[Dict], 
-                   attendance_data: Dict, advances_data: Dict) -> str:
+def report_filename(year: int, month: int) -> str:
+    """Hisobot fayli nomi"""
+    return f"hisobot_{MONTHS_UZ.get(month, month)}_{year}.xlsx"
+
+def year_report_filename(year: int) -> str:
+    """Yillik hisobot fayli nomi"""
+    return f"hisobot_YIL_{year}.xlsx"
+
+# Har necha qatorda progress xabar qilinadi
+PROGRESS_STEP = 200
+
+def generate_report_bytes(year: int, month: int, workers_data: List[Dict],
+                          attendance_data: Dict, advances_data: Dict,
+                          progress: Optional[Callable[[int, int], None]] = None) -> bytes:
     """
-    Excel hisobot yaratish
+    Excel hisobotni oqim rejimida (write-only) xotiraga yaratish.
+    Qatorlar yozilishi bilan chiqariladi, diskka hech narsa yozilmaydi.
+    progress(yozilgan, jami) - har PROGRESS_STEP qatorda chaqiriladi.
     """
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"{month:02d}-{year}"
-        
-        # Ma'lumotlarni saralash (faqat ism bo'yicha)
-        workers_data.sort(key=lambda x: x['name'])
-        
-        num_days = calendar.monthrange(year, month)[1]
-        styles = ExcelStyles()
-        
-        # SARLAVHA YARATISH
-        _create_header(ws, year, month, num_days, styles)
-        
-        # ISHCHI MA'LUMOTLARINI QO'SHISH
-        _add_worker_data(ws, workers_data, attendance_data, advances_data, 
-                        year, month, num_days, styles)
-        
-        # AUTOSIZE USTUNLAR
-        _auto_adjust_columns(ws)
-        
-        # FAYLNI SAQLASH
-        filename = f"hisobot_{MONTHS_UZ.get(month, month)}_{year}.xlsx"
-        wb.save(filename)
-        logging.info(f"✅ Excel hisobot yaratildi: {filename}")
-        return filename
-        
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(f"{month:02d}-{year}")
+        _register_styles(wb, ExcelStyles())
+        rows, totals = _month_rows(year, month, workers_data, attendance_data, advances_data)
+        _write_month_sheet(ws, year, month, rows, progress)
+
+        buffer = BytesIO()
+        wb.save(buffer)
+        logging.info(f"✅ Excel hisobot (oqim) yaratildi: {len(totals)} ishchi, {buffer.tell()} bayt")
+        return buffer.getvalue()
+
     except Exception as e:
-        logging.error(f"❌ Excel hisobot yaratishda xato: {e}")
+        logging.error(f"❌ Excel hisobot (oqim) yaratishda xato: {e}")
         raise
 
-def _create_header(ws, year, month, num_days, styles):
-    """Sarlavha va ustunlarni yaratish"""
-    # Asosiy sarlavha
+def _month_rows(year, month, workers_data, attendance_data,
+                advances_data) -> Tuple[List[List[Tuple[Any, str]]], Dict[int, float]]:
+    """Oy varag'i qatorlari (ism bo'yicha). Qaytaradi: (qatorlar, ishchi id -> jami soat)"""
+    num_days = calendar.monthrange(year, month)[1]
+    rows = []
+    totals: Dict[int, float] = {}
+    for idx, worker in enumerate(sorted(workers_data, key=lambda x: x['name']), 1):
+        row = _worker_row(idx, worker, attendance_data, advances_data, year, month, num_days)
+        rows.append(row)
+        totals[worker['id']] = row[num_days + 3][0]
+    return rows, totals
+
+def _write_month_sheet(ws, year, month, rows: List[List[Tuple[Any, str]]],
+                       progress: Optional[Callable[[int, int], None]] = None):
+    """Tayyor qatorlarni oy varag'iga write-only rejimda yozish"""
+    num_days = calendar.monthrange(year, month)[1]
+    total_cols = 2 + num_days + 5
+
+    # Write-only rejimda ustun kengliklari qatorlardan oldin beriladi:
+    # eng uzun ism oldindan ma'lum, qolganlari sarlavhadagi kengliklar
+    name_len = max([len(str(row[1][0])) for row in rows] + [0])
+    _apply_widths(ws, {2: name_len}, num_days)
+
+    # SARLAVHA
     month_name = MONTHS_UZ.get(month, f"OY-{month}")
-    total_cols = 2 + num_days + 5  # № + Ism + Kunlar + Hisob ustunlari
-    
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=total_cols)
-    title_cell = ws.cell(1, 1, f"{month_name} {year} - DAVOMAT VA HISOBOT")
-    title_cell.font = styles.TITLE_FONT
-    title_cell.alignment = styles.CENTER_ALIGN
-    title_cell.fill = styles.HEADER_FILL
-    
-    # Ustun sarlavhalari
-    headers = ["№", "F.I.O"] + [str(day) for day in range(1, num_days + 1)] + [
-        "Soatlik narx", "Jami soat", "Avans", "Hisoblangan", "Qo'lga tegadi"
-    ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(2, col, header)
-        cell.font = styles.HEADER_FONT
-        cell.fill = styles.HEADER_FILL
-        cell.alignment = styles.CENTER_ALIGN
-        cell.border = styles.THIN_BORDER
-        
-        # Ustun kengliklari
+    ws.merged_cells.add(f"A1:{get_column_letter(total_cols)}1")
+    writer = _SheetWriter(ws)
+    writer.append([(f"{month_name} {year} - DAVOMAT VA HISOBOT", TITLE_STYLE)])
+    writer.append([(h, HEADER_STYLE) for h in _header_titles(num_days)])
+
+    # ISHCHI QATORLARI
+    for idx, row in enumerate(rows, 1):
+        writer.append(row)
+        if progress and (idx % PROGRESS_STEP == 0 or idx == len(rows)):
+            progress(idx, len(rows))
+
+    writer.add_absent_formatting()
+    _add_net_formatting(ws, num_days, len(rows))
+
+# --- YILLIK HISOBOT (bitta kitob: yig'ma varaq + oy varaqlari) ---
+
+def _as_date(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+def split_year_data(year: int, months: List[int], workers_data: List[Dict],
+                    attendance_rows, advance_rows) -> Dict[int, Tuple[List[Dict], List[Tuple], Dict]]:
+    """Yillik so'rov natijalarini oylarga ajratish: oy -> (ishchilar, davomat, avanslar)
+
+    attendance_rows: worker_id, month, days[], hours[] (get_year_attendance)
+    advance_rows: worker_id, month, total (get_year_advances)
+    Natija pool ga (process rejimida boshqa jarayonga) uzatiladi, shuning uchun faqat oddiy turlar ishlatiladi.
+    Ishchisi yo'q oylar tashlab ketiladi.
+    """
+    month_data = {}
+    for month in months:
+        month_start = date(year, month, 1)
+        month_end = date(year, month, calendar.monthrange(year, month)[1])
+        roster = [
+            w for w in workers_data
+            if (w.get('created_at') is None or _as_date(w['created_at']) <= month_end)
+            and (w.get('archived_at') is None or _as_date(w['archived_at']) >= month_start)
+        ]
+        if roster:
+            month_data[month] = (roster, [], {})
+
+    for row in attendance_rows:
+        if row['month'] in month_data:
+            month_data[row['month']][1].append((row['worker_id'], row['days'], row['hours']))
+    for row in advance_rows:
+        if row['month'] in month_data:
+            month_data[row['month']][2][row['worker_id']] = row['total']
+    return month_data
+
+def _month_attendance(year: int, month: int, attendance_rows: List[Tuple]) -> Dict:
+    """split_year_data dagi (worker_id, kunlar, soatlar) -> _worker_row kaliti (worker_id, 'YYYY-MM-DD')"""
+    prefix = f"{year}-{month:02d}-"
+    attendance_data = {}
+    for worker_id, days, hours in attendance_rows:
+        for day, value in zip(days, hours):
+            attendance_data[(worker_id, f"{prefix}{day:02d}")] = value
+    return attendance_data
+
+def build_month_rows(year: int, month: int, workers_data: List[Dict], attendance_rows: List[Tuple],
+                     advances_data: Dict) -> Tuple[List[List[Tuple[Any, str]]], Dict[int, float]]:
+    """Yillik hisobotning bitta oyi: qatorlar va jami soatlar (kitobga hali yozilmaydi)
+
+    Argumentlar - split_year_data dagi oy qiymati. Oylar bir-biridan mustaqil, shuning uchun
+    report_service.run_parallel ularni process pool da parallel hisoblaydi; natija oddiy
+    turlardan iborat (pickle qilinadi) va generate_year_report_bytes ga uzatiladi.
+    """
+    return _month_rows(year, month, workers_data, _month_attendance(year, month, attendance_rows),
+                       advances_data)
+
+def generate_year_report_bytes(year: int, month_data: Dict[int, Tuple[List[Dict], List[Tuple], Dict]],
+                               month_rows: Optional[Dict[int, Tuple[List[List[Tuple[Any, str]]], Dict[int, float]]]] = None,
+                               progress: Optional[Callable[[int, int], None]] = None) -> bytes:
+    """Yillik hisobot: bitta write-only kitob, yig'ma varaq va har oy uchun alohida varaq
+
+    month_data - split_year_data natijasi, month_rows - har oy uchun build_month_rows natijasi
+    (berilmasa shu yerda ketma-ket hisoblanadi). Oy varaqlari tartib bilan yoziladi. Yig'ma varaq birinchi yaratiladi, lekin oxirida
+    yoziladi (write-only varaqlar bir-biridan mustaqil).
+    progress(yozilgan oylar, jami) - har bir oy varag'idan keyin chaqiriladi.
+    """
+    try:
+        months = sorted(month_data)
+        wb = Workbook(write_only=True)
+        summary = wb.create_sheet(f"Yillik-{year}")
+        _register_styles(wb, ExcelStyles())
+
+        totals: Dict[int, Dict[int, float]] = {}
+        for done, month in enumerate(months, 1):
+            rows, totals[month] = (month_rows[month] if month_rows is not None
+                                   else build_month_rows(year, month, *month_data[month]))
+            _write_month_sheet(wb.create_sheet(f"{month:02d}-{year}"), year, month, rows)
+            if progress:
+                progress(done, len(months))
+
+        workers_count = _write_year_summary(summary, year, months, month_data, totals)
+
+        buffer = BytesIO()
+        wb.save(buffer)
+        logging.info(f"✅ Yillik Excel hisobot yaratildi: {len(months)} oy, {workers_count} ishchi, {buffer.tell()} bayt")
+        return buffer.getvalue()
+
+    except Exception as e:
+        logging.error(f"❌ Yillik Excel hisobot yaratishda xato: {e}")
+        raise
+
+def _write_year_summary(ws, year, months, month_data, totals) -> int:
+    """Yig'ma varaq: oylik sahifalar bilan bir xil tuzilish, kunlar o'rnida oylar"""
+    workers: Dict[int, Dict] = {}
+    for month in months:
+        for worker in month_data[month][0]:
+            workers[worker['id']] = worker
+    ordered = sorted(workers.values(), key=lambda x: x['name'])
+
+    num_cols = len(months)
+    total_cols = 2 + num_cols + 5
+    name_len = max([len(str(w['name'])) for w in ordered] + [0])
+    month_len = max(len(MONTHS_UZ[m]) for m in months)
+    _apply_widths(ws, {2: name_len, **{col: month_len for col in range(3, num_cols + 3)}}, num_cols)
+
+    ws.merged_cells.add(f"A1:{get_column_letter(total_cols)}1")
+    writer = _SheetWriter(ws)
+    writer.append([(f"{year} - YILLIK HISOBOT", TITLE_STYLE)])
+    titles = ["№", "F.I.O"] + [MONTHS_UZ[m] for m in months] + CALC_TITLES
+    writer.append([(h, HEADER_STYLE) for h in titles])
+
+    for idx, worker in enumerate(ordered, 1):
+        worker_id = worker['id']
+        row = [(idx, COUNTER_STYLE), (worker['name'], NAME_STYLE)]
+        total_hours = 0
+        advance = 0
+        for month in months:
+            hours = totals[month].get(worker_id)
+            if hours is None:  # Shu oyda ro'yxatda bo'lmagan
+                row.append((None, ABSENT))
+                continue
+            total_hours += hours
+            advance += month_data[month][2].get(worker_id, 0)
+            row.append((hours or None, DAY_STYLE))
+
+        rate = float(worker['rate'])
+        calculated = total_hours * rate
+        row += [
+            (rate, MONEY_STYLE),
+            (total_hours, TOTAL_STYLE),
+            (advance, MONEY_STYLE),
+            (calculated, MONEY_STYLE),
+            (calculated - advance, NET_STYLE),
+        ]
+        writer.append(row)
+
+    writer.add_absent_formatting()
+    _add_net_formatting(ws, num_cols, len(ordered))
+    return len(ordered)
+
+def _stream_cell(ws, value, style: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value)
+    cell.style = style
+    return cell
+
+class _SheetWriter:
+    """Write-only varaqqa (qiymat, stil) qatorlarini yozish
+
+    - cell.style nomni har safar stillar ro'yxatidan qidiradi, shuning uchun har stil uchun
+      bitta WriteOnlyCell yaratiladi va faqat qiymati almashtiriladi: append() katakni
+      generatordan olishi bilan XML ga yozadi, keyingi qiymatgacha u bo'shaydi
+    - ABSENT kataklar DAY_STYLE bilan yoziladi, manzillari yig'ilib varaqqa bitta
+      shartli formatlash qoidasi bilan beriladi (_add_net_formatting kabi)
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._cells: Dict[str, WriteOnlyCell] = {}
+        self._absent: List[str] = []
+        self._row = 0
+
+    def append(self, values: Iterable[Tuple[Any, str]]):
+        self._row += 1
+        self.ws.append(self._row_cells(values))
+
+    def _row_cells(self, values: Iterable[Tuple[Any, str]]) -> Iterator[WriteOnlyCell]:
+        start = None  # ishlamagan kunlar ketma-ketligining birinchi ustuni
+        col = 0
+        for col, (value, style) in enumerate(values, 1):
+            if style == ABSENT:
+                if start is None:
+                    start = col
+                style = DAY_STYLE
+            elif start is not None:
+                self._add_absent(start, col - 1)
+                start = None
+
+            cell = self._cells.get(style)
+            if cell is None:
+                cell = self._cells[style] = _stream_cell(self.ws, None, style)
+            cell.value = value
+            yield cell
+
+        if start is not None:
+            self._add_absent(start, col)
+
+    def _add_absent(self, first_col: int, last_col: int):
+        first = f"{get_column_letter(first_col)}{self._row}"
+        last = f"{get_column_letter(last_col)}{self._row}"
+        self._absent.append(first if first == last else f"{first}:{last}")
+
+    def add_absent_formatting(self):
+        """Barcha ishlamagan kunlar - bitta qoida, bir nechta oraliq"""
+        if self._absent:
+            self.ws.conditional_formatting.add(
+                " ".join(self._absent),
+                FormulaRule(formula=['TRUE'], fill=ExcelStyles.ABSENT_FILL)
+            )
+
+def _register_styles(wb, styles):
+    """Nomli stillarni kitobga bir marta qo'shish (har katakka alohida obyekt yaratilmaydi)
+
+    Kataklar stilni nomi bilan oladi: cell.style = NAME_STYLE (oddiy va write-only rejimda).
+    Ishlamagan kunlar rangi nomli stil emas - _SheetWriter.add_absent_formatting.
+    """
+    def add(name, font=None, fill=None, alignment=None, border=None, number_format=None):
+        style = NamedStyle(name=name)
+        if font: style.font = font
+        if fill: style.fill = fill
+        if alignment: style.alignment = alignment
+        if border: style.border = border
+        if number_format: style.number_format = number_format
+        wb.add_named_style(style)
+
+    add(TITLE_STYLE, styles.TITLE_FONT, styles.HEADER_FILL, styles.CENTER_ALIGN)
+    add(HEADER_STYLE, styles.HEADER_FONT, styles.HEADER_FILL, styles.CENTER_ALIGN, styles.THIN_BORDER)
+    add(COUNTER_STYLE, alignment=styles.CENTER_ALIGN, border=styles.THIN_BORDER)
+    add(NAME_STYLE, styles.DATA_FONT, alignment=styles.LEFT_ALIGN, border=styles.THIN_BORDER)
+    add(DAY_STYLE, styles.DATA_FONT, alignment=styles.CENTER_ALIGN, border=styles.THIN_BORDER)
+    add(MONEY_STYLE, border=styles.THIN_BORDER, number_format='#,##0')
+    add(TOTAL_STYLE, styles.BOLD_FONT, alignment=styles.CENTER_ALIGN, border=styles.THIN_BORDER)
+    # Qo'lga tegadi: asosiy rang yashil, manfiy bo'lsa shartli formatlash sariq qiladi
+    add(NET_STYLE, styles.BOLD_FONT, styles.POSITIVE_FILL, border=styles.THIN_BORDER, number_format='#,##0')
+
+# Hisob ustunlari (oylik va yillik varaqlarda bir xil)
+CALC_TITLES = ["Soatlik narx", "Jami soat", "Avans", "Hisoblangan", "Qo'lga tegadi"]
+
+def _header_titles(num_days: int) -> List[str]:
+    return ["№", "F.I.O"] + [str(day) for day in range(1, num_days + 1)] + CALC_TITLES
+
+def _apply_widths(ws, widths: Dict[int, int], num_days: int):
+    """Ustun kengliklari: sarlavhadagi kenglik minimal, eng uzun qiymat bo'yicha kengayadi"""
+    total_cols = 2 + num_days + 5
+    for col in range(1, total_cols + 1):
         if col == 1:  # №
-            ws.column_dimensions[get_column_letter(col)].width = 6
+            base = COUNTER_WIDTH
         elif col == 2:  # F.I.O
-            ws.column_dimensions[get_column_letter(col)].width = 35
-        elif 3 <= col <= num_days + 2:  # Kunlar
-            ws.column_dimensions[get_column_letter(col)].width = 5
+            base = NAME_WIDTH
+        elif col <= num_days + 2:  # Kunlar
+            base = DAY_WIDTH
         else:  # Hisob ustunlari
-            ws.column_dimensions[get_column_letter(col)].width = 15
-
-def _add_worker_data(ws, workers_data, attendance_data, advances_data, 
-                    year, month, num_days, styles):
-    """Ishchi ma'lumotlarini qo'shish"""
-    current_row = 3
-    
-    for idx, worker in enumerate(workers_data, 1):
-        _add_worker_row(ws, current_row, idx, worker, attendance_data, 
-                       advances_data, year, month, num_days, styles)
-        current_row += 1
-
-def _add_worker_row(ws, row, counter, worker, attendance_data, advances_data,
-                   year, month, num_days, styles):
-    """Ishchi qatorini qo'shish"""
-    # № va Ism
-    cell_num = ws.cell(row, 1, counter)
-    cell_num.border = styles.THIN_BORDER
-    cell_num.alignment = styles.CENTER_ALIGN
-    
-    cell_name = ws.cell(row, 2, worker['name'])
-    cell_name.border = styles.THIN_BORDER
-    cell_name.alignment = styles.LEFT_ALIGN
-    cell_name.font = styles.DATA_FONT
-    
-    # DAVOMAT KUNLARI
-    total_hours = 0
-    
+            base = CALC_WIDTH
+
+        tracked = widths.get(col)
+        width = max(base, min(tracked + 2, MAX_WIDTH)) if tracked else base
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+def _add_net_formatting(ws, num_days: int, workers_count: int):
+    """Manfiy 'Qo'lga tegadi' qiymatlarini bitta shartli formatlash qoidasi bilan belgilash"""
+    if not workers_count:
+        return
+    net_col = get_column_letter(num_days + 7)
+    ws.conditional_formatting.add(
+        f"{net_col}3:{net_col}{workers_count + 2}",
+        CellIsRule(operator='lessThan', formula=['0'], fill=ExcelStyles.WARNING_FILL)
+    )
+
+def _worker_row(counter, worker, attendance_data, advances_data,
+                year, month, num_days) -> List[Tuple[Any, str]]:
+    """Ishchi qatori: (qiymat, stil) juftliklari"""
     # created_at va archived_at ni xavfsiz olish
     created_at = worker.get('created_at')
     archived_at = worker.get('archived_at')
-    
-    # Agar created_at bo'lmasa, oyning birinchi kuni deb olamiz
-    if created_at is None:
-        created_at = date(year, month, 1)
-    elif isinstance(created_at, datetime):
+
+    if isinstance(created_at, datetime):
         created_at = created_at.date()
-    
-    # Agar archived_at bo'lmasa, None qoldiramiz
-    if archived_at and isinstance(archived_at, datetime):
+    if isinstance(archived_at, datetime):
         archived_at = archived_at.date()
-    
+
+    # Ishlagan kunlar oralig'i (ishga kirmasdan oldin va ketgandan keyin - ishlamagan)
+    month_start = date(year, month, 1)
+    month_end = date(year, month, num_days)
+    first_day = 1 if created_at is None or created_at <= month_start else (
+        created_at.day if created_at <= month_end else num_days + 1)
+    last_day = num_days if archived_at is None or archived_at >= month_end else (
+        archived_at.day if archived_at >= month_start else 0)
+
+    values: List[Tuple[Any, str]] = [(counter, COUNTER_STYLE), (worker['name'], NAME_STYLE)]
+
+    # DAVOMAT KUNLARI
+    total_hours = 0
+    worker_id = worker['id']
+    prefix = f"{year}-{month:02d}-"
+
     for day in range(1, num_days + 1):
-        col = day + 2
-        current_date = date(year, month, day)
-        date_key = f"{year}-{month:02d}-{day:02d}"
-        
-        cell = ws.cell(row, col)
-        cell.border = styles.THIN_BORDER
-        cell.alignment = styles.CENTER_ALIGN
-        
-        # Ishlamagan kunlarni belgilash (ishga kirmasdan oldin yoki ketgandan keyin)
-        if (current_date < created_at) or (archived_at and current_date > archived_at):
-            cell.fill = styles.ABSENT_FILL
+        if day < first_day or day > last_day:
+            values.append((None, ABSENT))
+            continue
+
+        # attendance_data kaliti (worker_id, 'YYYY-MM-DD') formatida
+        hours = attendance_data.get((worker_id, f"{prefix}{day:02d}"), 0)
+        if hours > 0:
+            total_hours += hours
+            values.append((hours, DAY_STYLE))
         else:
-            # attendance_data kaliti (worker_id, 'YYYY-MM-DD') formatida
-            hours = attendance_data.get((worker['id'], date_key), 0)
-            if hours > 0:
-                cell.value = hours
-                cell.font = styles.DATA_FONT
-                total_hours += hours
-            else:
-                # Agar ish kuni bo'lsa-yu soat bo'lmasa, bo'sh qoladi yoki 0
-                pass
-    
+            values.append((None, DAY_STYLE))
+
     # HISOB-KITOBlAR
-    start_calc = num_days + 3
     rate = float(worker['rate'])
-    advance = advances_data.get(worker['id'], 0)
+    advance = advances_data.get(worker_id, 0)
     calculated = total_hours * rate
     net_amount = calculated - advance
-    
-    # Soatlik narx
-    c_rate = ws.cell(row, start_calc, rate)
-    c_rate.border = styles.THIN_BORDER
-    c_rate.number_format = '#,##0'
-    
-    # Jami soat
-    c_total = ws.cell(row, start_calc + 1, total_hours)
-    c_total.border = styles.THIN_BORDER
-    c_total.font = styles.BOLD_FONT
-    c_total.alignment = styles.CENTER_ALIGN
-    
-    # Avans
-    c_adv = ws.cell(row, start_calc + 2, advance)
-    c_adv.border = styles.THIN_BORDER
-    c_adv.number_format = '#,##0'
-    
-    # Hisoblangan
-    c_calc = ws.cell(row, start_calc + 3, calculated)
-    c_calc.border = styles.THIN_BORDER
-    c_calc.number_format = '#,##0'
-    
-    # Qo'lga tegadi
-    c_net = ws.cell(row, start_calc + 4, net_amount)
-    c_net.border = styles.THIN_BORDER
-    c_net.font = styles.BOLD_FONT
-    c_net.number_format = '#,##0'
-    c_net.fill = styles.POSITIVE_FILL if net_amount >= 0 else styles.WARNING_FILL
-
-def _auto_adjust_columns(ws):
-    """Ustunlarni avtomatik sozlash"""
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        
-        for cell in column:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-        
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+
+    values += [
+        (rate, MONEY_STYLE),          # Soatlik narx
+        (total_hours, TOTAL_STYLE),   # Jami soat
+        (advance, MONEY_STYLE),       # Avans
+        (calculated, MONEY_STYLE),    # Hisoblangan
+        (net_amount, NET_STYLE),      # Qo'lga tegadi
+    ]
+
+    return values
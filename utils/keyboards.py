@@ -5,6 +5,7 @@ from aiogram.types import (
     InlineKeyboardButton, 
     ReplyKeyboardRemove
 )
+from typing import Dict, List
 
 def admin_main_kb():
     """Admin asosiy menyusi"""
@@ -38,7 +39,7 @@ cancel_kb = ReplyKeyboardMarkup(
 # YANGI: Hisobot paytida chiqadigan tugmalar
 report_kb = ReplyKeyboardMarkup(
     keyboard=[
-        [KeyboardButton(text="➡️ O'tkazib yuborish")],
+        [KeyboardButton(text="➡️ O'tkazib yuborish"), KeyboardButton(text="📋 Ommaviy kiritish")],
         [KeyboardButton(text="❌ Bekor qilish")]
     ], 
     resize_keyboard=True
@@ -77,3 +78,85 @@ def approval_kb(worker_id: int, amount: float):
             ]
         ]
     )
+
+def report_period_kb(year: int, last_month: int, month_names: Dict[int, str], has_next: bool):
+    """Excel hisobot davrini tanlash: oylar, to'liq yil va yillar orasida o'tish"""
+    buttons = [
+        InlineKeyboardButton(text=month_names[month], callback_data=f"report_month_{year}_{month}")
+        for month in range(1, last_month + 1)
+    ]
+    rows = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+    rows.append([InlineKeyboardButton(text=f"📅 To'liq yil ({year})", callback_data=f"report_year_{year}")])
+
+    nav = [InlineKeyboardButton(text=f"◀️ {year - 1}", callback_data=f"report_pick_{year - 1}")]
+    if has_next:
+        nav.append(InlineKeyboardButton(text=f"{year + 1} ▶️", callback_data=f"report_pick_{year + 1}"))
+    rows.append(nav)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def workers_page_kb(workers: List[Dict], has_prev: bool, has_next: bool):
+    """Ishchilar ro'yxati sahifasi: har bir ishchi - tafsilot tugmasi, pastda sahifalar orasida o'tish"""
+    rows = [
+        [InlineKeyboardButton(
+            text=f"{'🟢' if worker.get('telegram_id') else '⚪️'} {worker['name']} · {worker['rate']:,.0f}",
+            callback_data=f"wl_show_{worker['id']}"
+        )]
+        for worker in workers
+    ]
+
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton(text="◀️ Oldingi", callback_data=f"wl_prev_{workers[0]['id']}"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="Keyingi ▶️", callback_data=f"wl_next_{workers[-1]['id']}"))
+    if nav:
+        rows.append(nav)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def worker_detail_kb(worker_id: int):
+    """Ishchi tafsilotidan ro'yxatning shu joyiga qaytish"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="⬅️ Ro'yxatga qaytish", callback_data=f"wl_at_{worker_id}")]]
+    )
+
+# --- OMMAVIY DAVOMAT ---
+bulk_report_kb = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔲 Jadval", callback_data="dg_open"),
+            InlineKeyboardButton(text="📄 Shablon (Excel)", callback_data="dg_template")
+        ]
+    ]
+)
+
+# Jadvalda "hamma uchun" tanlash mumkin bo'lgan soatlar
+GRID_DEFAULTS = (8, 10, 12)
+
+def attendance_grid_kb(workers: List[Dict], hours: Dict[int, float], default: float,
+                       has_prev: bool, has_next: bool):
+    """Davomat jadvali sahifasi: ishchini bosish soatini almashtiradi (hamma uchun -> 0 -> yarim kun)"""
+    first_id = workers[0]['id'] if workers else 0
+    rows = [[
+        InlineKeyboardButton(
+            text=f"✅ Hamma: {value:g}" if value == default else f"{value:g}",
+            callback_data=f"dg_d_{value:g}_{first_id}"
+        )
+        for value in GRID_DEFAULTS
+    ]]
+    for worker in workers:
+        value = hours.get(worker['id'], default)
+        mark = "🟰" if value == default else ("❌" if value == 0 else "✏️")
+        rows.append([InlineKeyboardButton(
+            text=f"{mark} {worker['name']} — {value:g} soat",
+            callback_data=f"dg_t_{worker['id']}_{first_id}"
+        )])
+
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton(text="◀️", callback_data=f"dg_p_{first_id}"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="▶️", callback_data=f"dg_n_{workers[-1]['id']}"))
+    if nav:
+        rows.append(nav)
+    rows.append([InlineKeyboardButton(text="💾 Saqlash", callback_data="dg_save")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import logging
+import traceback
+from typing import Optional
+from utils import metrics
+
+# Tekshirish oralig'i va "loop to'xtab qoldi" chegarasi (soniya). LOOP_LAG_THRESHOLD=off - o'chirilgan
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_LAG_THRESHOLD = os.getenv("LOOP_LAG_THRESHOLD", "0.25")
+# Logdagi stek chuqurligi (eng ichki kadrlar)
+LOOP_LAG_STACK_DEPTH = int(os.getenv("LOOP_LAG_STACK_DEPTH", "12"))
+
+LAG_SECONDS = metrics.histogram("loop_lag_seconds", "Event loop kechikishi (sleep kutilganidan qancha kech uyg'ondi)",
+                                buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+STALLS = metrics.counter("loop_stalls_total", "Event loop chegaradan uzoq bloklangan holatlar", ("handler",))
+STALL_SECONDS = metrics.counter("loop_stall_seconds_total", "Bloklanishlarning umumiy davomiyligi", ("handler",))
+
+class LoopMonitor:
+    """Event loop kechikishini kuzatish va uni bloklagan kodni topish
+
+    - loop ichidagi task har `interval` da uxlab uyg'onadi: kechikish loop_lag_seconds ga yoziladi
+      va "yurak urishi" yangilanadi
+    - alohida thread yurak urishini kuzatadi: loop `threshold` dan uzoq javob bermasa, loop thread ining
+      shu paytdagi stekini oladi (bloklayotgan kod hali ishlayapti) va uni ishlayotgan aiogram
+      handleriga (metrics middleware dagi task -> handler) bog'laydi
+    - har bir bloklanish bir marta logga yoziladi; davomiyligi loop qaytgach hisoblanadi
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = 0.25,
+                 stack_depth: int = LOOP_LAG_STACK_DEPTH):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.stalls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._beat = 0.0
+        # Joriy bloklanish: qaysi yurak urishidan keyin boshlangan va kimga tegishli
+        self._stall_beat: Optional[float] = None
+        self._stall_label: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopMonitor"]:
+        if LOOP_LAG_THRESHOLD.lower() == "off":
+            return None
+        return cls(interval=LOOP_LAG_INTERVAL, threshold=float(LOOP_LAG_THRESHOLD))
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._sample())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+        logging.info(f"✅ Event loop kuzatuvchisi ishga tushdi (chegara {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 1.0)
+            self._thread = None
+
+    # --- LOOP ICHIDA ---
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            LAG_SECONDS.observe(lag)
+            self._finish_stall(lag)
+            self._beat = time.monotonic()
+
+    def _finish_stall(self, lag: float):
+        if self._stall_beat is None:
+            return
+        label = self._stall_label
+        self._stall_beat = self._stall_label = None
+        STALL_SECONDS.inc(label, amount=lag)
+        logging.warning(f"⚠️ Event loop {lag * 1000:.0f} ms bloklandi ({label})")
+
+    # --- KUZATUVCHI THREAD ---
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            if time.monotonic() - beat - self.interval < self.threshold or self._stall_beat == beat:
+                continue
+            try:
+                self._capture(beat)
+            except Exception as e:
+                logging.error(f"❌ Event loop stekini olishda xato: {e}")
+
+    def _capture(self, beat: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        if self._beat != beat:
+            # Loop shu orada qaytdi - stek endi bloklagan kodga tegishli emas
+            return
+        label = metrics.active_handler(task)
+        if label is None:
+            # Update emas: fon vazifasi (notifier, scheduler ...) yoki task siz callback
+            label = getattr(task.get_coro(), "__qualname__", "task") if task else "loop"
+
+        self._stall_label = label
+        self._stall_beat = beat
+        self.stalls += 1
+        STALLS.inc(label)
+
+        stack = "".join(traceback.format_stack(frame)[-self.stack_depth:]) if frame else "(stek yo'q)\n"
+        logging.warning(
+            f"🐌 Event loop {self.threshold * 1000:.0f} ms dan ortiq javob bermayapti: {label}\n"
+            f"{stack.rstrip()}"
+        )
@@ -0,0 +1,239 @@
+import asyncio
+import os
+import time
+import logging
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+# Metrikalar HTTP server manzili (METRICS_PORT=off - o'chirilgan)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT", "9100")
+
+# Oraliqlar (soniya)
+HANDLER_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+ACQUIRE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+class Gauge:
+    """Qiymati o'qish paytida callback dan olinadi (masalan, pool hajmi)"""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(value)}"]
+
+class Histogram:
+    """Prometheus histogrammasi. observe() - bitta bisect va ikkita qo'shish (issiq yo'lda arzon)"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = HANDLER_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.buckets = tuple(sorted(buckets))
+        # label qiymatlari -> [har bir oraliq + Inf dagi sanoq (kumulyativ emas), yig'indi]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def counter(name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+    return registry.register(Counter(name, help_text, labels))
+
+def gauge(name: str, help_text: str, callback: Callable[[], float]) -> Gauge:
+    return registry.register(Gauge(name, help_text, callback))
+
+def histogram(name: str, help_text: str, labels: Tuple[str, ...] = (),
+              buckets: Tuple[float, ...] = HANDLER_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, help_text, labels, buckets))
+
+# --- METRIKALAR ---
+HANDLER_SECONDS = histogram("bot_handler_seconds", "Update ni qayta ishlash vaqti (filtrlar va FSM bilan)",
+                            ("handler",))
+HANDLER_ERRORS = counter("bot_handler_errors_total", "Handlerdan chiqib ketgan xatolar", ("handler", "error"))
+QUERY_SECONDS = histogram("db_query_seconds", "SQL so'rovlar vaqti", ("query",), QUERY_BUCKETS)
+QUERY_ERRORS = counter("db_query_errors_total", "Xato bilan tugagan SQL so'rovlar", ("query",))
+SLOW_QUERIES = counter("db_slow_queries_total", "SLOW_QUERY_MS chegarasidan sekin so'rovlar", ("query",))
+POOL_ACQUIRE_SECONDS = histogram("db_pool_acquire_seconds", "Pool dan ulanish olishni kutish vaqti",
+                                 buckets=ACQUIRE_BUCKETS)
+
+# --- HANDLER O'LCHOVLARI (aiogram middleware) ---
+UNHANDLED = "unhandled"
+
+# Joriy update ni qaysi handler bajaryapti (outer middleware yaratadi, inner middleware to'ldiradi)
+_current_handler: ContextVar[Optional[list]] = ContextVar("current_handler", default=None)
+# Ishlayotgan update lar: task -> handler nomi (loop_monitor boshqa thread dan o'qiydi)
+_active_updates: Dict[asyncio.Task, list] = {}
+
+def active_handler(task: Optional[asyncio.Task]) -> Optional[str]:
+    """Task hozir qaysi handlerni bajaryapti (update emas bo'lsa None)"""
+    slot = _active_updates.get(task) if task is not None else None
+    return slot[0] if slot else None
+
+def handler_label(callback: Callable) -> str:
+    """handlers.admin modulidagi show_current_status -> "admin.show_current_status" """
+    module = getattr(callback, "__module__", None) or "?"
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', repr(callback))}"
+
+class HandlerLabelMiddleware(BaseMiddleware):
+    """Filtrlardan o'tgan handler nomini outer middleware ga yetkazish (inner, har bir event turi uchun)"""
+
+    def __init__(self):
+        self._labels: Dict[int, str] = {}
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        slot = _current_handler.get()
+        handler_object = data.get("handler")
+        if slot is not None and handler_object is not None:
+            label = self._labels.get(id(handler_object))
+            if label is None:
+                label = self._labels[id(handler_object)] = handler_label(handler_object.callback)
+            slot[0] = label
+        return await handler(event, data)
+
+class MetricsMiddleware(BaseMiddleware):
+    """Update outer middleware: har bir handler uchun kechikish histogrammasi va xatolar soni"""
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        slot = [UNHANDLED]
+        token = _current_handler.set(slot)
+        task = asyncio.current_task()
+        _active_updates[task] = slot
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.inc(slot[0], type(e).__name__)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, slot[0])
+            _active_updates.pop(task, None)
+            _current_handler.reset(token)
+
+def setup_dispatcher(dp: Dispatcher):
+    """Middleware larni ulash (routerlar qo'shilgandan keyin ham, oldin ham ishlaydi)"""
+    dp.update.outer_middleware(MetricsMiddleware())
+    labeler = HandlerLabelMiddleware()
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(labeler)
+
+# --- HTTP ENDPOINT ---
+class MetricsServer:
+    """/metrics - Prometheus matn formati (faqat lokal tarmoq uchun)"""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = 9100):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=registry.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    async def start(self) -> bool:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            logging.error(f"❌ Metrikalar serverini ishga tushirib bo'lmadi ({self.host}:{self.port}): {e}")
+            await self._runner.cleanup()
+            self._runner = None
+            return False
+        logging.info(f"✅ Metrikalar: http://{self.host}:{self.port}/metrics")
+        return True
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+def metrics_server_from_env() -> Optional[MetricsServer]:
+    if METRICS_PORT.lower() == "off":
+        return None
+    return MetricsServer(METRICS_HOST, int(METRICS_PORT))
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import logging
+from typing import Dict, Iterable, Optional
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+from database import requests as db
+
+class RateLimiter:
+    """Chaqiruvlar orasida teng oraliq (soniyada `rate` ta). pause() - hammasini to'xtatib turish"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    def reserve(self) -> float:
+        """Keyingi bo'sh vaqtni band qilish. Qaytaradi: kutish kerak bo'lgan soniyalar"""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        return slot - now
+
+    def pause(self, seconds: float):
+        now = asyncio.get_running_loop().time()
+        self._next = max(self._next, now + seconds)
+
+class NotificationSender:
+    """notification_outbox dagi xabarlarni Telegram limitlariga rioya qilib yuborish
+
+    - global_rate: bot bo'yicha soniyadagi xabarlar (Telegram ~30/s)
+    - per_chat_interval: bitta chatga ketma-ket xabarlar orasidagi minimal vaqt (~1/s)
+    - concurrency: bir vaqtda ochiq so'rovlar; batch_size: navbatdan bir martada olinadigan xabarlar
+    - RetryAfter bo'lsa butun yuborish ko'rsatilgan vaqtga to'xtatiladi va xabar qayta navbatga qo'yiladi
+    - tarmoq xatolarida eksponensial kutish, max_attempts dan keyin 'failed'
+    """
+
+    def __init__(self, global_rate: float = 25, per_chat_interval: float = 1.0, concurrency: int = 10,
+                 batch_size: int = 50, poll_interval: float = 2.0, max_attempts: int = 5, lease: float = 60):
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._bot: Optional[Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._limiter: Optional[RateLimiter] = None
+        self._chat_next: Dict[int, float] = {}
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+
+    @classmethod
+    def from_env(cls) -> "NotificationSender":
+        return cls(
+            global_rate=float(os.getenv("NOTIFY_RATE", "25")),
+            per_chat_interval=float(os.getenv("NOTIFY_CHAT_INTERVAL", "1.0")),
+            concurrency=int(os.getenv("NOTIFY_CONCURRENCY", "10")),
+            batch_size=int(os.getenv("NOTIFY_BATCH_SIZE", "50")),
+            max_attempts=int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+        )
+
+    # --- NAVBATGA QO'SHISH (handlerlar uchun) ---
+
+    async def enqueue(self, chat_id: int, text: str,
+                      reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+        """Xabarni navbatga qo'yish va darhol qaytish"""
+        return await self.enqueue_many([(chat_id, text, reply_markup)]) > 0
+
+    async def enqueue_many(self, items: Iterable[tuple]) -> int:
+        """[(chat_id, matn, reply_markup yoki None), ...] - bitta INSERT bilan"""
+        rows = [
+            (chat_id, text, markup.model_dump_json(exclude_none=True) if markup else None)
+            for chat_id, text, markup in items
+        ]
+        count = await db.enqueue_notifications(rows)
+        if count:
+            self.wake()
+        return count
+
+    def wake(self):
+        """Navbatda yangi xabar bor - kutmasdan yuborishni boshlash"""
+        if self._wakeup:
+            self._wakeup.set()
+
+    # --- YUBORUVCHI ---
+
+    def start(self, bot: Bot):
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        self._limiter = RateLimiter(self.global_rate)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logging.info(f"✅ Xabar yuboruvchi ishga tushdi ({self.global_rate:g}/s, {self.concurrency} parallel)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logging.error(f"❌ Xabar yuboruvchida xato: {e}")
+                processed = 0
+
+            if processed < self.batch_size:
+                # Navbat bo'sh: yangi xabar (wake) yoki keyingi tekshiruvni kutamiz
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_batch(self) -> int:
+        """Navbatdan bitta to'plamni olib, parallel yuborish. Qaytaradi: olingan xabarlar soni"""
+        batch = await db.claim_notifications(self.batch_size, self.lease)
+        if not batch:
+            return 0
+
+        slots = asyncio.Semaphore(self.concurrency)
+        outcome: Dict[int, bool] = {}
+        try:
+            results = await asyncio.gather(*(self._send(item, slots, outcome) for item in batch),
+                                           return_exceptions=True)
+            for error in results:
+                # Holatni yozib bo'lmagan xabar lease tugagach qayta navbatga qaytadi
+                if isinstance(error, Exception):
+                    logging.error(f"❌ Xabar holatini yozishda xato: {error}")
+        finally:
+            # To'xtatilganda ham: yuborilganlar bitta UPDATE bilan belgilanadi (qayta yuborilmaydi),
+            # hali yuborilmaganlar lease tugashini kutmasdan navbatga qaytariladi
+            await db.mark_notifications_sent([item_id for item_id, ok in outcome.items() if ok])
+            await db.release_notifications([item['id'] for item in batch if item['id'] not in outcome])
+        self._cleanup_chats()
+        return len(batch)
+
+    def _cleanup_chats(self):
+        now = asyncio.get_running_loop().time()
+        for chat_id in [c for c, t in self._chat_next.items() if t < now]:
+            lock = self._chat_locks.get(chat_id)
+            if lock is None or not lock.locked():
+                self._chat_locks.pop(chat_id, None)
+                del self._chat_next[chat_id]
+
+    async def _send(self, item: dict, slots: asyncio.Semaphore, outcome: Dict[int, bool]):
+        # Bitta chatga xabarlar navbat bilan (Lock FIFO - tartib saqlanadi), oraliq haqiqiy yuborishdan hisoblanadi
+        lock = self._chat_locks.setdefault(item['chat_id'], asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            chat_wait = self._chat_next.get(item['chat_id'], 0.0) - loop.time()
+            if chat_wait > 0:
+                await asyncio.sleep(chat_wait)
+            async with slots:
+                outcome[item['id']] = await self._deliver(item)
+
+    async def _deliver(self, item: dict) -> bool:
+        loop = asyncio.get_running_loop()
+        delay = self._limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._chat_next[item['chat_id']] = loop.time() + self.per_chat_interval
+
+        markup = InlineKeyboardMarkup.model_validate_json(item['reply_markup']) if item['reply_markup'] else None
+        try:
+            await self._bot.send_message(item['chat_id'], item['text'], reply_markup=markup)
+            self.sent += 1
+            return True
+        except TelegramRetryAfter as e:
+            # Flood limit bot bo'yicha - hamma yuborishni to'xtatamiz; xabarning urinishi sarflanmaydi
+            self._limiter.pause(e.retry_after)
+            self.retried += 1
+            await db.retry_notification(item['id'], e.retry_after, str(e), count_attempt=False)
+            logging.warning(f"⚠️ Telegram limiti: {e.retry_after} s kutiladi")
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Bot bloklangan / chat topilmadi - qayta urinish foydasiz
+            self.failed += 1
+            await db.fail_notification(item['id'], str(e))
+            logging.warning(f"⚠️ Xabar yuborilmadi ({item['chat_id']}): {e}")
+        except Exception as e:
+            if item['attempts'] >= self.max_attempts:
+                self.failed += 1
+                await db.fail_notification(item['id'], str(e))
+                logging.error(f"❌ Xabar {item['attempts']} urinishdan keyin yuborilmadi ({item['chat_id']}): {e}")
+            else:
+                self.retried += 1
+                await db.retry_notification(item['id'], min(2 ** item['attempts'], 300), str(e))
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {'sent': self.sent, 'retried': self.retried, 'failed': self.failed}
+
+notifier = NotificationSender.from_env()
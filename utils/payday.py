@@ -0,0 +1,131 @@
+import asyncio
+import html
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+from database import requests as db
+from utils.notifier import notifier
+
+PAYDAY_KIND = "payday"
+
+def format_bold(text: str) -> str:
+    return f"<b>{text}</b>"
+
+def stats_text(stats: Dict[str, Any], period: date) -> str:
+    """Ishchining shaxsiy hisobi ("💰 Mening hisobim" va oylik kuni xabari uchun bir xil)"""
+    salary = stats['hours'] * stats['rate']
+    net_salary = salary - stats['advance']
+
+    return (
+        f"🧾 {format_bold('SHAXSIY HISOB')}\n"
+        f"🗓 {period.strftime('%m.%Y')}\n"
+        f"────────────────\n\n"
+        f"👤 <b>{stats['name']}</b>\n"
+        f"💎 Stavka: {stats['rate']:,.0f} so'm\n\n"
+        f"⏱ Ishlangan: <b>{stats['hours']} soat</b>\n"
+        f"💵 Hisoblangan: <b>{salary:,.0f} so'm</b>\n"
+        f"💸 Avanslar: <b>{stats['advance']:,.0f} so'm</b>\n"
+        f"────────────────\n"
+        f"💰 <b>QOLGA TEGADI: {net_salary:,.0f} so'm</b>"
+    )
+
+class PaydayBroadcaster:
+    """Oylik kuni barcha aktiv ishchilarga shaxsiy hisobini yuborish
+
+    - ko'rsatkichlar bitta so'rovda (payroll_monthly), xabarlar bir martada tayyorlanadi
+    - hammasi bitta tranzaksiyada outbox ga yoziladi (priority=1: oddiy xabarlar navbatni kutmaydi),
+      yuborishni NotificationSender Telegram limitlari bilan bajaradi
+    - holat bazada: bot qayta ishga tushsa resume() kuzatishni davom ettiradi,
+      shu oy uchun qayta ishga tushirish xabarlarni takrorlamaydi
+    - hamma xabar yuborilgach (yoki rad etilgach) adminlarga yakuniy hisobot
+    """
+
+    def __init__(self, poll_interval: float = 3.0):
+        self.poll_interval = poll_interval
+        self._watchers: Dict[int, asyncio.Task] = {}
+
+    async def start(self, year: int, month: int, admins: Iterable[int], progress=None) -> Optional[Dict[str, Any]]:
+        """Ommaviy xabarni boshlash (yoki tugallanmaganini davom ettirish)
+
+        Qaytaradi: {'id', 'total', 'resumed'} yoki xato bo'lsa None.
+        """
+        period = date(year, month, 1)
+        try:
+            rows = await db.get_payday_stats(year, month)
+            items = [(row['telegram_id'], stats_text(row, period), None) for row in rows]
+            info = await db.create_broadcast(PAYDAY_KIND, period, items)
+        except db.DatabaseError:
+            return None
+
+        notifier.wake()
+        self._watch(info['id'], period, list(admins), progress)
+        logging.info(f"✅ Oylik xabarlari ({period:%m.%Y}): {info['total']} ta"
+                     + (" (davom ettirildi)" if info['resumed'] else ""))
+        return info
+
+    async def resume(self, admins: Iterable[int]):
+        """Bot qayta ishga tushganda tugallanmagan ommaviy xabarlarni kuzatishni davom ettirish"""
+        try:
+            broadcasts = await db.get_running_broadcasts()
+        except db.DatabaseError:
+            logging.error("❌ Tugallanmagan oylik xabarlarini tiklab bo'lmadi")
+            return
+        for broadcast in broadcasts:
+            if broadcast['kind'] == PAYDAY_KIND:
+                self._watch(broadcast['id'], broadcast['month'], list(admins))
+
+    def _watch(self, broadcast_id: int, period: date, admins: List[int], progress=None):
+        watcher = self._watchers.get(broadcast_id)
+        if watcher and not watcher.done():
+            return
+        task = asyncio.get_running_loop().create_task(self._run(broadcast_id, period, admins, progress))
+        self._watchers[broadcast_id] = task
+        task.add_done_callback(lambda _: self._watchers.pop(broadcast_id, None))
+
+    async def _run(self, broadcast_id: int, period: date, admins: List[int], progress=None):
+        while True:
+            try:
+                state = await db.get_broadcast_progress(broadcast_id)
+            except db.DatabaseError:
+                state = None  # baza qaytgach kuzatish davom etadi
+            if state is not None:
+                done = state['sent'] + state['failed']
+                total = done + state['pending']
+                if progress:
+                    progress.messages(done, total)
+                if state['pending'] == 0:
+                    break
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            if await db.finish_broadcast(broadcast_id, state['sent'], state['failed']):
+                await self._report(broadcast_id, period, state, admins)
+        except db.DatabaseError:
+            logging.error(f"❌ Oylik xabarlari yakunini yozib bo'lmadi (#{broadcast_id})")
+
+    async def _report(self, broadcast_id: int, period: date, state: Dict[str, int], admins: List[int]):
+        text = (
+            f"📨 {format_bold('OYLIK XABARLARI YUBORILDI')}\n"
+            f"🗓 {period.strftime('%m.%Y')}\n"
+            f"────────────────\n\n"
+            f"✅ Yetkazildi: <b>{state['sent']}</b>\n"
+            f"❌ Yetkazilmadi: <b>{state['failed']}</b>"
+        )
+        if state['failed']:
+            failures = await db.get_broadcast_failures(broadcast_id)
+            text += "\n\n" + "\n".join(
+                f"• {row['name'] or '?'}: <i>{html.escape((row['last_error'] or '').split(' - ')[-1][:60])}</i>"
+                for row in failures
+            )
+            if state['failed'] > len(failures):
+                text += f"\n… va yana {state['failed'] - len(failures)} ta"
+
+        await notifier.enqueue_many((admin_id, text, None) for admin_id in admins)
+
+    async def stop(self):
+        tasks = list(self._watchers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+payday = PaydayBroadcaster()
@@ -0,0 +1,78 @@
+import os
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from database import events
+
+# Xotirada saqlanadigan hisobotlar soni (LRU)
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "8"))
+
+# Kalitdagi oy o'rnida: butun yil hisoboti
+YEAR_REPORT = 0
+
+@dataclass
+class CachedReport:
+    """Tayyor hisobot: fayl baytlari va birinchi yuborilgandagi Telegram file_id"""
+    data: bytes
+    workers_count: int
+    file_id: Optional[str] = None
+
+class ReportCache:
+    """(yil, oy yoki YEAR_REPORT, ma'lumot versiyasi) bo'yicha tayyor hisobotlar keshi"""
+
+    def __init__(self, max_entries: int = REPORT_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, CachedReport]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[CachedReport]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, entry: CachedReport):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set_file_id(self, key: Tuple, file_id: str):
+        entry = self._entries.get(key)
+        if entry:
+            entry.file_id = file_id
+
+    def evict_month(self, year: Optional[int] = None, month: Optional[int] = None):
+        """Oy bo'yicha tozalash (shu yilning yillik hisoboti ham, oy=0). Oy berilmasa - hammasi"""
+        if year is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == year and k[1] in (month, YEAR_REPORT)]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+report_cache = ReportCache()
+
+def _on_month_changed(data: dict):
+    # Versiya kalitda bor, eski yozuvlar baribir ishlatilmaydi - faqat xotirani bo'shatamiz
+    month = data.get('month')
+    if not month:
+        report_cache.evict_month()
+        return
+    try:
+        year, month_num = (int(part) for part in month.split("-"))
+    except ValueError:
+        logging.warning(f"⚠️ Noto'g'ri oy: {month}")
+        return
+    report_cache.evict_month(year, month_num)
+
+events.subscribe(events.ATTENDANCE_CHANGED, _on_month_changed)
+events.subscribe(events.ADVANCE_CHANGED, _on_month_changed)
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import time
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+class ReportQueueFull(Exception):
+    """Navbatda joy yo'q"""
+    pass
+
+class ReportAlreadyRunning(Exception):
+    """Shu admin uchun shu oy hisoboti allaqachon tayyorlanmoqda"""
+    pass
+
+class ReportService:
+    """Hisobotlarni event loop dan tashqarida (thread/process pool) yaratish
+
+    - workers: bir vaqtda ishlaydigan hisobotlar soni
+    - queue_size: kutayotgan + ishlayotgan hisobotlar chegarasi
+    - bir xil kalit (admin, yil, oy) uchun parallel so'rovlar rad etiladi
+    - sheet_workers: ko'p qismli hisobot bo'laklari (yillik hisobot oylari) uchun process pool hajmi
+      (openpyxl sof Python - thread larda GIL tufayli parallel ishlamaydi)
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 2, queue_size: int = 8,
+                 sheet_workers: int = 2):
+        self.mode = mode if mode in ("thread", "process") else "thread"
+        self.workers = max(1, workers)
+        self.queue_size = max(self.workers, queue_size)
+        self.sheet_workers = max(1, sheet_workers)
+        self._executor: Optional[Executor] = None
+        self._sheet_executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._active: Set[Hashable] = set()
+
+    @classmethod
+    def from_env(cls) -> "ReportService":
+        return cls(
+            mode=os.getenv("REPORT_EXECUTOR", "thread").lower(),
+            workers=int(os.getenv("REPORT_WORKERS", "2")),
+            queue_size=int(os.getenv("REPORT_QUEUE_SIZE", "8")),
+            sheet_workers=int(os.getenv("REPORT_SHEET_WORKERS", str(os.cpu_count() or 1)))
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report")
+            logging.info(f"✅ Hisobot xizmati: {self.mode} pool, {self.workers} ta ishchi")
+        return self._executor
+
+    def _get_sheet_executor(self) -> Executor:
+        if self._sheet_executor is None:
+            self._sheet_executor = ProcessPoolExecutor(max_workers=self.sheet_workers)
+            logging.info(f"✅ Hisobot bo'laklari pool i: {self.sheet_workers} ta jarayon")
+        return self._sheet_executor
+
+    @contextmanager
+    def job(self, key: Hashable):
+        """Navbatdan joy olish. Band bo'lsa ReportAlreadyRunning / ReportQueueFull"""
+        if key in self._active:
+            raise ReportAlreadyRunning(key)
+        if len(self._active) >= self.queue_size:
+            raise ReportQueueFull(key)
+
+        self._active.add(key)
+        try:
+            yield
+        finally:
+            self._active.discard(key)
+
+    async def run(self, func: Callable[..., Any], *args,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Any:
+        """func(*args) ni pool da bajarish. progress faqat thread rejimida uzatiladi"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        loop = asyncio.get_running_loop()
+        call = partial(func, *args)
+        if progress and self.mode == "thread":
+            # Pool thread idan event loop ga xavfsiz qaytish
+            call = partial(func, *args,
+                           progress=lambda done, total: loop.call_soon_threadsafe(progress, done, total))
+
+        async with self._slots:
+            return await loop.run_in_executor(self._get_executor(), call)
+
+    async def run_parallel(self, func: Callable[..., Any], calls: Dict[Hashable, tuple],
+                           progress: Optional[Callable[[int, int], None]] = None) -> Dict[Hashable, Any]:
+        """Mustaqil bo'laklarni (masalan, yillik hisobot oylari) process pool da parallel bajarish
+
+        calls: kalit -> func argumentlari. Qaytaradi: kalit -> natija (pickle qilinadigan oddiy turlar).
+        Butun guruh bitta hisobot o'rnini egallaydi. progress(tayyor, jami) event loop da chaqiriladi.
+        Bitta bo'lak xato bersa, qolganlari bekor qilinadi va xato yuqoriga uzatiladi.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        loop = asyncio.get_running_loop()
+        results: Dict[Hashable, Any] = {}
+
+        async with self._slots:
+            executor = self._get_sheet_executor()
+            futures = {loop.run_in_executor(executor, partial(func, *args)): key
+                       for key, args in calls.items()}
+            pending = set(futures)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        results[futures[future]] = future.result()
+                    if progress:
+                        progress(len(results), len(calls))
+            finally:
+                for future in pending:
+                    future.cancel()
+        return results
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._active)
+
+    def shutdown(self):
+        for executor in (self._executor, self._sheet_executor):
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._sheet_executor = None
+
+class ProgressMessage:
+    """Bot xabarini jarayon holati bilan tahrirlash (Telegram limitlari uchun siyrak)"""
+
+    def __init__(self, message, title: str, interval: float = 2.0):
+        self.message = message
+        self.title = title
+        self.interval = interval
+        self._last_edit = 0.0
+        self._last_text = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def stage(self, text: str):
+        """Bosqichni darhol ko'rsatish"""
+        await self._edit(text)
+
+    def rows(self, done: int, total: int):
+        """generate_report_bytes progress callback (event loop ichida chaqiriladi)"""
+        self._report("📊 Excel yaratilmoqda", done, total)
+
+    def months(self, done: int, total: int):
+        """run_parallel progress callback: hisoblangan oylar (build_month_rows)"""
+        self._report("🧮 Oylar hisoblandi", done, total)
+
+    def sheets(self, done: int, total: int):
+        """generate_year_report_bytes progress callback: kitobga yozilgan oy varaqlari"""
+        self._report("📊 Oy varaqlari", done, total)
+
+    def messages(self, done: int, total: int):
+        """Ommaviy xabar (oylik kuni) holati: yetkazilgan yoki rad etilgan xabarlar"""
+        self._report("📨 Yuborildi", done, total)
+
+    def _report(self, label: str, done: int, total: int):
+        now = time.monotonic()
+        if done < total and now - self._last_edit < self.interval:
+            return
+
+        self._last_edit = now
+        percent = done * 100 // total if total else 100
+        task = asyncio.get_running_loop().create_task(
+            self._edit(f"{label}: {done}/{total} ({percent}%)")
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def close(self):
+        """Kutilayotgan tahrirlarni bekor qilish (xabar o'chirilishidan oldin)"""
+        for task in self._tasks:
+            task.cancel()
+
+    async def _edit(self, text: str):
+        full_text = f"{self.title}\n\n<i>{text}</i>"
+        if full_text == self._last_text:
+            return
+        self._last_edit = time.monotonic()
+        self._last_text = full_text
+        try:
+            await self.message.edit_text(full_text)
+        except Exception as e:
+            # "message is not modified" va shunga o'xshashlar muhim emas
+            logging.debug(f"Progress xabarini tahrirlab bo'lmadi: {e}")
+
+report_service = ReportService.from_env()
@@ -15,6 +15,7 @@ class DeleteWorker(StatesGroup):
 
 class DailyReport(StatesGroup):
     enter_hours = State()
+    bulk = State()
 
 class AdminAdvance(StatesGroup):
     select_worker = State()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+# Telegram secret_token talabi: 1-256 belgi, A-Z a-z 0-9 _ -
+_SECRET_RE = re.compile(r"^[A-Za-z0-9_-]{1,256}$")
+
+@dataclass
+class WebhookSettings:
+    """Webhook rejimi sozlamalari (.env dan)"""
+    base_url: str
+    path: str = "/webhook"
+    # Majburiy: sarlavhasiz yoki noto'g'ri sarlavhali POST lar 401 bilan rad etiladi
+    secret: str = ""
+    host: str = "0.0.0.0"
+    port: int = 8080
+    # Bir vaqtda ishlaydigan handlerlar soni (qolgan update lar navbatda kutadi)
+    concurrency: int = 100
+    # Telegram bir vaqtda ochadigan HTTPS ulanishlar soni (setWebhook max_connections, 1-100)
+    max_connections: int = 40
+
+    @classmethod
+    def from_env(cls) -> "WebhookSettings":
+        return cls(
+            base_url=os.getenv("WEBHOOK_URL", "").rstrip("/"),
+            path=os.getenv("WEBHOOK_PATH", "/webhook"),
+            secret=os.getenv("WEBHOOK_SECRET", ""),
+            host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+            port=int(os.getenv("WEBHOOK_PORT", "8080")),
+            concurrency=int(os.getenv("WEBHOOK_CONCURRENCY", "100")),
+            max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+        )
+
+    def validate(self):
+        """Xato sozlamada ValueError (bot ishga tushmaydi)"""
+        if not self.base_url:
+            raise ValueError("WEBHOOK_URL ko'rsatilmagan")
+        # Secret siz server portga yetgan har qanday POST ni update deb qabul qilardi (admin amallari ham)
+        if not self.secret:
+            raise ValueError("WEBHOOK_SECRET ko'rsatilmagan (webhook rejimida majburiy)")
+        if not _SECRET_RE.match(self.secret):
+            raise ValueError("WEBHOOK_SECRET faqat A-Z, a-z, 0-9, _ va - belgilaridan iborat bo'lishi kerak (1-256)")
+
+class ConcurrentRequestHandler(SimpleRequestHandler):
+    """Update ni darhol 200 bilan qabul qilib, fonda cheklangan parallellikda qayta ishlash
+
+    Telegram javobni kutmaydi (qayta yubormaydi), handlerlar esa semafor
+    orqali `concurrency` tadan oshmaydi - to'lov kunidagi to'lqin DB pool ni bo'g'maydi.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int,
+                 secret_token: Optional[str] = None, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._slots:
+            try:
+                await super()._background_feed_update(bot, update)
+            except Exception as e:
+                logging.error(f"❌ Webhook update ni qayta ishlashda xato: {e}")
+
+    @property
+    def pending(self) -> int:
+        """Qabul qilingan, lekin hali tugamagan update lar"""
+        return len(self._background_feed_update_tasks)
+
+async def run_webhook(bot: Bot, dp: Dispatcher, settings: WebhookSettings):
+    """aiohttp serverini ishga tushirib, webhook ni o'rnatish. Bekor qilinguncha ishlaydi"""
+    settings.validate()
+
+    app = web.Application()
+    handler = ConcurrentRequestHandler(dp, bot, settings.concurrency, secret_token=settings.secret)
+    handler.register(app, path=settings.path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.host, settings.port)
+    await site.start()
+    logging.info(f"✅ Webhook server: {settings.host}:{settings.port}{settings.path} "
+                 f"(parallellik: {settings.concurrency})")
+
+    try:
+        await bot.set_webhook(
+            f"{settings.base_url}{settings.path}",
+            secret_token=settings.secret,
+            max_connections=settings.max_connections,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logging.info(f"✅ Webhook o'rnatildi: {settings.base_url}{settings.path}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()